@@ -0,0 +1,27 @@
+import pytest
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy
+
+# 未安装 pytest-benchmark 时跳过整个基准测试目录
+pytest.importorskip("pytest_benchmark")
+
+
+def make_strategy(grid_levels, state_file="strategy_state.json"):
+    exchange = MockExchange(initial_price=10000, volatility=0.002, seed=1)
+    exchange.balance['USDT'] = 1e12
+    strategy = GridTradingStrategy(exchange, "BTC/USDT", state_file=state_file)
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.001, grid_levels=grid_levels,
+                                 position_amount=100, initial_capital=1e9, max_loss=0.2)
+    return strategy
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # 基准测试产生的状态文件、日志都写到临时目录
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def strategy_factory(workdir):
+    return make_strategy
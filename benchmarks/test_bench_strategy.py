@@ -0,0 +1,49 @@
+import pytest
+from cryptogrid.strategy import GridLevel, generate_grid
+from cryptogrid.trade_journal import TradeJournal
+
+GRID_SIZES = [10, 100, 1000]
+
+
+@pytest.mark.parametrize("grid_levels", GRID_SIZES)
+def test_handle_price_change(benchmark, strategy_factory, grid_levels):
+    strategy = strategy_factory(grid_levels)
+    # 先跑几轮让挂单窗口进入稳定状态，只测量常规 tick
+    for _ in range(5):
+        strategy.handle_price_change()
+    benchmark(strategy.handle_price_change)
+
+
+@pytest.mark.parametrize("levels", [1_000, 10_000, 100_000])
+def test_generate_grid(benchmark, levels):
+    grid = benchmark(generate_grid, 10000, 0.00001, levels)
+    assert len(grid) == 2 * levels - 1
+
+
+@pytest.mark.parametrize("grid_levels", GRID_SIZES)
+def test_save_strategy_state(benchmark, strategy_factory, grid_levels):
+    strategy = strategy_factory(grid_levels)
+    strategy.handle_price_change()
+    benchmark(strategy.save_strategy_state)
+
+
+@pytest.mark.parametrize("grid_levels", GRID_SIZES)
+def test_load_strategy_state(benchmark, strategy_factory, grid_levels):
+    strategy = strategy_factory(grid_levels)
+    strategy.handle_price_change()
+    strategy.save_strategy_state()
+    benchmark(strategy.load_strategy_state)
+    assert len(strategy.grid_levels) == 2 * grid_levels - 1
+
+
+@pytest.mark.parametrize("existing_trades", [0, 10_000, 100_000])
+def test_save_completed_trade(benchmark, workdir, existing_trades):
+    journal = TradeJournal(workdir / "completed_trades.jsonl", fsync_every=0)
+    level = GridLevel(1000000, 10000.0)
+    level.update({"amount": 0.01, "buy_executed_price": 10000, "sell_executed_price": 10100})
+    for _ in range(existing_trades):
+        level.save_completed_trade(journal)
+    journal.flush()
+    # 写入开销应与已有成交数无关
+    benchmark(level.save_completed_trade, journal)
+    journal.close()
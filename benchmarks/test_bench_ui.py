@@ -0,0 +1,25 @@
+import io
+import pytest
+from rich.console import Console
+from cryptogrid.ui_components import (
+    create_capital_status_panel, create_grid_status_panel, create_layout,
+    create_market_depth_panel, create_order_status_panel
+)
+
+
+def render_dashboard(snapshot, layout, console):
+    layout["capital_status"].update(create_capital_status_panel(snapshot))
+    layout["market_depth"].update(create_market_depth_panel(snapshot.market_depth))
+    layout["grid_status"].update(create_grid_status_panel(snapshot))
+    layout["order_status"].update(create_order_status_panel(snapshot))
+    console.print(layout)
+
+
+@pytest.mark.parametrize("grid_levels", [10, 100, 1000])
+def test_render_dashboard(benchmark, strategy_factory, grid_levels):
+    strategy = strategy_factory(grid_levels)
+    for _ in range(5):
+        strategy.handle_price_change()
+    snapshot = strategy.snapshots.latest
+    console = Console(file=io.StringIO(), width=160, height=60)
+    benchmark(render_dashboard, snapshot, create_layout(), console)
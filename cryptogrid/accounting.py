@@ -0,0 +1,104 @@
+class Accounting:
+    """
+    增量记账：每次成交和每个价格 tick 各更新一次，汇总字段都是 O(1) 读取，与档位数量无关
+    持仓成本按移动平均计算，买入手续费计入成本，卖出手续费计入已实现盈亏
+    """
+    # 需要持久化的字段
+    FIELDS = ("initial_capital", "capital", "position", "cost_basis", "realized_pnl", "fees",
+              "round_trips", "mark_price")
+
+    def __init__(self, initial_capital=0, mark_price=0):
+        """
+        :param initial_capital: 初始资金
+        :param mark_price: 计算未实现盈亏的价格
+        """
+        self.initial_capital = initial_capital
+        self.capital = initial_capital  # 可用资金（计价货币）
+        self.position = 0  # 持仓数量（基础货币）
+        self.cost_basis = 0  # 当前持仓的总成本（含买入手续费）
+        self.realized_pnl = 0  # 已实现盈亏
+        self.fees = 0  # 累计手续费（计价货币）
+        self.round_trips = 0  # 完成的买卖轮数
+        self.mark_price = mark_price
+
+    @property
+    def average_cost(self):
+        return self.cost_basis / self.position if self.position > 0 else 0
+
+    @property
+    def market_value(self):
+        return self.position * self.mark_price
+
+    @property
+    def unrealized_pnl(self):
+        return self.market_value - self.cost_basis
+
+    @property
+    def total_assets(self):
+        return self.capital + self.market_value
+
+    @property
+    def pnl(self):
+        return self.total_assets - self.initial_capital
+
+    @property
+    def pnl_rate(self):
+        return self.pnl / self.initial_capital if self.initial_capital else 0
+
+    def mark(self, price):
+        """
+        按最新价格重估持仓
+        """
+        self.mark_price = price
+
+    def on_fill(self, side, amount, price, fee=0):
+        """
+        记录一笔成交
+        :param side: buy / sell
+        :param amount: 成交数量
+        :param price: 成交均价
+        :param fee: 手续费（计价货币）
+        :return: 这笔成交的已实现盈亏，买入为 0
+        """
+        value = amount * price
+        self.fees += fee
+        if side == "buy":
+            self.capital -= value + fee
+            self.position += amount
+            self.cost_basis += value + fee
+            return 0
+        cost = self.average_cost * amount
+        realized = value - fee - cost
+        self.capital += value - fee
+        self.position -= amount
+        self.cost_basis -= cost
+        if self.position <= 1e-12:
+            # 清仓后丢弃浮点误差留下的残余成本
+            self.position = max(self.position, 0)
+            self.cost_basis = 0
+        self.realized_pnl += realized
+        return realized
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def update(self, data):
+        """
+        从 to_dict 的结果恢复，缺少的字段保持不变
+        """
+        for name in self.FIELDS:
+            if name in data:
+                setattr(self, name, data[name])
+
+    def summary(self):
+        return {
+            "total_assets": self.total_assets,
+            "capital": self.capital,
+            "position": self.position,
+            "pnl": self.pnl,
+            "realized_pnl": self.realized_pnl,
+            "unrealized_pnl": self.unrealized_pnl,
+            "fees": self.fees,
+            "average_cost": self.average_cost,
+            "round_trips": self.round_trips
+        }
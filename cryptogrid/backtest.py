@@ -0,0 +1,122 @@
+import os
+import numpy as np
+from cryptogrid.strategy import ACTIVE_BUY_LEVELS, generate_grid
+from cryptogrid.ticks import PriceScale
+
+# 每个分块最多处理的 (K线数 x 档位数) 元素个数，控制内存占用
+CHUNK_ELEMENTS = 4_000_000
+
+
+def load_prices(path, column="close"):
+    """
+    加载历史价格序列
+    :param path: .npy / .csv / .parquet 文件路径
+    :param column: CSV 和 Parquet 中的价格列名，CSV 没有表头时取最后一列
+    :return: 一维 float64 数组
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        return np.load(path, mmap_mode="r")
+    if ext == ".parquet":
+        import pandas as pd  # 只有读取 Parquet 时才需要 pandas/pyarrow
+        return pd.read_parquet(path, columns=[column])[column].to_numpy(dtype=np.float64)
+    if ext == ".csv":
+        with open(path, "r", encoding="utf-8") as f:
+            header = f.readline().strip().split(",")
+        try:
+            float(header[-1])
+            return np.loadtxt(path, delimiter=",", usecols=len(header) - 1, dtype=np.float64, ndmin=1)
+        except ValueError:
+            return np.loadtxt(path, delimiter=",", usecols=header.index(column), skiprows=1,
+                              dtype=np.float64, ndmin=1)
+    raise ValueError(f"不支持的价格文件格式: {path}")
+
+
+def run_backtest(prices, grid_size, grid_count, position_amount, initial_capital,
+                 initial_price=None, active_levels=ACTIVE_BUY_LEVELS, scale=None, fee_rate=0.0):
+    """
+    向量化回测 GridTradingStrategy 的成交逻辑
+    每根K线对应策略的一次 tick：价格下方 active_levels 档挂买单，价格跌到档位价成交，
+    成交后在档位价 + grid_price 挂卖单，涨到卖价成交后档位重置；
+    买单离开挂单窗口后撤单。所有档位和所有K线的穿越判断都用 NumPy 批量计算
+    :param prices: 价格序列（每根K线的收盘价或逐笔成交价）
+    :param initial_price: 网格中心价格，默认取第一根K线
+    :param scale: PriceScale 对象，档位和卖价与策略一样取整到 tick，下单数量向下取整到 lot
+    :param fee_rate: 手续费率，买卖都按成交额收取
+    :return: 与 get_summary 相同的资金/持仓/盈亏字段，以及成交次数和逐K线资产曲线
+    """
+    prices = np.asarray(prices, dtype=np.float64).ravel()
+    if initial_price is None:
+        initial_price = float(prices[0])
+
+    scale = scale or PriceScale()
+    ticks = np.array(sorted(generate_grid(initial_price, grid_size, grid_count, scale)), dtype=np.int64)
+    grid_ticks = scale.to_ticks(initial_price * grid_size)
+    levels = np.round(ticks * scale.tick_size, scale.price_digits)
+    sell_prices = np.round((ticks + grid_ticks) * scale.tick_size, scale.price_digits)
+    n_levels = len(levels)
+    n_bars = len(prices)
+
+    # below[t]: 严格低于价格的档位数，挂买单的窗口是 [below - active_levels, below)
+    below = np.searchsorted(levels, prices, side="left")
+    # sellable[t]: 卖价不高于价格的档位数，这些档位上的卖单会成交
+    sellable = np.searchsorted(sell_prices, prices, side="right")
+    # 上一根K线结束时的挂单窗口，第一根K线之前还没有挂单
+    prev_below = np.concatenate(([-active_levels], below[:-1]))[:n_bars]
+
+    j = np.arange(n_levels)[:, None]
+    holding = np.zeros(n_levels, dtype=bool)
+    buy_counts = np.zeros(n_levels, dtype=np.int64)
+    sell_counts = np.zeros(n_levels, dtype=np.int64)
+    capital_delta = np.zeros(n_bars)
+    position_delta = np.zeros(n_bars)
+    buy_qty = np.floor(position_amount / levels / scale.lot_size + 1e-9) * scale.lot_size
+    sell_qty = np.floor(position_amount / sell_prices / scale.lot_size + 1e-9) * scale.lot_size
+    # 与策略的记账一致：按成交额和手续费计算资金变化
+    buy_cost = buy_qty * levels * (1 + fee_rate)
+    sell_proceeds = sell_qty * sell_prices * (1 - fee_rate)
+
+    # 矩阵按 (档位, K线) 排列，沿时间轴的累积运算走连续内存
+    chunk = max(1, CHUNK_ELEMENTS // max(n_levels, 1))
+    for start in range(0, n_bars, chunk):
+        end = min(start + chunk, n_bars)
+        lo = np.maximum(below[start:end], prev_below[start:end] - active_levels)
+        hi = prev_below[start:end]
+        # 买单成交：价格从挂单窗口跌到档位价；卖单成交：价格涨到卖价
+        buy_event = (j >= lo) & (j < hi)
+        sell_event = j < sellable[start:end]
+
+        # 持仓状态是事件的滞回：事件编码为 2*t+1（买）/ 2*t（卖），
+        # 沿时间轴取累积最大值即得到最近一次事件，奇偶性就是持仓状态
+        times = 2 * np.arange(end - start, dtype=np.int32)
+        code = np.where(buy_event, times + 1, np.where(sell_event, times, -1))
+        np.maximum.accumulate(code, axis=1, out=code)
+        state = np.where(code >= 0, (code & 1).astype(bool), holding[:, None])
+        prev_state = np.hstack((holding[:, None], state[:, :-1]))
+        bought = state & ~prev_state
+        sold = prev_state & ~state
+        holding = state[:, -1]
+
+        buy_counts += bought.sum(axis=1)
+        sell_counts += sold.sum(axis=1)
+        capital_delta[start:end] = sell_proceeds @ sold - buy_cost @ bought
+        position_delta[start:end] = buy_qty @ bought - sell_qty @ sold
+
+    capital = initial_capital + np.cumsum(capital_delta)
+    position = np.cumsum(position_delta)
+    equity = capital + position * prices
+
+    total_assets = float(equity[-1]) if n_bars else initial_capital
+    pnl = total_assets - initial_capital
+    return {
+        "total_assets": total_assets,
+        "capital": float(capital[-1]) if n_bars else initial_capital,
+        "position": float(position[-1]) if n_bars else 0.0,
+        "pnl": pnl,
+        "pnl_rate": pnl / initial_capital,
+        "buy_count": int(buy_counts.sum()),
+        "sell_count": int(sell_counts.sum()),
+        "buy_counts": dict(zip(levels.tolist(), buy_counts.tolist())),
+        "sell_counts": dict(zip(levels.tolist(), sell_counts.tolist())),
+        "equity": equity
+    }
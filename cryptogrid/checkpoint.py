@@ -0,0 +1,87 @@
+import json
+import os
+import uuid
+from loguru import logger
+from cryptogrid.trade_journal import TradeJournal, iter_journal
+
+
+class StateCheckpointer:
+    """
+    策略状态检查点：完整快照 + 增量日志
+    每次只把变化的计数器和档位追加到 <filename>.delta，
+    增量条数达到 compact_every 后合并成新的完整快照
+    快照通过临时文件 + rename 原子替换，崩溃时不会留下写了一半的状态文件
+    每个快照有一个代号，增量记录带上它所跟随的快照代号，加载时只回放属于当前快照的增量，
+    这样在新快照已经替换、旧增量还没清空时崩溃，旧增量也不会覆盖新快照
+    """
+
+    def __init__(self, filename="strategy_state.json", compact_every=300, fsync_every=1):
+        """
+        :param filename: 快照文件路径
+        :param compact_every: 累计多少条增量后做一次合并
+        :param fsync_every: 增量日志每多少条执行一次fsync
+        """
+        self.filename = filename
+        self.delta_filename = f"{filename}.delta"
+        self.compact_every = compact_every
+        self.fsync_every = fsync_every
+        self.delta_count = 0
+        self.generation = None  # 当前快照的代号，旧版本的快照没有代号
+        self._journal = TradeJournal(self.delta_filename, fsync_every=fsync_every)
+
+    @property
+    def needs_compaction(self):
+        return self.delta_count >= self.compact_every
+
+    def append_delta(self, delta):
+        """
+        追加一条增量记录，记录中的值都是最新值，重复回放也不会出错
+        """
+        self._journal.append({**delta, "generation": self.generation})
+        self.delta_count += 1
+
+    def save_snapshot(self, state):
+        """
+        原子写入完整快照，并清空已经合并进快照的增量日志
+        """
+        generation = uuid.uuid4().hex
+        tmp_filename = f"{self.filename}.tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump({**state, "checkpoint_generation": generation}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, self.filename)
+        self.generation = generation
+
+        # 快照已落盘，之前的增量不再需要
+        self._journal.close()
+        open(self.delta_filename, "w").close()
+        self.delta_count = 0
+
+    def load(self):
+        """
+        读取快照并回放增量日志
+        :return: 合并后的状态字典，快照不存在时返回 None
+        """
+        with open(self.filename, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        self.generation = state.pop("checkpoint_generation", None)
+
+        self.delta_count = 0
+        skipped = 0
+        for delta in iter_journal(self.delta_filename):
+            if delta.get("generation") != self.generation:
+                # 属于更早的快照，已经包含在当前快照里
+                skipped += 1
+                continue
+            state.update(delta.get("counters", {}))
+            state["grid_levels"].update(delta.get("grid_levels", {}))
+            self.delta_count += 1
+        if skipped:
+            logger.warning("跳过 {filename} 中 {skipped} 条已合并进快照的旧增量", filename=self.delta_filename, skipped=skipped)
+        if self.delta_count:
+            logger.info("从 {filename} 回放了 {deltas} 条增量", filename=self.delta_filename, deltas=self.delta_count)
+        return state
+
+    def close(self):
+        self._journal.close()
@@ -0,0 +1,95 @@
+import asyncio
+
+
+class AsyncGridEngine:
+    """
+    事件驱动的策略引擎
+    订阅盘口和订单推送（ccxt.pro 风格的 watch_order_book / watch_orders），
+    只有订单状态变化或价格跨过网格档位时才运行网格逻辑，不再每秒轮询
+    """
+
+    def __init__(self, strategy, stream=None, depth_limit=5):
+        """
+        :param strategy: GridTradingStrategy 对象
+        :param stream: 提供 watch_order_book / watch_orders 的推送交易所，默认使用策略的交易所
+        :param depth_limit: 订阅的盘口深度
+        """
+        self.strategy = strategy
+        self.stream = stream or strategy.exchange
+        self.depth_limit = depth_limit
+        self.market_depth = None
+        self._band = None
+        self._lock = asyncio.Lock()
+
+    def price_band(self, price):
+        """
+        返回价格所在的网格区间编号，编号变化说明价格跨过了档位
+        """
+        return self.strategy.level_index.band(self.strategy.scale.to_ticks(price))
+
+    async def run(self, stop_event=None):
+        """
+        运行引擎直到 stop_event（threading.Event）被设置
+        """
+        # 启动时完整同步一次，之后由推送驱动
+        await asyncio.to_thread(self.strategy.handle_price_change)
+        self._band = self.price_band(self.strategy.current_price)
+        tasks = [
+            asyncio.create_task(self._watch_market()),
+            asyncio.create_task(self._watch_orders())
+        ]
+        try:
+            if stop_event is None:
+                await asyncio.gather(*tasks)
+            else:
+                await asyncio.to_thread(stop_event.wait)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.strategy.save_strategy_state()
+
+    async def _watch_market(self):
+        while True:
+            try:
+                market_depth = await self.stream.watch_order_book(self.strategy.symbol, limit=self.depth_limit)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.strategy.log.error("盘口推送出错: {error}", error=str(e), rate_limit="stream_error")
+                await asyncio.sleep(1)
+                continue
+
+            self.market_depth = market_depth
+            self.strategy.market_depth = market_depth
+            current_price = market_depth["bids"][0][0]
+            band = self.price_band(current_price)
+            if band != self._band:
+                self._band = band
+                await self._run_grid(current_price)
+            else:
+                # 价格还在同一个区间内，只更新盈亏
+                async with self._lock:
+                    self.strategy.current_price = current_price
+                    self.strategy.update_pnl(current_price)
+                    self.strategy.publish_snapshot()
+
+    async def _watch_orders(self):
+        while True:
+            try:
+                orders = await self.stream.watch_orders(self.strategy.symbol)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.strategy.log.error("订单推送出错: {error}", error=str(e), rate_limit="stream_error")
+                await asyncio.sleep(1)
+                continue
+
+            async with self._lock:
+                changed = self.strategy.apply_order_updates(orders)
+            if changed:
+                await self._run_grid(self.strategy.current_price)
+
+    async def _run_grid(self, current_price):
+        async with self._lock:
+            await asyncio.to_thread(self.strategy.process_tick, current_price, False)
@@ -0,0 +1,32 @@
+import bisect
+
+
+class GridLevelIndex:
+    """
+    按价格（整数 tick）升序保存的档位索引
+    用二分查找在 O(log n) 内定位当前价格所在的区间和下方的挂单窗口
+    """
+
+    def __init__(self, grid_levels=None):
+        """
+        :param grid_levels: 价格（tick）-> GridLevel 的字典
+        """
+        grid_levels = grid_levels or {}
+        self.prices = sorted(grid_levels)
+        self.levels = [grid_levels[price] for price in self.prices]
+
+    def __len__(self):
+        return len(self.prices)
+
+    def band(self, price):
+        """
+        返回严格低于 price 的档位数，可作为价格所在区间的编号
+        """
+        return bisect.bisect_left(self.prices, price)
+
+    def below(self, price, count):
+        """
+        返回严格低于 price 的最近 count 个档位，按价格从高到低排列
+        """
+        i = self.band(price)
+        return self.levels[max(0, i - count):i][::-1]
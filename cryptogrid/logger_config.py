@@ -1,29 +1,80 @@
+import time
 from loguru import logger
 from collections import deque
 
+# 带 rate_limit 字段的重复性日志（例如每个 tick 的价格），默认每个交易对每 10 秒最多输出一条
+TICK_LOG_INTERVAL = 10.0
+
+
 class PanelHandler:
     def __init__(self, max_logs=100):
         self.logs = deque(maxlen=max_logs)
+        self.count = 0  # 累计收到的日志条数，界面据此判断是否需要重绘
 
     def write(self, message):
         self.logs.append(message.strip())
+        self.count += 1
 
     def __call__(self, message):
         self.write(message)
 
-def setup_logger(log_file="grid_trading.log"):
+
+class RateLimitFilter:
+    """
+    日志过滤器：extra 中带 rate_limit 字段的日志按 (交易对, rate_limit) 分组，
+    每组每 interval 秒最多放行一条，其余日志不受影响。
+    过滤在调用线程执行，只做一次字典查找
+    """
+
+    def __init__(self, interval=TICK_LOG_INTERVAL, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self._last = {}  # (交易对, 类别) -> 上次放行的时间
+        self.suppressed = 0  # 被丢弃的日志条数
+
+    def __call__(self, record):
+        extra = record["extra"]
+        key = extra.get("rate_limit")
+        if key is None:
+            return True
+        key = (extra.get("symbol"), key)
+        now = self.clock()
+        last = self._last.get(key)
+        if last is not None and now - last < self.interval:
+            self.suppressed += 1
+            return False
+        self._last[key] = now
+        return True
+
+
+def setup_logger(log_file="grid_trading.log", serialize=False, tick_log_interval=TICK_LOG_INTERVAL):
+    """
+    配置日志：文件和界面面板都通过后台队列写入，交易线程只负责把日志记录放进队列
+    :param log_file: 日志文件
+    :param serialize: 是否以 JSON Lines 写入文件，结构化字段（交易对、价格、订单ID等）保存在 extra 中
+    :param tick_log_interval: 重复性日志的最短间隔（秒），0 表示不限制
+    """
     # 移除默认的处理器
     logger.remove()
-    
+
     # 添加文件处理器
-    logger.add(log_file, rotation="500 MB", level="INFO")
-    
+    logger.add(log_file, rotation="500 MB", level="INFO", enqueue=True, serialize=serialize,
+               filter=RateLimitFilter(tick_log_interval) if tick_log_interval else None)
+
     # 添加控制台处理器（可选，用于调试）
     # logger.add(sys.stderr, level="INFO")
-    
+
     # 创建并添加面板处理器
     panel_handler = PanelHandler()
-    logger.add(panel_handler, level="INFO")
-    
+    logger.add(panel_handler, level="INFO", enqueue=True,
+               filter=RateLimitFilter(tick_log_interval) if tick_log_interval else None)
+
     return panel_handler
 
+
+def shutdown_logger():
+    """
+    等待队列中的日志全部写出后关闭所有处理器
+    """
+    logger.complete()
+    logger.remove()
@@ -0,0 +1,305 @@
+import inspect
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, NamedTuple
+from loguru import logger
+from cryptogrid.mock_exchange import MockExchange
+
+# 行情缓存的默认有效期（秒），同一有效期内对同一行情的请求只发一次
+MARKET_DATA_TTL = 0.5
+# 并发拉取行情的线程数
+FETCH_WORKERS = 8
+# ccxt 的订单状态 -> 策略的订单状态：ccxt 的 closed 表示全部成交，策略的 closed 表示已撤销
+CCXT_ORDER_STATUSES = {
+    "closed": "filled",
+    "canceled": "closed",
+    "cancelled": "closed",
+    "expired": "closed",
+    "rejected": "closed",
+}
+# 返回订单的 ccxt 接口，结果中的订单状态需要转换
+ORDER_METHODS = frozenset((
+    "create_order", "create_limit_buy_order", "create_limit_sell_order", "create_orders",
+    "cancel_order", "cancel_orders", "fetch_order", "fetch_orders", "fetch_open_orders",
+    "fetch_closed_orders", "fetch_canceled_orders", "watch_orders",
+))
+
+
+def create_exchange(name, **config):
+    """
+    交易所客户端工厂
+    :param name: mock 表示本地模拟交易所，其余按 ccxt 的交易所ID创建（只有这时才导入 ccxt）
+    :param config: mock 时传给 MockExchange，否则作为 ccxt 的配置（apiKey、secret 等）
+    """
+    if name == "mock":
+        return MockExchange(**{"initial_price": 10000, "volatility": 0.005, **config})
+    import ccxt
+    exchange_class = getattr(ccxt, name, None)
+    if exchange_class is None:
+        raise ValueError(f"不支持的交易所: {name}")
+    return CcxtExchange(exchange_class({"enableRateLimit": True, **config}))
+
+
+def create_stream(name, **config):
+    """
+    推送交易所客户端工厂，供事件驱动模式订阅盘口和订单
+    :param name: mock 时返回 None，直接使用策略的模拟交易所；其余按 ccxt.pro 的交易所ID创建
+    :param config: ccxt 的配置（apiKey、secret 等）
+    :return: 用完需要 await close()；必须在运行它的事件循环里创建
+    """
+    exchange_class = stream_class(name)
+    if exchange_class is None:
+        return None
+    return CcxtExchange(exchange_class({"enableRateLimit": True, **config}))
+
+
+def stream_class(name):
+    """
+    返回交易所的 ccxt.pro 客户端类，mock 返回 None；启动事件驱动模式前用于检查交易所是否支持推送
+    """
+    if name == "mock":
+        return None
+    import ccxt.pro
+    exchange_class = getattr(ccxt.pro, name, None)
+    if exchange_class is None:
+        raise ValueError(f"交易所 {name} 不支持推送，请使用 ENGINE_MODE=poll")
+    return exchange_class
+
+
+def map_order_statuses(result, statuses=CCXT_ORDER_STATUSES):
+    """
+    把交易所返回的订单（或订单列表）中的状态转换成策略的状态，返回新的订单，不修改原对象
+    """
+    if isinstance(result, list):
+        return [map_order_statuses(order, statuses) for order in result]
+    if isinstance(result, dict) and result.get("status") in statuses:
+        return {**result, "status": statuses[result["status"]]}
+    return result
+
+
+class CcxtExchange:
+    """
+    ccxt 客户端的适配层：返回订单的接口把 ccxt 的订单状态转换成策略的状态（见 CCXT_ORDER_STATUSES），
+    其余属性的读写都原样转发。模拟交易所直接使用策略的状态，不需要这一层
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._client, name, value)
+
+    def __delattr__(self, name):
+        delattr(self._client, name)
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name not in ORDER_METHODS or not callable(attr):
+            return attr
+        if inspect.iscoroutinefunction(attr):
+            # ccxt.pro 的 watch_orders 等异步接口
+            async def mapped_async(*args, **kwargs):
+                return map_order_statuses(await attr(*args, **kwargs))
+            return mapped_async
+
+        def mapped(*args, **kwargs):
+            return map_order_statuses(attr(*args, **kwargs))
+        return mapped
+
+
+class MarketData(NamedTuple):
+    """
+    缓存中的一条行情
+    seq 在每次取到新数据时递增，消费者据此判断行情是否更新过
+    """
+    seq: int
+    fetched_at: float
+    data: Any
+
+
+class MarketDataService:
+    """
+    多交易所的共享行情服务
+    各策略和界面通过它读取盘口和行情，结果按 (交易所, 类型, 交易对, 深度) 缓存 ttl 秒；
+    缓存过期后同一行情的并发请求合并成一次，多个交易对的行情并发拉取
+    """
+
+    def __init__(self, exchanges=None, ttl=MARKET_DATA_TTL, workers=FETCH_WORKERS, clock=time.monotonic):
+        """
+        :param exchanges: 交易所名称 -> 交易所对象
+        :param ttl: 缓存有效期（秒）
+        :param workers: 并发拉取的线程数
+        """
+        self.exchanges = dict(exchanges or {})
+        self.ttl = ttl
+        self.workers = workers
+        self.clock = clock
+        self._cache = {}  # 缓存键 -> MarketData
+        self._inflight = {}  # 缓存键 -> Future
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._executor = None
+        self.fetch_count = 0  # 实际向交易所发出的行情请求数
+
+    def add_exchange(self, name, exchange=None, **config):
+        """
+        添加交易所，没有提供交易所对象时用 create_exchange 创建
+        """
+        self.exchanges[name] = exchange if exchange is not None else create_exchange(name, **config)
+        return self.exchanges[name]
+
+    def get(self, exchange_name, kind, symbol, limit=None):
+        """
+        返回缓存中的行情（不论是否过期），没有时返回 None，不请求交易所
+        :param kind: ticker / order_book
+        """
+        return self._cache.get((exchange_name, kind, symbol, limit))
+
+    def ticker(self, exchange_name, symbol):
+        return self._get_or_fetch((exchange_name, "ticker", symbol, None)).data
+
+    def order_book(self, exchange_name, symbol, limit=None):
+        return self._get_or_fetch((exchange_name, "order_book", symbol, limit)).data
+
+    def tickers(self, exchange_name, symbols):
+        """
+        返回多个交易对的行情，只拉取缓存过期的交易对；
+        交易所支持 fetch_tickers 时一次请求，否则并发逐个请求
+        """
+        now = self.clock()
+        result = {}
+        missing = []
+        for symbol in symbols:
+            entry = self._cache.get((exchange_name, "ticker", symbol, None))
+            if entry is not None and now - entry.fetched_at < self.ttl:
+                result[symbol] = entry.data
+            else:
+                missing.append(symbol)
+        if not missing:
+            return result
+        exchange = self.exchanges[exchange_name]
+        if len(missing) > 1 and exchange.has.get('fetchTickers'):
+            self._count_fetch()
+            fetched = exchange.fetch_tickers(missing)
+            for symbol, ticker in fetched.items():
+                self._store((exchange_name, "ticker", symbol, None), ticker)
+                result[symbol] = ticker
+            return result
+        for symbol, ticker in zip(missing, self._map(lambda symbol: self.ticker(exchange_name, symbol), missing)):
+            result[symbol] = ticker
+        return result
+
+    def refresh(self, requests):
+        """
+        并发拉取一批行情，已缓存且未过期的直接返回
+        :param requests: [(交易所名称, 类型, 交易对, 深度)]
+        :return: 与 requests 顺序一致的 MarketData 列表，失败的位置为异常对象
+        """
+        def fetch(key):
+            try:
+                return self._get_or_fetch(key)
+            except Exception as e:
+                logger.error("获取{kind}行情失败: {error}", exchange=key[0], kind=key[1], symbol=key[2], error=str(e),
+                             rate_limit="market_data_error")
+                return e
+
+        return self._map(fetch, [tuple(request) for request in requests])
+
+    def _map(self, function, items):
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="market-data")
+        return list(self._executor.map(function, items))
+
+    def _get_or_fetch(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and self.clock() - entry.fetched_at < self.ttl:
+                return entry
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            entry = self._store(key, self._fetch(key))
+            future.set_result(entry)
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+    def _fetch(self, key):
+        exchange_name, kind, symbol, limit = key
+        exchange = self.exchanges[exchange_name]
+        self._count_fetch()
+        if kind == "ticker":
+            return exchange.fetch_ticker(symbol)
+        if kind == "order_book":
+            return exchange.fetch_order_book(symbol, limit=limit)
+        raise ValueError(f"不支持的行情类型: {kind}")
+
+    def _count_fetch(self):
+        with self._lock:
+            self.fetch_count += 1
+
+    def _store(self, key, data):
+        entry = MarketData(next(self._seq), self.clock(), data)
+        with self._lock:
+            self._cache[key] = entry
+        return entry
+
+    def exchange(self, exchange_name):
+        """
+        返回一个交易所代理：行情接口走共享缓存，下单、查单等其他接口原样转发
+        """
+        return CachedExchange(self, exchange_name)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class CachedExchange:
+    """
+    通过 MarketDataService 读取行情的交易所代理，可以直接交给 GridTradingStrategy
+    多个策略使用同一交易对时共享一次行情请求，其余属性的读写都原样转发
+    """
+
+    def __init__(self, service, exchange_name):
+        self._service = service
+        self._exchange_name = exchange_name
+        self._exchange = service.exchanges[exchange_name]
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._exchange, name, value)
+
+    def __delattr__(self, name):
+        delattr(self._exchange, name)
+
+    def __getattr__(self, name):
+        return getattr(self._exchange, name)
+
+    def fetch_ticker(self, symbol, params=None):
+        return self._service.ticker(self._exchange_name, symbol)
+
+    def fetch_tickers(self, symbols=None, params=None):
+        if symbols is None:
+            return self._exchange.fetch_tickers()
+        return self._service.tickers(self._exchange_name, symbols)
+
+    def fetch_order_book(self, symbol, limit=None, params=None):
+        return self._service.order_book(self._exchange_name, symbol, limit)
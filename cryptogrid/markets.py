@@ -0,0 +1,75 @@
+import json
+import os
+import time
+from loguru import logger
+
+# 市场元数据（精度、限制、手续费）变化很少，默认缓存一天
+MARKET_CACHE_TTL = 24 * 3600
+
+
+class MarketCache:
+    """
+    交易所市场元数据的磁盘缓存
+    重启时直接从缓存恢复 markets，不必等待 load_markets 请求返回
+    """
+
+    def __init__(self, filename="markets_cache.json", ttl=MARKET_CACHE_TTL, clock=time.time):
+        """
+        :param filename: 缓存文件
+        :param ttl: 缓存有效期（秒）
+        """
+        self.filename = filename
+        self.ttl = ttl
+        self.clock = clock
+
+    def _read(self):
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            logger.warning("市场缓存 {filename} 已损坏，忽略", filename=self.filename)
+            return {}
+
+    def get(self, exchange_name):
+        """
+        :return: 未过期的 markets 字典，没有缓存或已过期时返回 None
+        """
+        entry = self._read().get(exchange_name)
+        if entry is None or self.clock() - entry["saved_at"] > self.ttl:
+            return None
+        return entry["markets"]
+
+    def put(self, exchange_name, markets):
+        """
+        原子地写入一个交易所的 markets
+        """
+        cache = self._read()
+        cache[exchange_name] = {"saved_at": self.clock(), "markets": markets}
+        # 多个工作进程可能同时写入，临时文件按进程区分
+        tmp_filename = f"{self.filename}.{os.getpid()}.tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(cache, f, separators=(",", ":"), default=str)
+        os.replace(tmp_filename, self.filename)
+
+
+def load_markets(exchange, cache=None):
+    """
+    加载交易所的市场元数据，缓存有效时不请求交易所
+    :param exchange: 提供 load_markets / set_markets 的交易所对象（ccxt 接口）
+    :param cache: MarketCache 对象，None 表示不使用缓存
+    :return: markets 字典
+    """
+    if cache is not None:
+        markets = cache.get(exchange.name)
+        if markets is not None:
+            exchange.set_markets(markets)
+            return markets
+    markets = exchange.load_markets()
+    if cache is not None:
+        try:
+            cache.put(exchange.name, markets)
+        except OSError as e:
+            logger.warning("写入市场缓存失败: {error}", error=str(e))
+    return markets
@@ -0,0 +1,276 @@
+import bisect
+import os
+import threading
+import time
+from loguru import logger
+
+# 默认的耗时分桶（秒），覆盖 0.1 毫秒到 10 秒
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class Counter:
+    """
+    只增不减的计数器
+    """
+    __slots__ = ("labels", "value", "_lock")
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name):
+        yield f"{name}{_format_labels(self.labels)} {self.value}"
+
+    def state(self):
+        return self.value
+
+    def merge(self, value):
+        self.inc(value)
+
+
+class Histogram:
+    """
+    固定分桶的直方图，observe 只做一次二分查找和两次加法
+    """
+    __slots__ = ("labels", "buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, labels, buckets=DEFAULT_BUCKETS):
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个是 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """
+        用作上下文管理器，记录代码块的耗时
+        """
+        return _Timer(self)
+
+    def samples(self, name):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket{_format_labels(self.labels + (('le', le),))} {cumulative}"
+        yield f"{name}_sum{_format_labels(self.labels)} {self.sum}"
+        yield f"{name}_count{_format_labels(self.labels)} {self.count}"
+
+    def state(self):
+        with self._lock:
+            return self.buckets, list(self.counts), self.sum, self.count
+
+    def merge(self, state):
+        _, counts, total, count = state
+        with self._lock:
+            for i, value in enumerate(counts):
+                self.counts[i] += value
+            self.sum += total
+            self.count += count
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """
+    指标注册表，按 (名称, 标签) 复用同一个指标对象
+    热路径上应保存 counter()/histogram() 返回的对象，避免每次查表
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}  # 名称 -> (类型, 说明, {标签: 指标})
+
+    def _get(self, kind, factory, name, description, labels):
+        key = tuple(sorted((label, str(value)) for label, value in labels.items()))
+        with self._lock:
+            _, _, children = self._metrics.setdefault(name, (kind, description, {}))
+            metric = children.get(key)
+            if metric is None:
+                metric = children[key] = factory(key)
+            return metric
+
+    def counter(self, name, description="", **labels):
+        return self._get("counter", Counter, name, description, labels)
+
+    def histogram(self, name, description="", buckets=DEFAULT_BUCKETS, **labels):
+        return self._get("histogram", lambda key: Histogram(key, buckets), name, description, labels)
+
+    def render(self):
+        """
+        以 Prometheus 文本格式输出所有指标
+        """
+        lines = []
+        with self._lock:
+            metrics = [(name, kind, description, list(children.values()))
+                       for name, (kind, description, children) in sorted(self._metrics.items())]
+        for name, kind, description, children in metrics:
+            if description:
+                lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for metric in children:
+                lines.extend(metric.samples(name))
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        返回所有指标当前值的可序列化副本，用于跨进程汇总
+        :return: [(名称, 类型, 说明, 标签, 值)]
+        """
+        with self._lock:
+            metrics = [(name, kind, description, list(children.items()))
+                       for name, (kind, description, children) in self._metrics.items()]
+        return [(name, kind, description, key, metric.state())
+                for name, kind, description, children in metrics for key, metric in children]
+
+    def merge(self, snapshot):
+        """
+        把另一个注册表的 snapshot 累加到本注册表，相同名称和标签的指标求和
+        """
+        for name, kind, description, key, state in snapshot:
+            labels = dict(key)
+            if kind == "counter":
+                metric = self.counter(name, description, **labels)
+            else:
+                metric = self.histogram(name, description, buckets=state[0], **labels)
+            metric.merge(state)
+
+    def dump(self, filename):
+        """
+        把当前指标原子地写入文件
+        """
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_filename, filename)
+
+
+REGISTRY = MetricsRegistry()
+
+# 交易所对象上不发请求的本地方法，不计时
+LOCAL_METHODS = ("milliseconds",)
+
+
+class InstrumentedExchange:
+    """
+    交易所代理：记录每个 REST 调用的耗时和失败次数，其余属性的读写都原样转发
+    watch_* 推送接口不计时
+    """
+
+    def __init__(self, exchange, registry=REGISTRY, **labels):
+        """
+        :param labels: 附加到所有指标上的标签，例如 symbol
+        """
+        self._exchange = exchange
+        self._registry = registry
+        self._labels = labels
+        self._instruments = {}  # 方法名 -> (耗时直方图, 失败计数器)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._exchange, name, value)
+
+    def __delattr__(self, name):
+        delattr(self._exchange, name)
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not callable(attr) or name.startswith("_") or name.startswith("watch_") or name in LOCAL_METHODS:
+            return attr
+        instruments = self._instruments.get(name)
+        if instruments is None:
+            instruments = self._instruments[name] = (
+                self._registry.histogram("exchange_request_seconds", "交易所请求耗时", method=name, **self._labels),
+                self._registry.counter("exchange_request_errors_total", "交易所请求失败次数", method=name, **self._labels)
+            )
+        latency, errors = instruments
+
+        def instrumented(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - started)
+
+        return instrumented
+
+
+class MetricsServer:
+    """
+    在后台线程提供 Prometheus 文本格式的 /metrics 接口
+    registry 可以是任何提供 render() 的对象，例如汇总多个工作进程指标的 Supervisor
+    """
+
+    def __init__(self, registry=REGISTRY, host="127.0.0.1", port=9108):
+        # 只有开启指标接口时才需要 http.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry_ = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry_.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+        logger.info("指标接口已启动: http://{host}:{port}/metrics", host=self.server.server_address[0], port=self.port)
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
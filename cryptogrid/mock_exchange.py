@@ -1,87 +1,415 @@
+import asyncio
+import heapq
+import itertools
+import math
 import random
-from loguru import logger
+import threading
+import time
+from collections import deque
 
 
+class RateLimitExceeded(Exception):
+    """
+    模拟交易所的限频错误，与 ccxt 的异常同名
+    """
+
+
+class OrderNotFound(Exception):
+    """
+    订单ID不存在（例如交易所重启后），与 ccxt 的异常同名
+    """
+
+
+# load_markets 返回的交易对
+MOCK_SYMBOLS = ("BTC/USDT", "ETH/USDT", "SOL/USDT")
+
+
+class OrderBook:
+    """
+    单个交易对的挂单簿
+    买卖双方各用一个堆按价格-时间优先排列，已撤销或成交的订单在堆顶时才被弹出；
+    撤销的订单超过堆中条目的一半时重建堆，远离当前价的撤单不会一直留在堆里占用内存
+    """
+    __slots__ = ("base", "quote", "bids", "asks", "open", "stale")
+
+    def __init__(self, base, quote):
+        self.base = base
+        self.quote = quote
+        self.bids = []  # (-价格, 序号, 订单)
+        self.asks = []  # (价格, 序号, 订单)
+        self.open = {}  # 订单ID -> 未完成订单
+        self.stale = 0  # 堆中已撤销、尚未弹出的条目数
+
+    def discard(self):
+        """
+        记录一个已撤销的订单，过期条目过多时只保留未完成订单重建两个堆
+        """
+        self.stale += 1
+        if self.stale > len(self.open):
+            self.bids = [entry for entry in self.bids if entry[2]["status"] == "open"]
+            self.asks = [entry for entry in self.asks if entry[2]["status"] == "open"]
+            heapq.heapify(self.bids)
+            heapq.heapify(self.asks)
+            self.stale = 0
+
 
 class MockExchange:
-    def __init__(self, initial_price, volatility=0.005):
-        self.price = initial_price
+    """
+    模拟交易所：按价格路径撮合的限价订单簿
+    价格每次变化（行情请求或直接给 price 赋值）都会撮合所有被穿越的挂单，
+    支持部分成交、手续费、请求延迟，订单按ID索引，适合压测策略
+    """
+
+    def __init__(self, initial_price, volatility=0.005, stream_interval=0.1,
+                 request_limit=None, request_window=1.0, fee_rate=0.0, latency=0.0,
+                 liquidity=None, max_closed_orders=None, seed=None):
+        """
+        :param initial_price: 初始价格
+        :param volatility: 每次行情请求的最大价格波动比例
+        :param stream_interval: 模拟推送的间隔（秒）
+        :param request_limit: 每个窗口允许的请求数，None 表示不限频
+        :param request_window: 限频窗口（秒）
+        :param fee_rate: 手续费率，以计价货币收取
+        :param latency: 每个 REST 请求的模拟延迟（秒）
+        :param liquidity: 每次价格变化时每个交易对每一方最多成交的数量，None 表示不限（一次全部成交）
+        :param max_closed_orders: 最多保留的已完成订单数，None 表示全部保留
+        :param seed: 价格随机游走的种子，相同种子和相同的请求序列得到相同的价格路径
+        """
+        self._price = initial_price
         self.volatility = volatility
-        self.orders = []
+        self._random = random.Random(seed)
+        self.stream_interval = stream_interval
+        self._order_updates = []  # 尚未推送的订单状态变化
+        self._streaming = False  # 有订阅者调用过 watch_orders 后才记录订单变化
+        self.request_limit = request_limit
+        self.request_window = request_window
+        self._request_times = deque()
+        self.fee_rate = fee_rate
+        self.latency = latency
+        self.liquidity = liquidity
+        self.orders = {}  # 订单ID -> 订单
+        self._books = {}  # 交易对 -> OrderBook
+        self._closed_ids = deque(maxlen=max_closed_orders)
+        self._ids = itertools.count(1)
         self.balance = {'USDT': 10000, 'BTC': 0}
+        self.name = "mock"
+        self.has = {'fetchOpenOrders': True, 'fetchClosedOrders': True, 'fetchTickers': True,
+                    'createOrders': True, 'cancelOrders': True}
+        self._lock = threading.RLock()
+        self.markets = None
+
+    def load_markets(self, reload=False):
+        """
+        返回各交易对的精度、限制和手续费，与 ccxt 的 markets 结构一致
+        """
+        if self.markets is None or reload:
+            self._request()
+            self.markets = {symbol: self._market(symbol) for symbol in MOCK_SYMBOLS}
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+        return markets
+
+    def _market(self, symbol):
+        base, quote = self._currencies(symbol)
+        return {
+            "symbol": symbol, "base": base, "quote": quote, "type": "spot", "spot": True, "active": True,
+            "precision": {"price": 0.01, "amount": 0.00001},
+            "limits": {"amount": {"min": 0.00001, "max": None}, "price": {"min": 0.01, "max": None},
+                       "cost": {"min": 5, "max": None}},
+            "maker": self.fee_rate, "taker": self.fee_rate
+        }
+
+    @property
+    def price(self):
+        return self._price
+
+    @price.setter
+    def price(self, value):
+        with self._lock:
+            self._price = value
+            for book in self._books.values():
+                self._match(book)
 
     def fetch_ticker(self, symbol):
+        self._request()
         self._update_price()
         return {"last": self.price}
 
+    def fetch_tickers(self, symbols=None):
+        self._request()
+        self._update_price()
+        spread = self.price * 0.001
+        return {
+            symbol: {"symbol": symbol, "last": self.price, "bid": self.price - spread, "ask": self.price + spread}
+            for symbol in symbols or []
+        }
+
     def fetch_order_book(self, symbol, limit=5):
+        self._request()
+        return self._order_book(limit)
+
+    def _order_book(self, limit):
         self._update_price()
-        spread = self.price * 0.001  # 0.1% 价差
+        spread = self.price * 0.001  # 0.1% 价差，每档间隔一个价差
         return {
-            "bids": [[self.price - spread, 1]] * limit,
-            "asks": [[self.price + spread, 1]] * limit
+            "bids": [[self.price - spread * (i + 1), 1.0 + i] for i in range(limit)],
+            "asks": [[self.price + spread * (i + 1), 1.0 + i] for i in range(limit)]
         }
 
-    def create_limit_buy_order(self, symbol, amount, price):
-        cost = amount * price
-        if self.balance['USDT'] >= cost:
-            self.balance['USDT'] -= cost
-            order = {
-                "id": len(self.orders) + 1,
-                "amount": amount,
-                "cost": cost,
-                "price": price,
-                "side": "buy",
-                "status": "open"
-            }
-            self.orders.append(order)
-            return order
-        else:
-            raise Exception("余额不足")
+    def create_limit_buy_order(self, symbol, amount, price, params=None):
+        self._request()
+        return self._create_order(symbol, "buy", amount, price, params)
+
+    def create_limit_sell_order(self, symbol, amount, price, params=None):
+        self._request()
+        return self._create_order(symbol, "sell", amount, price, params)
 
-    def create_limit_sell_order(self, symbol, amount, price):
-        if self.balance['BTC'] >= amount:
-            logger.info(f"创建卖单: {amount} BTC, 价格: {price}, type price: {type(price)}, type(amount): {type(amount)}")
-            cost = amount * float(price)
-            self.balance['BTC'] -= amount
+    def create_orders(self, orders):
+        """
+        批量下单，单个订单失败时返回 status 为 rejected 的订单，不影响其他订单
+        """
+        self._request()
+        results = []
+        for request in orders:
+            try:
+                results.append(self._create_order(request["symbol"], request["side"], request["amount"], request["price"],
+                                                  request.get("params")))
+            except Exception as e:
+                results.append({"id": None, "symbol": request["symbol"], "side": request["side"],
+                                "status": "rejected", "info": str(e)})
+        return results
+
+    def _create_order(self, symbol, side, amount, price, params=None):
+        base, quote = self._currencies(symbol)
+        with self._lock:
+            if side == "buy":
+                reserved = amount * float(price) * (1 + self.fee_rate)
+                if self.balance.get(quote, 0) < reserved:
+                    raise Exception("余额不足")
+                self.balance[quote] -= reserved
+            else:
+                if self.balance.get(base, 0) < amount:
+                    raise Exception("余额不足")
+                self.balance[base] -= amount
+            order_id = next(self._ids)
             order = {
-                "id": len(self.orders) + 1,
+                "id": order_id,
+                "clientOrderId": (params or {}).get("clientOrderId"),
+                "symbol": symbol,
                 "amount": amount,
-                "cost": cost,
+                "filled": 0.0,
+                "remaining": amount,
+                "cost": 0.0,
+                "average": None,
                 "price": price,
-                "side": "sell",
-                "status": "open"
+                "side": side,
+                "status": "open",
+                "timestamp": self.milliseconds(),
+                "lastTradeTimestamp": None,
+                "fee": {"cost": 0.0, "currency": quote, "rate": self.fee_rate}
             }
-            self.orders.append(order)
-            return order
-        else:
-            raise Exception("余额不足")
+            self.orders[order_id] = order
+            book = self._books.get(symbol)
+            if book is None:
+                book = self._books[symbol] = OrderBook(base, quote)
+            book.open[order_id] = order
+            if side == "buy":
+                heapq.heappush(book.bids, (-float(price), order_id, order))
+            else:
+                heapq.heappush(book.asks, (float(price), order_id, order))
+            # 穿越当前价格的订单立即成交
+            self._match(book)
+            return _copy_order(order)
 
     def cancel_order(self, order_id, symbol):
-        for order in self.orders:
-            if order["id"] == order_id:
+        self._request()
+        return self._cancel_order(order_id)
+
+    def cancel_orders(self, ids, symbol=None):
+        """
+        批量撤单，单个订单失败时返回 id 为 None 的结果，不影响其他订单
+        """
+        self._request()
+        results = []
+        for order_id in ids:
+            try:
+                results.append(self._cancel_order(order_id))
+            except Exception as e:
+                results.append({"id": None, "status": "rejected", "info": str(e)})
+        return results
+
+    def _cancel_order(self, order_id):
+        """
+        撤销未完成的订单并退还冻结的余额，已完成的订单原样返回
+        """
+        with self._lock:
+            order = self._get_order(order_id)
+            if order["status"] == "open":
+                base, quote = self._currencies(order["symbol"])
+                if order["side"] == "buy":
+                    self.balance[quote] += order["remaining"] * float(order["price"]) * (1 + self.fee_rate)
+                else:
+                    self.balance[base] += order["remaining"]
                 order["status"] = "closed"
-                break
-        else:
-            raise Exception("订单不存在")
+                book = self._books[order["symbol"]]
+                self._close(order, book)
+                book.discard()
+                self._record_update(order)
+            return _copy_order(order)
 
     def fetch_order(self, order_id, symbol):
-        for order in self.orders:
-            if order["id"] == order_id:
-                if order["status"] == "open" and order["side"] == "buy" and float(order["price"]) >= self.price:
-                    order["status"] = "filled"
-                    self.balance['BTC'] += order["amount"]
-                elif order["status"] == "open" and order["side"] == "sell" and float(order["price"]) <= self.price:
-                    order["status"] = "filled"
-                    self.balance['USDT'] += order["cost"]
-                return order
+        self._request()
+        with self._lock:
+            return _copy_order(self._get_order(order_id))
+
+    def fetch_open_orders(self, symbol=None):
+        self._request()
+        with self._lock:
+            books = self._books.values() if symbol is None else [self._books[symbol]] if symbol in self._books else []
+            return [_copy_order(order) for book in books for order in book.open.values()]
+
+    def fetch_closed_orders(self, symbol=None, since=None, limit=None):
+        self._request()
+        with self._lock:
+            closed_orders = []
+            for order_id in self._closed_ids:
+                order = self.orders[order_id]
+                if symbol is not None and order["symbol"] != symbol:
+                    continue
+                if since is not None and (order["lastTradeTimestamp"] or order["timestamp"]) < since:
+                    continue
+                closed_orders.append(_copy_order(order))
+        return closed_orders[-limit:] if limit else closed_orders
+
+    def _get_order(self, order_id):
+        order = self.orders.get(order_id)
+        if order is None and isinstance(order_id, str) and order_id.isdigit():
+            order = self.orders.get(int(order_id))
+        if order is None:
+            raise OrderNotFound(f"订单不存在: {order_id}")
+        return order
+
+    def _match(self, book):
+        """
+        撮合被当前价格穿越的挂单：买价不低于当前价、卖价不高于当前价的订单按价格-时间优先成交
+        """
+        now = self.milliseconds()
+        self._match_side(book, book.bids, -self._price, now)
+        self._match_side(book, book.asks, self._price, now)
+
+    def _match_side(self, book, heap, limit_key, now):
+        budget = math.inf if self.liquidity is None else self.liquidity
+        while heap and budget > 0:
+            key, _, order = heap[0]
+            if order["status"] != "open":
+                heapq.heappop(heap)
+                book.stale -= 1
+                continue
+            if key > limit_key:
+                break
+            quantity = min(order["remaining"], budget)
+            budget -= quantity
+            self._fill(book, order, quantity, now)
+            if order["status"] != "open":
+                heapq.heappop(heap)
+
+    def _fill(self, book, order, quantity, now):
+        """
+        以挂单价成交 quantity，全部成交后订单状态变为 filled
+        """
+        value = quantity * float(order["price"])
+        fee = value * self.fee_rate
+        if order["side"] == "buy":
+            # 手续费在下单时已随货款一起冻结
+            self.balance[book.base] = self.balance.get(book.base, 0) + quantity
         else:
-            raise Exception("订单不存在")
+            self.balance[book.quote] = self.balance.get(book.quote, 0) + value - fee
+        order["filled"] += quantity
+        order["remaining"] -= quantity
+        order["cost"] += value
+        order["average"] = order["cost"] / order["filled"]
+        order["fee"]["cost"] += fee
+        order["lastTradeTimestamp"] = now
+        if order["remaining"] <= 0:
+            order["status"] = "filled"
+            self._close(order, book)
+        self._record_update(order)
+
+    def _close(self, order, book=None):
+        book = book or self._books[order["symbol"]]
+        book.open.pop(order["id"], None)
+        if len(self._closed_ids) == self._closed_ids.maxlen:
+            self.orders.pop(self._closed_ids[0], None)
+        self._closed_ids.append(order["id"])
+
+    @staticmethod
+    def _currencies(symbol):
+        base, _, quote = symbol.partition("/")
+        return base, quote.split(":")[0] or "USDT"
+
+    def _request(self):
+        """
+        每个 REST 请求的公共入口：检查限频并模拟网络延迟
+        """
+        self._check_rate_limit()
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _check_rate_limit(self):
+        if self.request_limit is None:
+            return
+        now = time.monotonic()
+        while self._request_times and now - self._request_times[0] >= self.request_window:
+            self._request_times.popleft()
+        if len(self._request_times) >= self.request_limit:
+            raise RateLimitExceeded("请求频率超限")
+        self._request_times.append(now)
+
+    def milliseconds(self):
+        """
+        当前时间戳（毫秒），与 ccxt 同名
+        """
+        return int(time.time() * 1000)
+
+    def _record_update(self, order):
+        if self._streaming:
+            self._order_updates.append(_copy_order(order))
+
+    async def watch_order_book(self, symbol, limit=5):
+        """
+        模拟 ccxt.pro 的盘口推送，每隔 stream_interval 秒返回一次最新盘口
+        """
+        await asyncio.sleep(self.stream_interval)
+        return self._order_book(limit)
+
+    async def watch_orders(self, symbol=None, since=None, limit=None):
+        """
+        模拟 ccxt.pro 的订单推送，阻塞直到有订单状态发生变化
+        """
+        self._streaming = True
+        while True:
+            with self._lock:
+                updates, remaining = [], []
+                for order in self._order_updates:
+                    (updates if symbol is None or order["symbol"] == symbol else remaining).append(order)
+                if updates:
+                    self._order_updates = remaining
+                    return updates
+            await asyncio.sleep(self.stream_interval)
 
     def _update_price(self):
-        change = random.uniform(-self.volatility, self.volatility)
+        change = self._random.uniform(-self.volatility, self.volatility)
         self.price *= (1 + change)
-    
+
+
+def _copy_order(order):
+    """
+    返回订单的副本，与 ccxt 一样每次请求都得到新的字典
+    """
+    return {**order, "fee": dict(order["fee"])}
+
 
 # 使用示例
 # mock_exchange = MockExchange(initial_price=30000)
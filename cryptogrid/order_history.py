@@ -0,0 +1,198 @@
+import bisect
+import json
+import time
+from collections import OrderedDict
+from cryptogrid.trade_journal import TradeJournal, iter_journal_offsets, read_journal_record
+
+# 内存中保留的最近订单数，供界面展示
+RECENT_ORDER_COUNT = 200
+# 内存索引中最多保留的订单数，超出后最早的记录移出索引，查询它们时扫描文件开头未索引的部分
+INDEX_ORDER_COUNT = 100000
+
+
+def order_time(order):
+    """
+    订单的记录时间（毫秒）：优先使用成交时间，其次是下单时间
+    """
+    return order.get("lastTradeTimestamp") or order.get("timestamp") or int(time.time() * 1000)
+
+
+class OrderHistory:
+    """
+    订单历史
+    每条记录只追加写入 JSON Lines 文件，内存中只保留最近 maxlen 个订单用于展示，
+    另外保存 订单ID -> 文件偏移量 和 (时间, 偏移量) 两个索引，
+    按ID查询和按时间范围查询都不需要扫描整个文件。
+    索引最多保留最近 index_limit 个订单，超出后最早的记录成批移出索引，
+    只有查询这部分较早的订单时才扫描文件开头。
+    同一个订单多次写入时以最后一次为准
+    """
+
+    def __init__(self, filename=None, maxlen=RECENT_ORDER_COUNT, index_limit=INDEX_ORDER_COUNT):
+        """
+        :param filename: 持久化文件，None 表示只保存在内存中
+        :param maxlen: 内存中保留的最近订单数
+        :param index_limit: 索引中保留的订单数
+        """
+        self.filename = filename
+        self.maxlen = maxlen
+        self.index_limit = index_limit
+        self._journal = TradeJournal(filename, fsync_every=0) if filename else None
+        self._recent = OrderedDict()  # 订单ID -> 订单，按写入顺序排列
+        self._id_offsets = OrderedDict()  # 订单ID -> 最新记录的偏移量，按偏移量升序
+        self._time_index = []  # (记录时间, 偏移量)，按时间升序
+        self._index_start = 0  # 偏移量小于它的记录已移出索引
+        self._evicted = 0  # 移出索引的订单数
+        self._evicted_until = None  # 移出索引的记录中最晚的记录时间
+        if filename:
+            for offset, order in iter_journal_offsets(filename):
+                self._index(order, offset)
+
+    def __len__(self):
+        return len(self._recent)
+
+    def __iter__(self):
+        """
+        按从旧到新的顺序遍历内存中的最近订单
+        """
+        return iter(list(self._recent.values()))
+
+    def __reversed__(self):
+        return iter(list(reversed(self._recent.values())))
+
+    def __contains__(self, order_id):
+        return self.get(order_id) is not None
+
+    @property
+    def total(self):
+        """
+        历史订单总数（按订单ID去重，移出索引后又更新的订单会重复计数）
+        """
+        return self._evicted + len(self._id_offsets) if self._journal else len(self._recent)
+
+    def append(self, order):
+        """
+        记录一个订单
+        """
+        offset = self._journal.append(order) if self._journal else None
+        self._index(order, offset)
+
+    def _index(self, order, offset):
+        order_id = str(order["id"])
+        self._recent.pop(order_id, None)
+        self._recent[order_id] = order
+        if len(self._recent) > self.maxlen:
+            self._recent.popitem(last=False)
+        if offset is not None:
+            self._id_offsets.pop(order_id, None)
+            self._id_offsets[order_id] = offset
+            bisect.insort(self._time_index, (order_time(order), offset))
+            if len(self._id_offsets) > self.index_limit:
+                self._evict()
+
+    def _evict(self):
+        """
+        把最早的四分之一订单移出索引，成批移出使时间索引的重建开销均摊到每次写入
+        """
+        keep = self.index_limit * 3 // 4
+        while len(self._id_offsets) > keep:
+            self._id_offsets.popitem(last=False)
+            self._evicted += 1
+        self._index_start = next(iter(self._id_offsets.values()), self._index_start)
+        kept = []
+        for timestamp, offset in self._time_index:
+            if offset >= self._index_start:
+                kept.append((timestamp, offset))
+            elif self._evicted_until is None or timestamp > self._evicted_until:
+                self._evicted_until = timestamp
+        self._time_index = kept
+
+    def _iter_unindexed(self):
+        """
+        流式读取文件开头已移出索引的记录
+        """
+        if not self._index_start:
+            return
+        self.flush()
+        for offset, order in iter_journal_offsets(self.filename):
+            if offset >= self._index_start:
+                return
+            yield offset, order
+
+    def get(self, order_id):
+        """
+        按订单ID查询，最近的订单直接从内存返回，较早的订单从文件读取
+        :return: 订单，不存在时返回 None
+        """
+        order_id = str(order_id)
+        order = self._recent.get(order_id)
+        if order is not None:
+            return order
+        offset = self._id_offsets.get(order_id)
+        if offset is not None:
+            self.flush()
+            return read_journal_record(self.filename, offset)
+        # 较早的订单已移出索引，扫描文件开头，以最后一条记录为准
+        found = None
+        for _, order in self._iter_unindexed():
+            if str(order["id"]) == order_id:
+                found = order
+        return found
+
+    def recent(self, limit=None):
+        """
+        返回最近的 limit 个订单，按从旧到新排列
+        """
+        orders = list(self._recent.values())
+        return orders if limit is None else orders[-limit:]
+
+    def query(self, start=None, end=None, side=None):
+        """
+        按记录时间范围和方向查询订单
+        :param start: 开始时间（毫秒，包含），None 表示不限
+        :param end: 结束时间（毫秒，包含），None 表示不限
+        :param side: buy 或 sell，None 表示不限
+        :return: 按时间升序排列的订单生成器，同一订单只返回最新的记录
+        """
+        if not self._journal:
+            for order in self._recent.values():
+                if self._matches(order, start, end, side):
+                    yield order
+            return
+
+        if self._evicted_until is not None and (start is None or start <= self._evicted_until):
+            # 已移出索引的较早记录按文件顺序返回，被索引中的记录取代的跳过
+            for _, order in self._iter_unindexed():
+                if str(order["id"]) not in self._id_offsets and self._matches(order, start, end, side):
+                    yield order
+        self.flush()
+        lo = 0 if start is None else bisect.bisect_left(self._time_index, (start, -1))
+        with open(self.filename, "rb") as f:
+            for i in range(lo, len(self._time_index)):
+                timestamp, offset = self._time_index[i]
+                if end is not None and timestamp > end:
+                    break
+                f.seek(offset)
+                order = json.loads(f.readline())
+                if self._id_offsets.get(str(order["id"])) != offset:
+                    continue  # 已被同一订单更新的记录取代
+                if side is None or order.get("side") == side:
+                    yield order
+
+    @staticmethod
+    def _matches(order, start, end, side):
+        timestamp = order_time(order)
+        return ((start is None or timestamp >= start) and (end is None or timestamp <= end)
+                and (side is None or order.get("side") == side))
+
+    def flush(self, sync=False):
+        """
+        将缓冲区写入文件，读取前调用，默认不执行fsync
+        :param sync: 是否执行fsync
+        """
+        if self._journal:
+            self._journal.flush(sync)
+
+    def close(self):
+        if self._journal:
+            self._journal.close()
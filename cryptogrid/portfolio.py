@@ -0,0 +1,150 @@
+import os
+import time
+from loguru import logger
+from cryptogrid.strategy import GridTradingStrategy
+
+
+class RequestCounter:
+    """
+    统计通过它发出的交易所请求数，其余属性原样转发给交易所对象
+    """
+
+    def __init__(self, exchange):
+        self._exchange = exchange
+        self.count = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.count += 1
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+class PortfolioRunner:
+    """
+    在一个进程里运行多个交易对的网格策略
+    所有策略共享同一个交易所连接；每一轮用一次 fetch_tickers 取所有交易对的价格、
+    一次 fetch_open_orders 取所有挂单（交易所不鼓励不带交易对查询时按交易对逐个查询），
+    再分发给各个策略，并根据实际请求数调整轮询间隔，保证总请求速率不超过交易所限制
+    """
+
+    def __init__(self, exchange, max_requests_per_second=10, tick_interval=1.0, store=None, all_open_orders=None):
+        """
+        :param exchange: 共享的交易所对象
+        :param max_requests_per_second: 允许的平均请求速率
+        :param tick_interval: 最短轮询间隔（秒）
+        :param store: SQLiteStateStore 对象，提供时所有交易对的状态都保存在其中
+        :param all_open_orders: 是否用一次不带交易对的请求取回所有挂单；None 表示自动判断，
+                                ccxt 设置了 options['fetchOpenOrders']['warnWithoutSymbol'] 的交易所（例如 binance）按交易对查询
+        """
+        self.exchange = RequestCounter(exchange)
+        self.max_requests_per_second = max_requests_per_second
+        self.tick_interval = tick_interval
+        self.strategies = {}  # 交易对 -> GridTradingStrategy
+        self.store = store
+        if all_open_orders is None:
+            options = getattr(exchange, "options", None) or {}
+            all_open_orders = not (options.get("fetchOpenOrders") or {}).get("warnWithoutSymbol")
+        self.all_open_orders = all_open_orders
+
+    def add_strategy(self, symbol, params, state_file=None):
+        """
+        添加一个交易对，已有保存的状态时恢复并与交易所挂单对账
+        :param symbol: 交易对
+        :param params: set_strategy_params 所需的参数（不含 initial_price）
+        :param state_file: 状态文件，默认 <exchange>_<symbol>_strategy_state.json，使用 store 时忽略
+        """
+        if self.store is not None:
+            strategy = GridTradingStrategy(self.exchange, symbol, store=self.store)
+            resume = self.store.has_state(symbol)
+        else:
+            if state_file is None:
+                state_file = f"{self.exchange.name}_{symbol.replace('/', '')}_strategy_state.json"
+            strategy = GridTradingStrategy(self.exchange, symbol, state_file=state_file)
+            resume = os.path.exists(state_file)
+        if resume:
+            strategy.recover()
+        else:
+            current_price = self.exchange.fetch_ticker(symbol)["last"]
+            strategy.set_strategy_params(initial_price=current_price, **params)
+        self.strategies[symbol] = strategy
+        return strategy
+
+    def fetch_prices(self):
+        """
+        批量获取所有交易对的买一价
+        """
+        symbols = list(self.strategies)
+        if self.exchange.has.get('fetchTickers'):
+            tickers = self.exchange.fetch_tickers(symbols)
+            return {symbol: ticker.get("bid") or ticker["last"] for symbol, ticker in tickers.items()}
+        return {symbol: self.exchange.fetch_order_book(symbol, limit=5)["bids"][0][0] for symbol in symbols}
+
+    def fetch_open_orders(self):
+        """
+        取回所有交易对的挂单并按交易对分组，交易所不支持时返回 None
+        不带交易对的请求失败后改为按交易对逐个查询；单个交易对查询失败时不包含该交易对，由策略自己对账
+        """
+        if not self.exchange.has.get('fetchOpenOrders'):
+            return None
+        if self.all_open_orders:
+            try:
+                orders = self.exchange.fetch_open_orders()
+            except Exception as e:
+                logger.warning("不带交易对获取挂单失败，改为按交易对获取: {error}", error=str(e))
+                self.all_open_orders = False
+            else:
+                grouped = {symbol: [] for symbol in self.strategies}
+                for order in orders:
+                    if order["symbol"] in grouped:
+                        grouped[order["symbol"]].append(order)
+                return grouped
+        grouped = {}
+        for symbol in self.strategies:
+            try:
+                grouped[symbol] = self.exchange.fetch_open_orders(symbol)
+            except Exception as e:
+                logger.error("获取 {symbol} 的挂单失败: {error}", symbol=symbol, error=str(e),
+                             rate_limit="portfolio_fetch_error")
+        return grouped
+
+    def tick(self):
+        """
+        运行一轮所有策略
+        :return: 本轮发出的交易所请求数
+        """
+        start_count = self.exchange.count
+        try:
+            prices = self.fetch_prices()
+            open_orders = self.fetch_open_orders()
+        except Exception as e:
+            logger.error("批量获取行情或挂单失败: {error}", error=str(e), rate_limit="portfolio_fetch_error")
+            return self.exchange.count - start_count
+
+        for symbol, strategy in self.strategies.items():
+            if symbol not in prices:
+                logger.warning("{symbol} 没有取到价格，跳过本轮", symbol=symbol, rate_limit="missing_price")
+                continue
+            try:
+                strategy.process_tick(prices[symbol], open_orders=None if open_orders is None else open_orders.get(symbol))
+            except Exception as e:
+                logger.error("{symbol} 策略运行出错: {error}", symbol=symbol, error=str(e), rate_limit="tick_error")
+        return self.exchange.count - start_count
+
+    def run(self, stop_event):
+        """
+        循环运行直到 stop_event 被设置
+        每轮的间隔至少为 tick_interval，请求多时自动拉长，使平均请求速率不超过上限
+        """
+        while not stop_event.is_set():
+            started = time.monotonic()
+            requests = self.tick()
+            interval = max(self.tick_interval, requests / self.max_requests_per_second)
+            stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
+        for strategy in self.strategies.values():
+            strategy.save_strategy_state()
@@ -0,0 +1,250 @@
+import cProfile
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from loguru import logger
+
+# 收到 SIGUSR1 或 cprofile 命令时默认分析的 tick 数
+PROFILE_TICKS = 20
+# 采样模式的采样间隔（秒）
+SAMPLE_INTERVAL = 0.005
+# tracemalloc 保存的调用栈深度
+TRACEMALLOC_FRAMES = 25
+# 内存报告中列出的分配位置数
+MEMORY_TOP = 30
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+class Profiler:
+    """
+    运行中的策略可以随时开关的性能分析工具，结果都写到 output_dir，不需要重启进程：
+    - cProfile：分析接下来 N 个 tick，写出 .prof 文件（可用 snakeviz / pstats 查看）
+    - 采样：后台线程定时采集所有线程的调用栈，写出 flamegraph.pl / speedscope 可读的折叠栈
+    - 内存：tracemalloc 快照，报告与上一次快照相比增长最多的分配位置，以及各策略的档位和订单数
+    """
+
+    def __init__(self, output_dir="profiles", sample_interval=SAMPLE_INTERVAL):
+        """
+        :param output_dir: 输出目录
+        :param sample_interval: 采样间隔（秒）
+        """
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.strategies = []  # 内存报告中统计档位和订单数的策略
+        self._lock = threading.Lock()
+        self._profile = None
+        self._remaining_ticks = 0
+        self._sampler = None
+        self._sampling = threading.Event()
+        self._stacks = Counter()
+        self._last_snapshot = None
+
+    def _path(self, prefix, suffix):
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, f"{prefix}_{datetime.now():%Y%m%d_%H%M%S_%f}{suffix}")
+
+    def add_strategy(self, strategy):
+        """
+        关联策略：策略的 tick 可以被 cProfile 分析，内存报告包含它的档位和订单数
+        """
+        strategy.profiler = self
+        self.strategies.append(strategy)
+
+    # cProfile
+
+    @property
+    def capturing(self):
+        return self._remaining_ticks > 0
+
+    def profile_ticks(self, ticks=PROFILE_TICKS):
+        """
+        用 cProfile 分析接下来的 ticks 个 tick
+        """
+        with self._lock:
+            if self._profile is None:
+                self._profile = cProfile.Profile()
+            self._remaining_ticks = ticks
+        logger.info("开始分析接下来的 {ticks} 个 tick", ticks=ticks)
+
+    def run_tick(self, function, *args, **kwargs):
+        """
+        在 cProfile 下运行一个 tick，分析完指定数量的 tick 后写出结果
+        """
+        profile = self._profile
+        if profile is None:
+            return function(*args, **kwargs)
+        profile.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                self._remaining_ticks -= 1
+                finished = self._remaining_ticks <= 0
+                if finished:
+                    self._profile = None
+            if finished:
+                filename = self._path("cprofile", ".prof")
+                profile.dump_stats(filename)
+                logger.info("tick 分析结果已写入 {filename}", filename=filename)
+
+    # 采样
+
+    @property
+    def sampling(self):
+        return self._sampling.is_set()
+
+    def start_sampling(self):
+        if self.sampling:
+            return
+        self._stacks = Counter()
+        self._sampling.set()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+        logger.info("开始采样，间隔 {interval_ms:.1f} 毫秒", interval_ms=self.sample_interval * 1000)
+
+    def stop_sampling(self):
+        """
+        停止采样并写出折叠栈文件
+        :return: 文件路径，没有在采样时返回 None
+        """
+        if not self.sampling:
+            return None
+        self._sampling.clear()
+        self._sampler.join()
+        filename = self._path("stacks", ".folded")
+        with open(filename, "w", encoding="utf-8") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info("采样结果已写入 {filename}，共 {samples} 个样本", filename=filename, samples=sum(self._stacks.values()))
+        return filename
+
+    def toggle_sampling(self):
+        if self.sampling:
+            self.stop_sampling()
+        else:
+            self.start_sampling()
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while self._sampling.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+            time.sleep(self.sample_interval)
+
+    # 内存
+
+    def memory_snapshot(self):
+        """
+        保存 tracemalloc 快照并写出报告；第一次调用时开始跟踪内存分配，之后的报告与上一次快照比较
+        :return: 报告文件路径
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        filename = self._path("memory", ".txt")
+        current, peak = tracemalloc.get_traced_memory()
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(f"traced: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB\n")
+            for strategy in self.strategies:
+                f.write(f"{strategy.symbol}: grid_levels={len(strategy.grid_levels)} "
+                        f"order_index={len(strategy.order_index)} history_orders={len(strategy.history_orders)} "
+                        f"history_orders_total={strategy.history_orders.total}\n")
+            if self._last_snapshot is None:
+                f.write("\n首次快照，按分配位置列出：\n")
+                stats = snapshot.statistics("lineno")
+            else:
+                f.write("\n与上一次快照相比：\n")
+                stats = snapshot.compare_to(self._last_snapshot, "lineno")
+            for stat in stats[:MEMORY_TOP]:
+                f.write(f"{stat}\n")
+        snapshot.dump(filename[:-len(".txt")] + ".tracemalloc")
+        self._last_snapshot = snapshot
+        logger.info("内存快照已写入 {filename}", filename=filename)
+        return filename
+
+    def stop_memory(self):
+        self._last_snapshot = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # 控制
+
+    def command(self, text):
+        """
+        执行一条控制命令：
+        cprofile [N] / sample start|stop|toggle / memory [stop]
+        """
+        parts = text.split()
+        if not parts:
+            return
+        name, args = parts[0], parts[1:]
+        if name == "cprofile":
+            self.profile_ticks(int(args[0]) if args else PROFILE_TICKS)
+        elif name == "sample":
+            action = args[0] if args else "toggle"
+            {"start": self.start_sampling, "stop": self.stop_sampling, "toggle": self.toggle_sampling}[action]()
+        elif name == "memory":
+            if args and args[0] == "stop":
+                self.stop_memory()
+            else:
+                self.memory_snapshot()
+        else:
+            raise ValueError(f"未知的分析命令: {text}")
+
+    def install_signal_handlers(self, ticks=PROFILE_TICKS):
+        """
+        SIGUSR1：分析接下来的 ticks 个 tick；SIGUSR2：开始/停止采样
+        只能在主线程调用，不支持这两个信号的平台上不做任何事
+        """
+        if not hasattr(signal, "SIGUSR1"):
+            return
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.profile_ticks(ticks))
+        # 写文件等耗时操作放到后台线程，不在信号处理函数里执行
+        signal.signal(signal.SIGUSR2, lambda signum, frame: threading.Thread(
+            target=self.toggle_sampling, name="profiler-toggle", daemon=True).start())
+
+    def watch(self, filename="profile.cmd", interval=1.0, stop_event=None):
+        """
+        在后台线程里每 interval 秒检查一次命令文件，存在时逐行执行其中的命令后删除
+        例如 echo "memory" > profile.cmd
+        """
+        stop_event = stop_event or threading.Event()
+
+        def loop():
+            while not stop_event.wait(interval):
+                try:
+                    with open(filename, "r", encoding="utf-8") as f:
+                        lines = f.read().splitlines()
+                    os.remove(filename)
+                except FileNotFoundError:
+                    continue
+                for line in lines:
+                    try:
+                        self.command(line)
+                    except Exception as e:
+                        logger.error("执行分析命令 {command!r} 失败: {error}", command=line, error=str(e))
+
+        thread = threading.Thread(target=loop, name="profiler-commands", daemon=True)
+        thread.start()
+        return thread
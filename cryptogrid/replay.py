@@ -0,0 +1,235 @@
+import asyncio
+import struct
+import threading
+import time
+from typing import NamedTuple
+from loguru import logger
+from cryptogrid.mock_exchange import MockExchange
+
+# 文件头：魔数 + 格式版本
+MAGIC = b"CGRP\x01"
+# 每条记录的头部：类型、时间戳（毫秒）、最新价、买盘档数、卖盘档数，随后是 (价格, 数量) 的 double 数组
+RECORD_HEADER = struct.Struct("<BqdHH")
+
+KIND_TICKER = 1
+KIND_ORDER_BOOK = 2
+KIND_NAMES = {KIND_TICKER: "ticker", KIND_ORDER_BOOK: "order_book"}
+
+
+class MarketEvent(NamedTuple):
+    """
+    一条录制的行情：ticker 的 bids/asks 只有买一和卖一
+    """
+    timestamp: int
+    kind: str
+    last: float
+    bids: tuple
+    asks: tuple
+
+    @property
+    def price(self):
+        """
+        用于撮合的市场价格
+        """
+        if self.kind == "ticker" or not (self.bids and self.asks):
+            return self.last
+        return (self.bids[0][0] + self.asks[0][0]) / 2
+
+    def order_book(self, limit=None):
+        return {
+            "timestamp": self.timestamp,
+            "bids": [list(level) for level in self.bids[:limit]],
+            "asks": [list(level) for level in self.asks[:limit]]
+        }
+
+    def ticker(self):
+        return {
+            "timestamp": self.timestamp,
+            "last": self.last,
+            "bid": self.bids[0][0] if self.bids else self.last,
+            "ask": self.asks[0][0] if self.asks else self.last
+        }
+
+
+class MarketRecorder:
+    """
+    把 ticker 和盘口按到达顺序写入紧凑的二进制文件
+    每条盘口只占 21 字节头部加每档 16 字节，比 JSON 小一个数量级，写入时不做格式化
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, "wb")
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record_ticker(self, timestamp, ticker):
+        last = ticker["last"]
+        bid = ticker.get("bid") or last
+        ask = ticker.get("ask") or last
+        self._write(KIND_TICKER, timestamp, last, [(bid, 0.0)], [(ask, 0.0)])
+
+    def record_order_book(self, timestamp, order_book):
+        bids = [(price, amount) for price, amount, *_ in order_book["bids"]]
+        asks = [(price, amount) for price, amount, *_ in order_book["asks"]]
+        if bids and asks:
+            last = (bids[0][0] + asks[0][0]) / 2
+        else:
+            last = (bids or asks)[0][0] if bids or asks else 0.0
+        self._write(KIND_ORDER_BOOK, timestamp, last, bids, asks)
+
+    def _write(self, kind, timestamp, last, bids, asks):
+        levels = [value for level in bids + asks for value in level]
+        data = RECORD_HEADER.pack(kind, int(timestamp), float(last), len(bids), len(asks))
+        data += struct.pack(f"<{len(levels)}d", *levels)
+        with self._lock:
+            self._file.write(data)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def iter_recording(filename):
+    """
+    流式读取录制文件，末尾不完整的记录（例如录制时崩溃）会被跳过
+    :return: MarketEvent 生成器
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是行情录制文件: {filename}")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            kind, timestamp, last, bid_count, ask_count = RECORD_HEADER.unpack(header)
+            size = 16 * (bid_count + ask_count)
+            payload = f.read(size)
+            if len(payload) < size:
+                logger.warning("录制文件末尾的记录不完整: {filename}", filename=filename)
+                return
+            values = struct.unpack(f"<{2 * (bid_count + ask_count)}d", payload)
+            levels = tuple(zip(values[::2], values[1::2]))
+            yield MarketEvent(timestamp, KIND_NAMES[kind], last, levels[:bid_count], levels[bid_count:])
+
+
+class RecordingExchange:
+    """
+    交易所代理：原样转发所有调用，同时录制 ticker 和盘口（包括 watch_order_book 推送）
+    """
+
+    def __init__(self, exchange, recorder):
+        self._exchange = exchange
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._exchange, name)
+
+    def _timestamp(self, data):
+        if data.get("timestamp"):
+            return data["timestamp"]
+        milliseconds = getattr(self._exchange, "milliseconds", None)
+        return milliseconds() if milliseconds else int(time.time() * 1000)
+
+    def fetch_ticker(self, symbol, *args, **kwargs):
+        ticker = self._exchange.fetch_ticker(symbol, *args, **kwargs)
+        self.recorder.record_ticker(self._timestamp(ticker), ticker)
+        return ticker
+
+    def fetch_order_book(self, symbol, *args, **kwargs):
+        order_book = self._exchange.fetch_order_book(symbol, *args, **kwargs)
+        self.recorder.record_order_book(self._timestamp(order_book), order_book)
+        return order_book
+
+    async def watch_order_book(self, symbol, *args, **kwargs):
+        order_book = await self._exchange.watch_order_book(symbol, *args, **kwargs)
+        self.recorder.record_order_book(self._timestamp(order_book), order_book)
+        return order_book
+
+
+class ReplayFinished(Exception):
+    """
+    录制的行情已经全部回放完
+    """
+
+
+class ReplayExchange(MockExchange):
+    """
+    按录制文件回放行情的模拟交易所
+    价格只在 advance() 时前进到下一条录制的行情，与策略或界面的轮询频率无关；
+    订单由 MockExchange 的撮合引擎按回放的价格路径成交，时间戳使用录制时间（模拟时钟），
+    因此同一份录制文件每次回放的结果完全相同
+    """
+
+    def __init__(self, filename, speed=None, **kwargs):
+        """
+        :param filename: 录制文件
+        :param speed: 回放速度倍数，例如 10 表示按录制时间间隔的 1/10 等待；None 表示不等待，尽可能快
+        :param kwargs: 传给 MockExchange 的撮合参数（fee_rate、liquidity 等）
+        """
+        self.filename = filename
+        self.speed = speed
+        self._events = iter_recording(filename)
+        self.event = next(self._events, None)
+        if self.event is None:
+            raise ReplayFinished(f"录制文件为空: {filename}")
+        super().__init__(initial_price=self.event.price, volatility=0, **kwargs)
+        self.name = "replay"
+
+    def milliseconds(self):
+        return self.event.timestamp
+
+    def advance(self):
+        """
+        前进到下一条行情，并按新价格撮合挂单
+        :return: 新的 MarketEvent
+        """
+        event = next(self._events, None)
+        if event is None:
+            raise ReplayFinished("录制的行情已回放完")
+        if self.speed:
+            time.sleep(max(0, event.timestamp - self.event.timestamp) / 1000 / self.speed)
+        self.event = event
+        self.price = event.price
+        return event
+
+    def _update_price(self):
+        # 价格只由录制的行情决定
+        pass
+
+    def fetch_ticker(self, symbol):
+        self._request()
+        return self.event.ticker()
+
+    def fetch_tickers(self, symbols=None):
+        self._request()
+        return {symbol: {"symbol": symbol, **self.event.ticker()} for symbol in symbols or []}
+
+    def _order_book(self, limit):
+        return self.event.order_book(limit)
+
+    async def watch_order_book(self, symbol, limit=5):
+        """
+        每次推送前进一条行情
+        """
+        await asyncio.sleep(0)
+        self.advance()
+        return self._order_book(limit)
+
+
+def replay(strategy, exchange, max_events=None):
+    """
+    用录制的行情驱动策略：每条行情运行一次 handle_price_change
+    :return: 回放的行情条数
+    """
+    count = 0
+    while max_events is None or count < max_events:
+        strategy.handle_price_change()
+        count += 1
+        try:
+            exchange.advance()
+        except ReplayFinished:
+            break
+    return count
@@ -0,0 +1,210 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from loguru import logger
+
+# 请求优先级，数字越小越先执行
+PRIORITY_ORDER = 0  # 下单、撤单
+PRIORITY_MARKET = 1  # 行情
+PRIORITY_POLL = 2  # 订单状态轮询
+
+# 各接口的权重（参考币安现货 REST 接口），未列出的接口权重为 1
+DEFAULT_WEIGHTS = {
+    "fetch_order_book": 5,
+    "fetch_ticker": 2,
+    "fetch_tickers": 40,
+    "fetch_order": 4,
+    "fetch_open_orders": 6,
+    "fetch_open_orders:all": 80,  # 不指定交易对时取所有交易对的挂单
+    "fetch_closed_orders": 20,
+    "create_limit_buy_order": 1,
+    "create_limit_sell_order": 1,
+    "create_orders": 5,
+    "cancel_order": 1,
+    "cancel_orders": 5,
+    "load_markets": 20,
+}
+
+DEFAULT_PRIORITIES = {
+    "create_limit_buy_order": PRIORITY_ORDER,
+    "create_limit_sell_order": PRIORITY_ORDER,
+    "create_order": PRIORITY_ORDER,
+    "create_orders": PRIORITY_ORDER,
+    "cancel_order": PRIORITY_ORDER,
+    "cancel_orders": PRIORITY_ORDER,
+    "fetch_order_book": PRIORITY_MARKET,
+    "fetch_ticker": PRIORITY_MARKET,
+    "fetch_tickers": PRIORITY_MARKET,
+}
+
+# 不传交易对时查询所有交易对、按 "<接口>:all" 计算权重的接口
+ALL_SYMBOLS_METHODS = ("fetch_open_orders",)
+
+# 同一个订单的并发查询会合并成一次请求
+COALESCED_METHODS = ("fetch_order",)
+
+# ccxt 在触发交易所限频时抛出的异常类型
+RATE_LIMIT_ERRORS = ("RateLimitExceeded", "DDoSProtection")
+
+
+class SlidingWindowLimiter:
+    """
+    滑动窗口限额：记录最近 window 秒内每次请求的时间和权重，
+    任意 window 秒内的总权重都不超过 limit（令牌桶在满桶突发后还会补充，一个窗口内最多可以用到约两倍的额度）
+    不是线程安全的，由 RequestScheduler 加锁使用
+    """
+
+    def __init__(self, limit, window, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self.used = 0  # 窗口内已用的权重
+        self._entries = deque()  # (时间, 权重)
+
+    def _expire(self, now):
+        while self._entries and self._entries[0][0] <= now - self.window:
+            self.used -= self._entries.popleft()[1]
+
+    @property
+    def tokens(self):
+        """
+        当前窗口内剩余的额度
+        """
+        self._expire(self.clock())
+        return self.limit - self.used
+
+    def try_acquire(self, weight):
+        """
+        尝试占用 weight 的额度
+        :return: 成功时返回 0，否则返回还需要等待的秒数
+        """
+        now = self.clock()
+        self._expire(now)
+        weight = min(weight, self.limit)
+        if self.used + weight <= self.limit:
+            self._entries.append((now, weight))
+            self.used += weight
+            return 0
+        # 等到足够多的旧请求移出窗口
+        needed = self.used + weight - self.limit
+        for timestamp, entry_weight in self._entries:
+            needed -= entry_weight
+            if needed <= 0:
+                return max(timestamp + self.window - now, 1e-6)
+        return self.window
+
+    def drain(self):
+        """
+        占满当前窗口的额度，交易所已经返回限频错误时使用
+        """
+        now = self.clock()
+        self._expire(now)
+        if self.used < self.limit:
+            self._entries.append((now, self.limit - self.used))
+            self.used = self.limit
+
+
+class RequestScheduler:
+    """
+    位于策略和交易所之间的请求调度层
+    按接口权重在滑动窗口内扣减额度，额度不足时排队等待，
+    排队时下单和撤单优先于行情，行情优先于订单状态轮询；
+    同一订单的并发查询会合并成一次请求。
+    除 watch_* 推送接口外，交易所的其他方法和属性都原样转发
+    """
+
+    def __init__(self, exchange, weight_limit=1200, window=60, weights=None, priorities=None,
+                 clock=time.monotonic):
+        """
+        :param exchange: 交易所对象
+        :param weight_limit: 每个时间窗口允许的总权重
+        :param window: 时间窗口（秒）
+        :param weights: 覆盖默认的接口权重
+        :param priorities: 覆盖默认的接口优先级
+        """
+        self._exchange = exchange
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        self.bucket = SlidingWindowLimiter(weight_limit, window, clock)
+        self._cond = threading.Condition()
+        self._waiters = []  # (优先级, 序号)
+        self._seq = itertools.count()
+        self._inflight = {}  # 合并中的请求 -> Future
+        self._inflight_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not callable(attr) or name.startswith("_") or name.startswith("watch_"):
+            return attr
+
+        def scheduled(*args, **kwargs):
+            return self.request(name, *args, **kwargs)
+
+        return scheduled
+
+    def acquire(self, weight, priority):
+        """
+        阻塞直到窗口内有足够额度，并且前面没有更高优先级的请求在等待
+        """
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    if self._waiters[0] == ticket:
+                        wait = self.bucket.try_acquire(weight)
+                        if wait == 0:
+                            return
+                    else:
+                        wait = None
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def request(self, name, *args, **kwargs):
+        """
+        按调度规则调用交易所的 name 方法
+        """
+        if name in COALESCED_METHODS:
+            key = (name, str(args[0]) if args else None, args[1:], tuple(sorted(kwargs.items())))
+            with self._inflight_lock:
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = self._inflight[key] = Future()
+            if not owner:
+                return future.result()
+            try:
+                future.set_result(self._call(name, *args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[key]
+            return future.result()
+        return self._call(name, *args, **kwargs)
+
+    def weight(self, name, *args, **kwargs):
+        """
+        返回一次调用的权重
+        """
+        if name in ALL_SYMBOLS_METHODS and not (args and args[0]) and not kwargs.get("symbol"):
+            return self.weights.get(f"{name}:all", self.weights.get(name, 1))
+        return self.weights.get(name, 1)
+
+    def _call(self, name, *args, **kwargs):
+        self.acquire(self.weight(name, *args, **kwargs), self.priorities.get(name, PRIORITY_POLL))
+        try:
+            return getattr(self._exchange, name)(*args, **kwargs)
+        except Exception as e:
+            if type(e).__name__ in RATE_LIMIT_ERRORS:
+                logger.warning("交易所返回限频错误，暂停请求: {error}", method=name, error=str(e),
+                               rate_limit="rate_limit_error")
+                with self._cond:
+                    self.bucket.drain()
+            raise
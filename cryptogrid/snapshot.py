@@ -0,0 +1,80 @@
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional
+
+# 快照中保留的最近订单数
+SNAPSHOT_ORDER_COUNT = 50
+
+
+class LevelView(NamedTuple):
+    """
+    档位的只读视图，字段名与 GridLevel 一致
+    """
+    price: float
+    buy_order_status: str
+    buy_order: Any
+    sell_order_status: str
+    sell_order: Any
+
+    @classmethod
+    def of(cls, level):
+        return cls(level.price, level.buy_order_status, level.buy_order, level.sell_order_status, level.sell_order)
+
+
+class StrategySnapshot(NamedTuple):
+    """
+    策略在某个 tick 结束时的只读快照
+    字段名与 GridTradingStrategy 的属性一致，界面组件可以直接用它代替策略对象
+    """
+    version: int
+    symbol: str
+    initial_capital: float
+    capital: float
+    position: float
+    total_assets: float
+    pnl: float
+    pnl_rate: float
+    realized_pnl: float
+    unrealized_pnl: float
+    fees: float
+    current_price: float
+    grid: tuple
+    grid_levels: Mapping[int, LevelView]  # 价格（tick）-> 档位视图
+    history_orders: tuple
+    market_depth: Optional[dict]
+
+
+class SnapshotChannel:
+    """
+    单写多读的快照通道：策略每个 tick 发布一次，界面等待新版本后再渲染
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._snapshot = None
+
+    @property
+    def latest(self):
+        return self._snapshot
+
+    def publish(self, snapshot):
+        with self._cond:
+            self._snapshot = snapshot
+            self._cond.notify_all()
+
+    def wait_for_update(self, version, timeout=None):
+        """
+        等待版本号大于 version 的快照
+        :return: 新快照，超时返回 None
+        """
+        with self._cond:
+            if self._cond.wait_for(lambda: self._snapshot is not None and self._snapshot.version > version, timeout):
+                return self._snapshot
+            return None
+
+
+def freeze_levels(level_views):
+    """
+    返回档位视图字典的只读副本
+    """
+    return MappingProxyType(dict(level_views))
@@ -0,0 +1,294 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from cryptogrid.order_history import RECENT_ORDER_COUNT, order_time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS strategies (
+    symbol TEXT PRIMARY KEY,
+    counters TEXT NOT NULL,
+    grid TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS levels (
+    symbol TEXT NOT NULL,
+    tick INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (symbol, tick)
+);
+CREATE TABLE IF NOT EXISTS orders (
+    symbol TEXT NOT NULL,
+    id TEXT NOT NULL,
+    side TEXT,
+    status TEXT,
+    timestamp INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (symbol, id)
+);
+CREATE INDEX IF NOT EXISTS orders_by_time ON orders (symbol, timestamp);
+CREATE INDEX IF NOT EXISTS orders_by_side ON orders (symbol, side, timestamp);
+CREATE INDEX IF NOT EXISTS orders_by_seq ON orders (symbol, seq);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    price REAL,
+    buy_executed_price REAL,
+    sell_executed_price REAL,
+    amount REAL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS trades_by_time ON trades (symbol, timestamp);
+"""
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class SQLiteStateStore:
+    """
+    嵌入式 SQLite（WAL 模式）状态库，一个文件保存所有交易对的策略参数、档位状态、订单和成交
+    同一个 tick 内写入的订单、成交和档位在 checkpoint 时一起提交，崩溃后不会只恢复一部分；
+    通过 checkpointer / order_history / trade_journal 提供与文件存储相同的接口
+    """
+
+    def __init__(self, filename="grid_state.db"):
+        self.filename = filename
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL 模式下 NORMAL 只在检查点时 fsync，断电可能丢失最后的提交但不会损坏数据库
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        with self._lock:
+            return self._conn.executemany(sql, rows)
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def has_state(self, symbol):
+        return bool(self.query("SELECT 1 FROM strategies WHERE symbol = ?", (symbol,)))
+
+    def rename_symbol(self, old, new):
+        """
+        把 old 的策略状态、档位、订单和成交改到 new 名下，用于交易对名称格式变化后的迁移
+        :return: new 已有状态或 old 没有状态时不做任何事，返回 False
+        """
+        with self._lock:
+            if self.has_state(new) or not self.has_state(old):
+                return False
+            row = self.query("SELECT counters FROM strategies WHERE symbol = ?", (old,))
+            counters = json.loads(row[0][0])
+            if "symbol" in counters:
+                counters["symbol"] = new
+            self.execute("UPDATE strategies SET symbol = ?, counters = ? WHERE symbol = ?",
+                         (new, _dumps(counters), old))
+            for table in ("levels", "orders", "trades"):
+                self.execute(f"UPDATE {table} SET symbol = ? WHERE symbol = ?", (new, old))
+            self._conn.commit()
+        return True
+
+    def checkpointer(self, symbol):
+        return SQLiteCheckpointer(self, symbol)
+
+    def order_history(self, symbol, maxlen=RECENT_ORDER_COUNT):
+        return SQLiteOrderHistory(self, symbol, maxlen)
+
+    def trade_journal(self, symbol):
+        return SQLiteTradeJournal(self, symbol)
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+class SQLiteCheckpointer:
+    """
+    与 StateCheckpointer 接口相同的检查点：每次增量在一个事务里更新变化的计数器和档位
+    """
+    compact_every = 0
+    needs_compaction = False  # 每次提交都是完整的最新状态，不需要合并
+
+    def __init__(self, store, symbol):
+        self.store = store
+        self.symbol = symbol
+        self.filename = store.filename
+
+    def append_delta(self, delta):
+        with self.store._lock:
+            if "counters" in delta:
+                row = self.store.query("SELECT counters FROM strategies WHERE symbol = ?", (self.symbol,))
+                counters = json.loads(row[0][0]) if row else {}
+                counters.update(delta["counters"])
+                self.store.execute(
+                    "INSERT INTO strategies (symbol, counters, grid) VALUES (?, ?, '[]') "
+                    "ON CONFLICT(symbol) DO UPDATE SET counters = excluded.counters",
+                    (self.symbol, _dumps(counters)))
+            self._write_levels(delta.get("grid_levels", {}))
+            self.store.commit()
+
+    def save_snapshot(self, state):
+        state = dict(state)
+        grid = state.pop("grid")
+        levels = state.pop("grid_levels")
+        with self.store._lock:
+            self.store.execute(
+                "INSERT INTO strategies (symbol, counters, grid) VALUES (?, ?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET counters = excluded.counters, grid = excluded.grid",
+                (self.symbol, _dumps(state), _dumps(grid)))
+            self.store.execute("DELETE FROM levels WHERE symbol = ?", (self.symbol,))
+            self._write_levels(levels)
+            self.store.commit()
+
+    def _write_levels(self, levels):
+        self.store.executemany(
+            "INSERT INTO levels (symbol, tick, data) VALUES (?, ?, ?) "
+            "ON CONFLICT(symbol, tick) DO UPDATE SET data = excluded.data",
+            [(self.symbol, int(tick), _dumps(data)) for tick, data in levels.items()])
+
+    def load(self):
+        """
+        :return: 与 StateCheckpointer.load 相同格式的状态字典
+        """
+        row = self.store.query("SELECT counters, grid FROM strategies WHERE symbol = ?", (self.symbol,))
+        if not row:
+            raise FileNotFoundError(f"{self.store.filename} 中没有 {self.symbol} 的状态")
+        state = json.loads(row[0][0])
+        state["grid"] = json.loads(row[0][1])
+        state["grid_levels"] = {tick: json.loads(data) for tick, data in self.store.query(
+            "SELECT tick, data FROM levels WHERE symbol = ?", (self.symbol,))}
+        return state
+
+    def close(self):
+        self.store.commit()
+
+
+class SQLiteTradeJournal:
+    """
+    与 TradeJournal 接口相同的成交记录，写入 trades 表，随下一次检查点提交
+    """
+
+    def __init__(self, store, symbol):
+        self.store = store
+        self.symbol = symbol
+
+    def append(self, record):
+        self.store.execute(
+            "INSERT INTO trades (symbol, price, buy_executed_price, sell_executed_price, amount, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.symbol, record.get("price"), record.get("buy_executed_price"),
+             record.get("sell_executed_price"), record.get("amount"), record.get("timestamp")))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.store.commit()
+
+    def __iter__(self):
+        rows = self.store.query(
+            "SELECT price, buy_executed_price, sell_executed_price, amount, timestamp "
+            "FROM trades WHERE symbol = ? ORDER BY id", (self.symbol,))
+        for price, buy_price, sell_price, amount, timestamp in rows:
+            yield {"price": price, "buy_executed_price": buy_price, "sell_executed_price": sell_price,
+                   "amount": amount, "timestamp": timestamp}
+
+
+class SQLiteOrderHistory:
+    """
+    与 OrderHistory 接口相同的订单历史：最近的订单保存在内存中，全部订单保存在 orders 表，
+    按ID、时间范围和方向的查询都走索引
+    """
+
+    def __init__(self, store, symbol, maxlen=RECENT_ORDER_COUNT):
+        self.store = store
+        self.symbol = symbol
+        self.maxlen = maxlen
+        self.filename = store.filename
+        rows = store.query("SELECT id, data, seq FROM orders WHERE symbol = ? ORDER BY seq DESC LIMIT ?",
+                           (symbol, maxlen))
+        self._recent = OrderedDict((order_id, json.loads(data)) for order_id, data, _ in reversed(rows))
+        self._seq = rows[0][2] if rows else 0
+
+    def __len__(self):
+        return len(self._recent)
+
+    def __iter__(self):
+        return iter(list(self._recent.values()))
+
+    def __reversed__(self):
+        return iter(list(reversed(self._recent.values())))
+
+    def __contains__(self, order_id):
+        return self.get(order_id) is not None
+
+    @property
+    def total(self):
+        return self.store.query("SELECT COUNT(*) FROM orders WHERE symbol = ?", (self.symbol,))[0][0]
+
+    def append(self, order):
+        """
+        记录一个订单，随下一次检查点提交
+        """
+        order_id = str(order["id"])
+        self._seq += 1
+        self.store.execute(
+            "INSERT INTO orders (symbol, id, side, status, timestamp, data, seq) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(symbol, id) DO UPDATE SET side = excluded.side, status = excluded.status, "
+            "timestamp = excluded.timestamp, data = excluded.data, seq = excluded.seq",
+            (self.symbol, order_id, order.get("side"), order.get("status"), order_time(order), _dumps(order), self._seq))
+        self._recent.pop(order_id, None)
+        self._recent[order_id] = order
+        if len(self._recent) > self.maxlen:
+            self._recent.popitem(last=False)
+
+    def get(self, order_id):
+        order_id = str(order_id)
+        order = self._recent.get(order_id)
+        if order is not None:
+            return order
+        row = self.store.query("SELECT data FROM orders WHERE symbol = ? AND id = ?", (self.symbol, order_id))
+        return json.loads(row[0][0]) if row else None
+
+    def recent(self, limit=None):
+        orders = list(self._recent.values())
+        return orders if limit is None else orders[-limit:]
+
+    def query(self, start=None, end=None, side=None):
+        """
+        按时间范围和方向查询订单，按时间升序排列
+        """
+        sql = "SELECT data FROM orders WHERE symbol = ?"
+        params = [self.symbol]
+        if side is not None:
+            sql += " AND side = ?"
+            params.append(side)
+        if start is not None:
+            sql += " AND timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND timestamp <= ?"
+            params.append(end)
+        sql += " ORDER BY timestamp, seq"
+        for (data,) in self.store.query(sql, params):
+            yield json.loads(data)
+
+    def flush(self, sync=False):
+        # 订单与档位状态在检查点时一起提交
+        pass
+
+    def close(self):
+        self.store.commit()
@@ -1,23 +1,134 @@
 from loguru import logger
-from cryptogrid.util import format_price
+from cryptogrid.trade_journal import TradeJournal
+from cryptogrid.checkpoint import StateCheckpointer
+from cryptogrid.level_index import GridLevelIndex
+from cryptogrid.order_history import OrderHistory
+from cryptogrid.metrics import REGISTRY, InstrumentedExchange
+from cryptogrid.ticks import PriceScale, market_scale
+from cryptogrid.accounting import Accounting
+from cryptogrid.snapshot import SNAPSHOT_ORDER_COUNT, LevelView, SnapshotChannel, StrategySnapshot, freeze_levels
 import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from enum import StrEnum
+
+
+class OrderStatus(StrEnum):
+    """
+    档位上订单的状态，值与交易所返回的状态字符串一致，可以直接和字符串比较
+    """
+    NONE = "未下单"
+    PENDING = "pending"
+    OPEN = "open"
+    FILLED = "filled"
+    CLOSING = "closing"
+    CLOSED = "closed"  # 已撤销
+
+    @classmethod
+    def _missing_(cls, value):
+        # ccxt 的撤销、过期、拒绝状态都按已撤销处理
+        if value in ("canceled", "cancelled", "expired", "rejected"):
+            return cls.CLOSED
+        # 部分交易所对部分成交、新建的订单使用单独的状态，订单仍然挂着
+        if value in ("partially_filled", "new"):
+            return cls.OPEN
+        return None
+
+
+# 仍在交易所挂着、状态还可能变化的订单
+LIVE_ORDER_STATUSES = frozenset((OrderStatus.PENDING, OrderStatus.OPEN, OrderStatus.CLOSING))
+# 当前价格下方保持买单的档位数
+ACTIVE_BUY_LEVELS = 5
+# create_orders 每次请求最多包含的订单数
+BATCH_ORDER_LIMIT = 5
+# 批量接口返回这些错误时说明当前交易对不支持（例如 binance 现货），改为逐个并发发送
+BATCH_UNSUPPORTED_ERRORS = ("NotSupported", "BadRequest")
+# 查询订单时交易所返回这个错误说明已经不认识该订单（例如很久以前撤销的订单）
+ORDER_NOT_FOUND_ERRORS = ("OrderNotFound",)
+SIDE_NAMES = {"buy": "买", "sell": "卖"}
+# 下单时 clientOrderId 的默认前缀，恢复时只接管或撤销带本策略前缀的挂单
+CLIENT_ORDER_PREFIX = "cgrid"
+
+def generate_grid(initial_price, grid_size, levels, scale=None):
+    """
+    生成价格网格数组
+    每档价格由初始价格直接按幂次计算后取整到 tick，不会累积浮点误差
+    :param initial_price: 初始价格
+    :param grid_size: 每档的百分比
+    :param levels: 向上和向下的档位数
+    :param scale: PriceScale 对象，默认使用默认精度
+    :return: 返回一个整数 tick 列表，按价格从高到低排序，取整后重复的档位只保留一个
+    """
+    scale = scale or PriceScale()
+    initial = initial_price / scale.tick_size
+    grid = {round(initial)}
+    for i in range(1, levels):
+        grid.add(round(initial * (1 - grid_size) ** i))
+        grid.add(round(initial * (1 + grid_size) ** i))
+    grid.discard(0)
+    return sorted(grid, reverse=True)
+
+_default_trade_journal = None
+
+def default_trade_journal():
+    """
+    返回默认的成交日志（completed_trades.jsonl）
+    """
+    global _default_trade_journal
+    if _default_trade_journal is None:
+        _default_trade_journal = TradeJournal()
+    return _default_trade_journal
 
 class GridLevel:
-    def __init__(self, price):
-        self.price = price  # 档位价格
+    __slots__ = ("tick", "price", "buy_order_status", "sell_order_status", "amount",
+                 "buy_order", "buy_executed_price", "buy_cost", "buy_filled", "buy_fee",
+                 "sell_order", "sell_executed_price", "sell_filled", "sell_fee", "profit", "round_trips")
+
+    def __init__(self, tick, price):
+        self.tick = tick  # 档位价格（整数 tick），用于查找和比较
+        self.price = price  # 档位价格，用于下单、记账和显示
+        self.profit = 0  # 该档位累计的买卖轮次利润（扣除手续费）
+        self.round_trips = 0  # 该档位完成的买卖轮数
         self.reset()
 
     def reset(self):
-        self.buy_order_status = "未下单"
-        self.sell_order_status = "未下单"
+        self.buy_order_status = OrderStatus.NONE
+        self.sell_order_status = OrderStatus.NONE
         self.amount = 0  # 档位数量
         self.buy_order = None  # 买入订单ID
         self.buy_executed_price = 0  # 买入成交价
+        self.buy_cost = 0  # 买入花费（含手续费）
+        self.buy_filled = 0  # 买单已记账的成交数量
+        self.buy_fee = 0  # 买单已记账的手续费
         self.sell_order = None  # 卖出订单ID
         self.sell_executed_price = 0  # 卖出成交价
+        self.sell_filled = 0  # 卖单已记账的成交数量
+        self.sell_fee = 0  # 卖单已记账的手续费
+
+    def to_dict(self):
+        """
+        返回可以JSON序列化的档位状态
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def update(self, data):
+        """
+        从 to_dict 的结果恢复档位状态，档位价格由构造参数决定
+        """
+        for name, value in data.items():
+            if name in ("tick", "price"):
+                continue
+            if name in ("buy_order_status", "sell_order_status"):
+                value = OrderStatus(value)
+            setattr(self, name, value)
 
-    def save_completed_trade(self):
+    def save_completed_trade(self, journal=None):
+        """
+        将完成的一轮买卖追加到成交日志
+        :param journal: TradeJournal 对象，默认写入 completed_trades.jsonl
+        """
         # 创建要保存的记录
         completed_trade = {
             "price": self.price,
@@ -27,35 +138,24 @@ class GridLevel:
             "timestamp": datetime.now().isoformat()
         }
         
-        # 将记录追加到文件中
         try:
-            with open("completed_trades.json", "a+") as f:
-                f.seek(0)  # 移动到文件开头
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = []
-                
-                existing_data.append(completed_trade)
-                
-                f.seek(0)  # 移动到文件开头
-                f.truncate()  # 清空文件内容
-                json.dump(existing_data, f, indent=4)
-            
-            logger.info(f"成功记录完成的交易: {completed_trade}")
+            (journal or default_trade_journal()).append(completed_trade)
+            logger.info("成功记录完成的交易: {trade}", trade=completed_trade)
         except Exception as e:
-            logger.error(f"记录完成的交易时出错: {str(e)}")
+            logger.error("记录完成的交易时出错: {error}", error=str(e), price=self.price)
  
     def __str__(self):
         return f"价格: {self.price}, 数量: {self.amount}, 买入状态: {self.buy_order_status}, 卖出状态: {self.sell_order_status}"
 
 class Order:
+    __slots__ = ("order_id", "price", "amount", "direction", "status")
+
     def __init__(self, order_id, price, amount, direction):
         self.order_id = order_id
         self.price = price
         self.amount = amount
         self.direction = direction
-        self.status = "已下单"
+        self.status = OrderStatus.PENDING
 
     def __str__(self):
         return f"订单ID: {self.order_id}, 价格: {self.price}, 数量: {self.amount}, 状态: {self.status}"
@@ -63,20 +163,50 @@ class Order:
 
 
 class GridTradingStrategy:
-    def __init__(self, exchange, symbol, load_from_file: bool = False):
+    def __init__(self, exchange, symbol, load_from_file: bool = False, state_file: str = 'strategy_state.json',
+                 metrics=None, store=None, scale=None):
         """
         初始化策略
         :param exchange: 交易所对象
         :param symbol: 交易对
         :param load_from_file: 是否从文件加载策略状态
+        :param state_file: 策略状态快照文件，提供 store 时不使用
+        :param metrics: MetricsRegistry 对象，默认使用全局注册表
+        :param store: SQLiteStateStore 对象，提供时策略状态、订单和成交都保存在其中
+        :param scale: PriceScale 对象，默认按交易所已加载的市场精度
         """
-        self.exchange = exchange
+        self.log = logger.bind(symbol=symbol)  # 结构化日志，每条都带交易对字段
+        self._tick_log = self.log.bind(rate_limit="tick")  # 每个 tick 一条的日志由 RateLimitFilter 限流
+        self.metrics = metrics or REGISTRY
+        self.exchange = InstrumentedExchange(exchange, self.metrics, symbol=symbol)
         self.symbol = symbol
+        self.scale = scale or market_scale(exchange, symbol)
+        self._tick_seconds = self.metrics.histogram("strategy_tick_seconds", "每个 tick 的处理耗时", symbol=symbol)
+        self._snapshot_seconds = self.metrics.histogram("strategy_state_save_seconds", "策略状态保存耗时",
+                                                        symbol=symbol, kind="snapshot")
+        self._delta_seconds = self.metrics.histogram("strategy_state_save_seconds", "策略状态保存耗时",
+                                                     symbol=symbol, kind="delta")
+        self._fill_lag_seconds = self.metrics.histogram("order_fill_detection_lag_seconds",
+                                                        "订单成交到策略发现成交的延迟", symbol=symbol)
+        self._transitions = {}  # (方向, 原状态, 新状态) -> Counter
+        self.store = store
+        if store is not None:
+            self.trade_journal = store.trade_journal(symbol)
+            self.checkpointer = store.checkpointer(symbol)
+        else:
+            self.trade_journal = default_trade_journal()
+            self.checkpointer = StateCheckpointer(state_file)
+        self.order_workers = 8  # 并发下单、撤单的线程数
+        self.client_order_prefix = CLIENT_ORDER_PREFIX  # 同一账户运行多个实例时设置不同的前缀
+        self._executor = None
+        self._unsupported_batches = set()  # 对本交易对不可用的批量接口，例如 createOrders
+        self.snapshots = SnapshotChannel()  # 每个 tick 发布一次只读快照，供界面读取
+        self._snapshot_version = 0
+        self.profiler = None  # Profiler 对象，由 Profiler.add_strategy 设置
 
+        self.reset_strategy()
         if load_from_file:
             self.load_strategy_state()
-        else:
-            self.reset_strategy()
 
     def reset_strategy(self):
         """
@@ -85,18 +215,27 @@ class GridTradingStrategy:
         self.initial_price = 0
         self.grid_size = 0
         self.grid_price = 0
+        self.grid_ticks = 0  # 卖单相对买入档位的价差（tick）
         self.position_amount = 0
-        self.initial_capital = 0
         self.max_loss = 0
-        self.total_assets = 0
-        self.capital = 0
-        self.position = 0
-        self.pnl = 0
-        self.pnl_rate = 0
+        self.accounting = Accounting()
         self.current_price = 0
-        self.history_orders = []
+        if self.store is not None:
+            self.history_orders = self.store.order_history(self.symbol)
+        else:
+            self.history_orders = OrderHistory(self.history_file)
         self.grid = []
         self.grid_levels = {}
+        self.level_index = GridLevelIndex()
+        self._working_levels = set()  # 有订单在途、需要每个tick检查的档位
+        self.order_index = {}  # 订单ID -> (档位, 方向)，只索引仍在交易所挂着的订单
+        self._dirty_levels = set()  # 上次检查点之后发生变化的档位
+        self._saved_counters = {}  # 上次检查点写入的计数器
+        self._level_views = {}  # 价格 -> LevelView，快照复用未变化档位的视图
+        self._stale_views = set()  # 上次发布快照之后发生变化的档位
+        self._grid_view = ()  # 快照共享的网格元组，网格重建时更新
+        self._frozen_levels = None  # 上次发布的只读档位映射，档位变化后重新生成
+        self.market_depth = None
 
     def set_strategy_params(self, initial_price: float, grid_size: float, grid_levels: int,
                             position_amount: float, initial_capital: float, max_loss: float):
@@ -112,81 +251,275 @@ class GridTradingStrategy:
         self.initial_price = initial_price
         self.grid_size = grid_size
         self.grid_price = initial_price * grid_size
+        self.grid_ticks = self.scale.to_ticks(self.grid_price)
         self.position_amount = position_amount
-        self.initial_capital = initial_capital
         self.max_loss = max_loss
-        self.total_assets = initial_capital
-        self.capital = initial_capital
+        self.accounting = Accounting(initial_capital, initial_price)
         self.current_price = initial_price
 
         # 生成价格网格数组
         self.grid = self.generate_grid(initial_price, grid_size, grid_levels)
         # 使用 GridLevel 对象来追踪每个档位
-        self.grid_levels = {price: GridLevel(price) for price in self.grid}
+        self.grid_levels = {tick: GridLevel(tick, self.scale.to_price(tick)) for tick in self.grid}
+        self.level_index = GridLevelIndex(self.grid_levels)
+        self._working_levels = set()
         self.save_strategy_state()
+        self._reset_views()
+        self.publish_snapshot()
+
+    @property
+    def initial_capital(self):
+        return self.accounting.initial_capital
+
+    @property
+    def capital(self):
+        return self.accounting.capital
+
+    @property
+    def position(self):
+        return self.accounting.position
+
+    @property
+    def total_assets(self):
+        return self.accounting.total_assets
+
+    @property
+    def pnl(self):
+        return self.accounting.pnl
+
+    @property
+    def pnl_rate(self):
+        return self.accounting.pnl_rate
+
+    @property
+    def realized_pnl(self):
+        return self.accounting.realized_pnl
 
-    def save_strategy_state(self, filename='strategy_state.json'):
+    @property
+    def unrealized_pnl(self):
+        return self.accounting.unrealized_pnl
+
+    @property
+    def fees(self):
+        return self.accounting.fees
+
+    def _counters(self):
         """
-        保存策略参数和状态到JSON文件
+        返回需要持久化的标量状态
         """
-        state = {
+        return {
             'initial_price': self.initial_price,
             'grid_size': self.grid_size,
             'grid_price': self.grid_price,
+            'grid_ticks': self.grid_ticks,
+            'tick_size': self.scale.tick_size,
+            'lot_size': self.scale.lot_size,
             'position_amount': self.position_amount,
-            'initial_capital': self.initial_capital,
             'max_loss': self.max_loss,
-            'total_assets': self.total_assets,
-            'capital': self.capital,
-            'position': self.position,
-            'pnl': self.pnl,
-            'pnl_rate': self.pnl_rate,
+            **self.accounting.to_dict(),
             'current_price': self.current_price,
-            'grid': self.grid,
-            'grid_levels': {price: level.__dict__ for price, level in self.grid_levels.items()},
             'symbol': self.symbol
         }
-        
-        with open(filename, 'w') as f:
-            json.dump(state, f, indent=4)
-        
-        logger.info(f"策略状态已保存到 {filename}")
 
-    def load_strategy_state(self, filename='strategy_state.json'):
+    def _use_state_file(self, filename):
+        if self.store is None and filename is not None and filename != self.checkpointer.filename:
+            self.checkpointer.close()
+            self.checkpointer = StateCheckpointer(filename, self.checkpointer.compact_every)
+
+    def mark_dirty(self, level):
+        """
+        标记档位在本次检查点和快照之后发生了变化
+        """
+        self._dirty_levels.add(level)
+        self._stale_views.add(level)
+
+    def publish_snapshot(self):
         """
-        从JSON文件加载策略参数和状态
+        发布当前状态的只读快照
+        只有档位变化时才重新生成变化档位的视图和档位映射，否则复用上一个快照的网格、档位映射和订单列表，
+        每个 tick 的开销与网格大小无关；档位、价格和盘口都没有变化时不发布新版本，界面不必重绘
         """
+        previous = self.snapshots.latest
+        if self._stale_views or self._frozen_levels is None or previous is None:
+            for level in self._stale_views:
+                self._level_views[level.tick] = LevelView.of(level)
+            self._stale_views.clear()
+            self._frozen_levels = freeze_levels(self._level_views)
+            history_orders = tuple(dict(order) for order in self.history_orders.recent(SNAPSHOT_ORDER_COUNT))
+        elif self.current_price == previous.current_price and self.market_depth == previous.market_depth:
+            return
+        else:
+            # 成交会改变档位状态，档位没有变化时最近订单也不会变化
+            history_orders = previous.history_orders
+        self._snapshot_version += 1
+        self.snapshots.publish(StrategySnapshot(
+            version=self._snapshot_version,
+            symbol=self.symbol,
+            initial_capital=self.initial_capital,
+            capital=self.capital,
+            position=self.position,
+            total_assets=self.total_assets,
+            pnl=self.pnl,
+            pnl_rate=self.pnl_rate,
+            realized_pnl=self.realized_pnl,
+            unrealized_pnl=self.unrealized_pnl,
+            fees=self.fees,
+            current_price=self.current_price,
+            grid=self._grid_view,
+            grid_levels=self._frozen_levels,
+            history_orders=history_orders,
+            market_depth=self.market_depth
+        ))
+
+    def _reset_views(self):
+        self._level_views = {tick: LevelView.of(level) for tick, level in self.grid_levels.items()}
+        self._stale_views.clear()
+        self._grid_view = tuple(self.grid)
+        self._frozen_levels = None
+
+    def save_strategy_state(self, filename=None):
+        """
+        保存完整的策略参数和状态快照到JSON文件
+        """
+        self._use_state_file(filename)
+        counters = self._counters()
+        state = dict(counters)
+        state['grid'] = self.grid
+        state['grid_levels'] = {tick: level.to_dict() for tick, level in self.grid_levels.items()}
+
+        with self._snapshot_seconds.time():
+            self.checkpointer.save_snapshot(state)
+        self._saved_counters = counters
+        self._dirty_levels.clear()
+        self.log.debug("策略状态已保存到 {filename}", filename=self.checkpointer.filename)
+
+    def checkpoint(self):
+        """
+        增量保存：只写入上次检查点之后变化的计数器和档位，
+        增量累计到一定数量后合并成完整快照
+        """
+        counters = self._counters()
+        changed = {key: value for key, value in counters.items() if self._saved_counters.get(key) != value}
+        if not changed and not self._dirty_levels:
+            return
+
+        delta = {}
+        if changed:
+            delta['counters'] = changed
+        if self._dirty_levels:
+            delta['grid_levels'] = {level.tick: level.to_dict() for level in self._dirty_levels}
+        with self._delta_seconds.time():
+            self.checkpointer.append_delta(delta)
+        self._saved_counters = counters
+        self._dirty_levels.clear()
+
+        if self.checkpointer.needs_compaction:
+            self.save_strategy_state()
+
+    def load_strategy_state(self, filename=None):
+        """
+        从快照和增量日志加载策略参数和状态
+        """
+        self._use_state_file(filename)
+        filename = self.checkpointer.filename
         try:
-            with open(filename, 'r') as f:
-                state = json.load(f)
+            state = self.checkpointer.load()
             
             # 恢复策略参数和状态
             self.initial_price = state['initial_price']
             self.grid_size = state['grid_size']
             self.grid_price = state['grid_price']
+            if 'tick_size' in state:
+                self.scale = PriceScale(state['tick_size'], state['lot_size'])
+                self.grid_ticks = state['grid_ticks']
+                self.grid = state['grid']
+                levels = {int(tick): data for tick, data in state['grid_levels'].items()}
+            else:
+                # 旧版本的状态以浮点价格为键，按当前精度换算成 tick
+                self.grid_ticks = self.scale.to_ticks(self.grid_price)
+                self.grid = [self.scale.to_ticks(price) for price in state['grid']]
+                levels = {self.scale.to_ticks(float(price)): data for price, data in state['grid_levels'].items()}
             self.position_amount = state['position_amount']
-            self.initial_capital = state['initial_capital']
             self.max_loss = state['max_loss']
-            self.total_assets = state['total_assets']
-            self.capital = state['capital']
-            self.position = state['position']
-            self.pnl = state['pnl']
-            self.pnl_rate = state['pnl_rate']
+            self.accounting = Accounting()
+            if 'cost_basis' not in state:
+                # 旧版本的状态没有持仓成本，按已投入的资金估算
+                self.accounting.cost_basis = max(0, state['initial_capital'] - state['capital'])
+            self.accounting.update(state)
             self.current_price = state['current_price']
-            self.grid = state['grid']
             self.symbol = state['symbol']
             
             # 恢复网格级别状态
-            self.grid_levels = {float(price): GridLevel(float(price)) for price in state['grid_levels']}
-            for price, level_data in state['grid_levels'].items():
-                self.grid_levels[float(price)].__dict__.update(level_data)
+            self.grid_levels = {}
+            for tick, level_data in levels.items():
+                level = self.grid_levels[tick] = GridLevel(tick, self.scale.to_price(tick))
+                level.update(level_data)
+            self.level_index = GridLevelIndex(self.grid_levels)
+            self.rebuild_order_index()
+            self._saved_counters = self._counters()
+            self._dirty_levels.clear()
+            self._reset_views()
+            self.publish_snapshot()
             
-            logger.info(f"策略状态已从 {filename} 加载")
+            self.log.info("策略状态已从 {filename} 加载", filename=filename)
         except FileNotFoundError:
-            logger.warning(f"未找到状态文件 {filename}，使用初始设置")
+            self.log.warning("未找到状态文件 {filename}，使用初始设置", filename=filename)
         except json.JSONDecodeError:
-            logger.error(f"无法解析状态文件 {filename}，使用初始设置")
+            self.log.error("无法解析状态文件 {filename}，使用初始设置", filename=filename)
+
+
+    def recover(self):
+        """
+        启动恢复：加载持久化的状态，再与交易所的挂单对账
+        已记录的订单按交易所的最新状态更新，交易所已经不认识的订单按已撤销处理；交易所上有、本地没有记录的挂单
+        （下单后、提交状态前崩溃）能对应到空闲档位时接管，否则撤销；不是本策略下的挂单不处理
+        """
+        self.load_strategy_state()
+        open_orders = None
+        if self.exchange.has.get('fetchOpenOrders'):
+            try:
+                open_orders = self.exchange.fetch_open_orders(self.symbol)
+            except Exception as e:
+                self.log.error("恢复时获取挂单失败: {error}", error=str(e))
+        if self.reconcile_orders(open_orders, missing_as_closed=True):
+            self.save_history_orders()
+        for order in open_orders or []:
+            if str(order['id']) not in self.order_index:
+                self._adopt_order(order)
+        for level in list(self._working_levels):
+            self._settle_level(level)
+        self.checkpoint()
+        self.log.info("恢复完成，在途订单 {open_orders} 个", open_orders=len(self.order_index))
 
+    def _adopt_order(self, order):
+        """
+        把本地没有记录的挂单挂回对应的空闲档位，找不到档位时撤单
+        只处理带本策略 clientOrderId 前缀的订单，手动下的单和其他实例的订单保持不动
+        """
+        if not self.owns_order(order):
+            self.log.info("挂单 {order_id} 不是本策略下的单，保持不动", order_id=order['id'])
+            return
+        side = order['side']
+        tick = self.scale.to_ticks(float(order['price']))
+        if side == "buy":
+            level = self.grid_levels.get(tick)
+            if level is not None and level.buy_order_status is not OrderStatus.NONE:
+                level = None
+        else:
+            # 卖单挂在买入档位上方 grid_ticks 处
+            level = self.grid_levels.get(tick - self.grid_ticks)
+            if level is not None and (level.buy_order_status is not OrderStatus.FILLED
+                                      or level.sell_order_status is not OrderStatus.NONE):
+                level = None
+        if level is None:
+            self.log.warning("挂单 {order_id} 无法对应到档位，撤单", order_id=order['id'])
+            try:
+                self.exchange.cancel_order(order['id'], self.symbol)
+            except Exception as e:
+                self.log.error("撤单失败: {error}", order_id=order['id'], error=str(e))
+            return
+        self._on_order_placed(level, side, order)
+        self._apply_order_update(level, side, order)
 
     def generate_grid(self, initial_price, grid_size, levels):
         """
@@ -194,174 +527,515 @@ class GridTradingStrategy:
         :param initial_price: 初始价格
         :param grid_size: 每档的百分比
         :param levels: 向上和向下的档位数
-        :return: 返回一个价格列表，按价格排序
-        """
-        grid = []
-        last_grid_price = initial_price
-        grid.append(last_grid_price)
-        for i in range(levels - 1):
-            grid_price = last_grid_price * (1 - grid_size)
-            last_grid_price = grid_price
-            grid.append(grid_price)
-        last_grid_price = initial_price
-        for i in range(levels - 1):
-            grid_price = last_grid_price * (1 + grid_size)
-            last_grid_price = grid_price
-            grid.append(grid_price)
-        return sorted(grid, reverse=True)
+        :return: 返回一个整数 tick 列表，按价格从高到低排序
+        """
+        return generate_grid(initial_price, grid_size, levels, self.scale)
 
     def handle_price_change(self):
         """
-        处理当前价格变化的逻辑
-        :param current_price: 当前市场价格
+        轮询模式：拉取盘口后处理当前价格变化
         """
+        if self.profiler is not None and self.profiler.capturing:
+            self.profiler.run_tick(self._handle_price_change)
+        else:
+            self._handle_price_change()
+
+    def _handle_price_change(self):
         market_depth = self.exchange.fetch_order_book(self.symbol, limit=5)
         current_price = market_depth["bids"][0][0]
+        self.market_depth = market_depth
+        self.process_tick(current_price)
+
+    def process_tick(self, current_price, reconcile=True, open_orders=None):
+        """
+        处理当前价格变化的逻辑
+        :param current_price: 当前市场价格
+        :param reconcile: 是否先向交易所同步订单状态，事件驱动模式下订单状态由推送更新
+        :param open_orders: 调用方已经批量取回的本交易对挂单，提供时不再单独请求
+        """
+        with self._tick_seconds.time():
+            self._process_tick(current_price, reconcile, open_orders)
+
+    def _process_tick(self, current_price, reconcile, open_orders):
         self.current_price = current_price
-        logger.info(f"当前价格: {current_price:.2f}, 总资产: {self.total_assets:.2f}")
+        self._tick_log.info("当前价格: {price:.2f}, 总资产: {total_assets:.2f}",
+                            price=current_price, total_assets=self.total_assets)
+
+        # 批量同步所有档位上的订单状态
+        order_changed = self.reconcile_orders(open_orders) if reconcile else False
+        self.update_pnl(current_price)
 
-        # 检查所有档位上的订单
         # 检查下方N档内没有买单时，补上买单
-        count = 5
-        order_changed = False
-        for price in self.grid:
-            level = self.grid_levels[price]
-            order_changed = self.check_order_status(level)
-            self.update_pnl(current_price)
+        # 只处理当前价格下方N档和仍有订单的档位，其余档位的状态不会变化
+        current_tick = self.scale.to_ticks(current_price)
+        window = self.level_index.below(current_tick, ACTIVE_BUY_LEVELS)
+        in_window = set(window)
+        placements = []  # 本 tick 要下的单 (档位, 方向)
+        cancels = []  # 本 tick 要撤单的档位
+        for level in sorted(in_window | self._working_levels, key=lambda level: level.tick, reverse=True):
             # 如果买单成交了，挂上卖单
-            if level.buy_order_status == "filled":
-                if level.sell_order_status == "未下单":
-                    self.place_sell_order(level)
+            if level.buy_order_status is OrderStatus.FILLED:
+                if level.sell_order_status is OrderStatus.NONE:
+                    placements.append((level, "sell"))
 
             # 如果当前价格小于网格价格，则检查买单
-            if price < current_price:
-                if count > 0:  # N档以内
-                    if level.buy_order_status == "未下单":  # 如果未下单，则挂买单
-                        self.place_buy_order(level)
-                elif level.buy_order_status == "open":    # 如果超出当前价N档以上的买单未成交，则撤单并初始化该档位
-                    self.cancel_order(level)
-                count -= 1
+            if level.tick < current_tick:
+                if level in in_window:  # N档以内
+                    if level.buy_order_status is OrderStatus.NONE:  # 如果未下单，则挂买单
+                        placements.append((level, "buy"))
+                elif level.buy_order_status is OrderStatus.OPEN:    # 如果超出当前价N档以上的买单未成交，则撤单并初始化该档位
+                    cancels.append(level)
+        self.submit_orders(placements, cancels)
         if order_changed:
             self.save_history_orders()
-        self.save_strategy_state()
+        self.publish_snapshot()
+        self.checkpoint()
+
+    def _order_request(self, level, side):
+        """
+        返回下单的数量和价格，价格取整到 tick，数量向下取整到最小下单单位
+        """
+        if side == "buy":
+            price = level.price
+        else:
+            price = self.scale.to_price(level.tick + self.grid_ticks)
+        return self.scale.quantize_amount(self.position_amount / price), price
+
+    def _client_order_id(self, level, side):
+        """
+        生成带本策略前缀的 clientOrderId，长度不超过 36 个字符
+        """
+        return f"{self.client_order_prefix}-{side[0]}{level.tick}-{uuid.uuid4().hex[:8]}"
+
+    def owns_order(self, order):
+        """
+        订单是否由本策略下单
+        """
+        return str(order.get('clientOrderId') or "").startswith(f"{self.client_order_prefix}-")
+
+    def _send_order(self, level, side):
+        amount, price = self._order_request(level, side)
+        params = {"clientOrderId": self._client_order_id(level, side)}
+        if side == "buy":
+            return self.exchange.create_limit_buy_order(self.symbol, amount, price, params=params)
+        return self.exchange.create_limit_sell_order(self.symbol, amount, price, params=params)
+
+    def _on_order_placed(self, level, side, order):
+        """
+        把交易所返回的新订单写回档位
+        """
+        self.count_transition(side, getattr(level, f"{side}_order_status"), OrderStatus.PENDING)
+        setattr(level, f"{side}_order_status", OrderStatus.PENDING)
+        setattr(level, f"{side}_order", order['id'])
+        self.order_index[str(order['id'])] = (level, side)
+        self._working_levels.add(level)
+        self.mark_dirty(level)
+        self.log.info("在 {price} 价格处下{side_name}单，金额为 {position_amount} USDT, 订单状态: {status}, 订单ID: {order_id}",
+                      price=order['price'], side=side, side_name=SIDE_NAMES[side], position_amount=self.position_amount,
+                      status=OrderStatus.PENDING.value, order_id=order['id'])
 
     def place_buy_order(self, level):
         """
         使用ccxt下买单
         """
         try:
-            order = self.exchange.create_limit_buy_order(
-                self.symbol,
-                self.position_amount / level.price,
-                level.price
-            )
-            level.buy_order_status = "pending"
-            level.buy_order = order['id']
-            logger.info(f"在 {level.price} 价格处下买单，金额为 {self.position_amount} USDT, 订单状态: {level.buy_order_status}, 订单ID: {level.buy_order}")
+            self._on_order_placed(level, "buy", self._send_order(level, "buy"))
         except Exception as e:
-            logger.error(f"下买单失败: {str(e)}")
+            self.log.error("下买单失败: {error}", side="buy", price=level.price, error=str(e), rate_limit="order_error")
 
     def place_sell_order(self, level):
         """
         使用ccxt下卖单
         """
-        sell_price = level.price + self.grid_price
         try:
-            order = self.exchange.create_limit_sell_order(
-                self.symbol,
-                self.position_amount / sell_price,
-                format_price(sell_price)
-            )
-            level.sell_order_status = "pending"
-            level.sell_order = order['id']
-            logger.info(f"在 {sell_price} 价格处下卖单，金额为 {self.position_amount} USDT, 订单状态: {level.sell_order_status}, 订单ID: {level.sell_order}")
+            self._on_order_placed(level, "sell", self._send_order(level, "sell"))
         except Exception as e:
-            logger.error(f"下卖单失败: {str(e)}")
+            self.log.error("下卖单失败: {error}", side="sell", price=level.price, error=str(e), rate_limit="order_error")
+
+    def _cancel_targets(self, level):
+        """
+        返回档位上需要撤销的 (方向, 订单ID)
+        """
+        return [(side, order_id) for side, order_id in (("buy", level.buy_order), ("sell", level.sell_order)) if order_id]
+
+    def _on_order_cancelled(self, level, side):
+        self.log.info("撤销在 {price} 价格处的{side_name}单", price=level.price, side=side, side_name=SIDE_NAMES[side])
+        self.count_transition(side, getattr(level, f"{side}_order_status"), OrderStatus.CLOSING)
+        setattr(level, f"{side}_order_status", OrderStatus.CLOSING)
+        self.mark_dirty(level)
 
     def cancel_order(self, level):
         """
         使用ccxt撤销订单
         """
         try:
-            if level.buy_order:
-                self.exchange.cancel_order(level.buy_order, self.symbol)
-                logger.info(f"撤销在 {level.price} 价格处的买单")
-                level.buy_order_status = "closing"
-            if level.sell_order:
-                self.exchange.cancel_order(level.sell_order, self.symbol)
-                logger.info(f"撤销在 {level.price} 价格处的卖单")
-                level.sell_order_status = "closing"
+            for side, order_id in self._cancel_targets(level):
+                self.exchange.cancel_order(order_id, self.symbol)
+                self._on_order_cancelled(level, side)
         except Exception as e:
-            logger.error(f"撤单失败: {str(e)}")
+            self.log.error("撤单失败: {error}", price=level.price, error=str(e), rate_limit="cancel_error")
+
+    def _order_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.order_workers, thread_name_prefix="order")
+        return self._executor
+
+    def submit_orders(self, placements, cancels):
+        """
+        一次性提交本 tick 收集到的下单和撤单
+        交易所支持批量接口时用 create_orders / cancel_orders，否则通过有界线程池并发发送，
+        整体耗时接近一次往返而不是N次；交易所的返回结果在调用线程里逐个写回档位
+        :param placements: [(档位, 方向)]
+        :param cancels: [档位]
+        """
+        if len(placements) == 1:
+            level, side = placements[0]
+            if side == "buy":
+                self.place_buy_order(level)
+            else:
+                self.place_sell_order(level)
+        elif placements:
+            if self._batch_supported('createOrders'):
+                # 批量接口不可用时返回没有发出的订单，本 tick 改为逐个发送
+                placements = self._create_orders_batch(placements)
+            futures = [(level, side, self._order_executor().submit(self._send_order, level, side))
+                       for level, side in placements]
+            for level, side, future in futures:
+                try:
+                    self._on_order_placed(level, side, future.result())
+                except Exception as e:
+                    self.log.error("下{side_name}单失败: {error}", side=side, side_name=SIDE_NAMES[side],
+                                   price=level.price, error=str(e), rate_limit="order_error")
+
+        targets = [(level, side, order_id) for level in cancels for side, order_id in self._cancel_targets(level)]
+        if len(targets) == 1:
+            self.cancel_order(cancels[0])
+            return
+        if targets and self._batch_supported('cancelOrders'):
+            try:
+                results = self.exchange.cancel_orders([order_id for _, _, order_id in targets], self.symbol)
+            except Exception as e:
+                if not self._batch_unsupported('cancelOrders', e):
+                    self.log.error("批量撤单失败: {error}", orders=len(targets), error=str(e), rate_limit="cancel_error")
+                    return
+            else:
+                if not isinstance(results, list) or len(results) != len(targets):
+                    # 交易所没有逐个返回结果，按全部撤销处理，实际状态由下次对账确认
+                    results = [{"id": order_id} for _, _, order_id in targets]
+                for (level, side, order_id), result in zip(targets, results):
+                    if not result or result.get('id') is None or result.get('status') == "rejected":
+                        # 撤单失败的订单仍在交易所挂着，保持原状态和索引，下个 tick 重新撤单
+                        self.log.error("撤单失败: {order_id} {error}", order_id=order_id, error=(result or {}).get('info'),
+                                       rate_limit="cancel_error")
+                        continue
+                    self._on_order_cancelled(level, side)
+                return
+        futures = [(level, side, order_id, self._order_executor().submit(self.exchange.cancel_order, order_id, self.symbol))
+                   for level, side, order_id in targets]
+        for level, side, order_id, future in futures:
+            try:
+                future.result()
+                self._on_order_cancelled(level, side)
+            except Exception as e:
+                self.log.error("撤单失败: {error}", order_id=order_id, error=str(e), rate_limit="cancel_error")
+
+    def _batch_supported(self, method):
+        return self.exchange.has.get(method) and method not in self._unsupported_batches
+
+    def _batch_unsupported(self, method, error):
+        """
+        批量接口返回 BATCH_UNSUPPORTED_ERRORS 时记住该接口不可用，之后的 tick 直接逐个发送
+        :return: 是否属于这类错误
+        """
+        if type(error).__name__ not in BATCH_UNSUPPORTED_ERRORS:
+            return False
+        if method not in self._unsupported_batches:
+            self._unsupported_batches.add(method)
+            self.log.warning("交易对不支持批量接口 {method}，改为逐个并发发送: {error}", method=method, error=str(error))
+        return True
+
+    def _create_orders_batch(self, placements):
+        """
+        通过 create_orders 批量下单，每批最多 BATCH_ORDER_LIMIT 个，多批并发发送
+        :return: 因交易对不支持批量接口而没有发出的订单 [(档位, 方向)]
+        """
+        batches = [placements[i:i + BATCH_ORDER_LIMIT] for i in range(0, len(placements), BATCH_ORDER_LIMIT)]
+
+        def send(batch):
+            requests = []
+            for level, side in batch:
+                amount, price = self._order_request(level, side)
+                requests.append({"symbol": self.symbol, "type": "limit", "side": side, "amount": amount, "price": price,
+                                 "params": {"clientOrderId": self._client_order_id(level, side)}})
+            return self.exchange.create_orders(requests)
+
+        futures = [(batch, self._order_executor().submit(send, batch)) for batch in batches]
+        unsent = []
+        for batch, future in futures:
+            try:
+                orders = future.result()
+            except Exception as e:
+                if self._batch_unsupported('createOrders', e):
+                    unsent.extend(batch)
+                else:
+                    self.log.error("批量下单失败: {error}", orders=len(batch), error=str(e), rate_limit="order_error")
+                continue
+            for (level, side), order in zip(batch, orders):
+                if order.get('id') is None:
+                    self.log.error("下{side_name}单失败: {error}", side=side, side_name=SIDE_NAMES[side],
+                                   price=level.price, error=order.get('info'), rate_limit="order_error")
+                    continue
+                self._on_order_placed(level, side, order)
+        return unsent
+
+    def rebuild_order_index(self):
+        """
+        根据各档位的订单ID重建订单索引（只收录仍可能变化的订单）和在途档位集合
+        """
+        self.order_index = {}
+        self._working_levels = set()
+        for level in self.grid_levels.values():
+            if level.buy_order_status is not OrderStatus.NONE or level.sell_order_status is not OrderStatus.NONE:
+                self._working_levels.add(level)
+            if level.buy_order and level.buy_order_status in LIVE_ORDER_STATUSES:
+                self.order_index[str(level.buy_order)] = (level, "buy")
+            if level.sell_order and level.sell_order_status in LIVE_ORDER_STATUSES:
+                self.order_index[str(level.sell_order)] = (level, "sell")
+
+    def reconcile_orders(self, open_orders=None, missing_as_closed=False):
+        """
+        批量对账：一次请求取回交易对的全部挂单，通过订单ID索引匹配到档位，
+        只有不在挂单列表中的订单（已成交或已撤销）才逐个查询
+        :param open_orders: 已经取回的挂单列表，为 None 时向交易所请求
+        :param missing_as_closed: 交易所返回订单不存在时按已撤销处理并释放档位（恢复时使用），
+                                  否则保持原状态等下次对账
+        :return: 是否有订单成交
+        """
+        if not self.order_index:
+            return False
+        if open_orders is None:
+            if not self.exchange.has.get('fetchOpenOrders'):
+                # 交易所不支持批量查询，退回逐档查询
+                order_changed = False
+                for level in {level for level, _ in self.order_index.values()}:
+                    order_changed = self.check_order_status(level) or order_changed
+                return order_changed
+            try:
+                open_orders = self.exchange.fetch_open_orders(self.symbol)
+            except Exception as e:
+                self.log.error("批量获取挂单失败: {error}", error=str(e), rate_limit="reconcile_error")
+                return False
+
+        fetched = {str(order['id']): order for order in open_orders}
+        updates = []
+        for order_id, (level, side) in list(self.order_index.items()):
+            order = fetched.get(order_id)
+            if order is None:
+                try:
+                    order = self.exchange.fetch_order(self._level_order_id(level, side), self.symbol)
+                except Exception as e:
+                    if not (missing_as_closed and type(e).__name__ in ORDER_NOT_FOUND_ERRORS):
+                        self.log.error("检查订单状态失败: {error}", order_id=order_id, error=str(e),
+                                       rate_limit="reconcile_error")
+                        continue
+                    # 交易所已经没有这个订单，成交只按已记账的数量计算
+                    self.log.warning("交易所找不到订单 {order_id}，按已撤销处理", order_id=order_id)
+                    order = {"id": order_id, "status": OrderStatus.CLOSED.value,
+                             "filled": getattr(level, f"{side}_filled")}
+            updates.append((level, side, order))
+        return self._apply_order_updates(updates)
+
+    def apply_order_updates(self, orders):
+        """
+        应用交易所推送的订单更新（例如 watch_orders 的结果）
+        :param orders: 订单列表，不属于本策略的订单会被忽略
+        :return: 是否有档位的订单状态被更新
+        """
+        updates = []
+        for order in orders:
+            entry = self.order_index.get(str(order['id']))
+            if entry is not None:
+                level, side = entry
+                updates.append((level, side, order))
+        if self._apply_order_updates(updates):
+            self.save_history_orders()
+        return bool(updates)
+
+    def _apply_order_updates(self, updates):
+        """
+        将一批 (档位, 方向, 订单) 写回档位，最后统一结算受影响的档位
+        :return: 是否有订单成交
+        """
+        order_changed = False
+        touched_levels = set()
+        for level, side, order in updates:
+            order_changed = self._apply_order_update(level, side, order) or order_changed
+            touched_levels.add(level)
+        for level in touched_levels:
+            self._settle_level(level)
+        return order_changed
+
+    def _level_order_id(self, level, side):
+        """
+        返回档位上指定方向的原始订单ID
+        """
+        return level.buy_order if side == "buy" else level.sell_order
+
+    def _apply_order_update(self, level, side, order):
+        """
+        将交易所返回的订单状态写回档位，并按订单累计成交数量的增量记账
+        部分成交的挂单和部分成交后被撤销的订单也会记账，同一笔成交只记一次
+        :return: 订单是否有新的成交
+        """
+        previous_status = getattr(level, f"{side}_order_status")
+        try:
+            status = OrderStatus(order['status'])
+        except ValueError:
+            # 无法识别的状态（例如 None 或交易所特有的状态）保持原状态，等下次对账
+            self.log.warning("订单 {order_id} 的状态 {status!r} 无法识别，保持 {previous}",
+                             order_id=order['id'], status=order['status'], previous=previous_status.value,
+                             rate_limit="unknown_status")
+            return False
+        setattr(level, f"{side}_order_status", status)
+        if status != previous_status:
+            self.mark_dirty(level)
+            self.count_transition(side, previous_status, status)
+        if status not in LIVE_ORDER_STATUSES:
+            self.order_index.pop(str(order['id']), None)
+        just_filled = status is OrderStatus.FILLED and previous_status is not OrderStatus.FILLED
+        if just_filled and order.get('lastTradeTimestamp'):
+            self._fill_lag_seconds.observe(max(0, self._now_ms() - order['lastTradeTimestamp']) / 1000)
+
+        amount, price, fee = self._fill_of(order, status)
+        booked = getattr(level, f"{side}_filled")
+        booked_fee = getattr(level, f"{side}_fee")
+        filled = amount > booked + 1e-12
+        if filled:
+            # 只记上次对账之后新增的成交：数量、金额和手续费都按累计值求差
+            delta_amount = amount - booked
+            delta_value = amount * price - booked * getattr(level, f"{side}_executed_price")
+            delta_fee = fee - booked_fee
+            self.accounting.on_fill(side, delta_amount, delta_value / delta_amount, delta_fee)
+            setattr(level, f"{side}_executed_price", price)
+            setattr(level, f"{side}_filled", amount)
+            setattr(level, f"{side}_fee", fee)
+            if side == "buy":
+                level.amount = amount
+                level.buy_cost = amount * price + fee
+            else:
+                # 卖出数量按卖价计算，可能少于买入数量，只扣除卖出部分对应的买入成本
+                cost = level.buy_cost * min(1, delta_amount / level.amount) if level.amount else 0
+                level.profit += delta_value - delta_fee - cost
+            self.mark_dirty(level)
+        if just_filled and side == "sell":
+            level.round_trips += 1
+            self.accounting.round_trips += 1
+        if (just_filled or status is OrderStatus.CLOSED) and (filled or just_filled):
+            self.history_orders.append(order)
+        return filled or just_filled
+
+    def _fill_of(self, order, status=None):
+        """
+        返回订单的累计成交数量、成交均价和折算成计价货币的累计手续费
+        手续费以基础货币收取时，实际到账的数量相应减少
+        """
+        filled = order.get('filled')
+        if filled is not None:
+            amount = float(filled)
+        else:
+            # 交易所没有返回成交数量时，只有已成交的订单按下单数量计算
+            amount = float(order['amount']) if status is OrderStatus.FILLED else 0.0
+        price = float(order.get('average') or order.get('price') or 0)
+        fee = order.get('fee') or {}
+        fee_cost = float(fee.get('cost') or 0)
+        if fee_cost and fee.get('currency') == self.symbol.split("/")[0]:
+            if order['side'] == "buy":
+                amount -= fee_cost
+            fee_cost *= price
+        return amount, price, fee_cost
+
+    def count_transition(self, side, previous_status, status):
+        """
+        统计订单状态迁移次数
+        """
+        key = (side, previous_status, status)
+        counter = self._transitions.get(key)
+        if counter is None:
+            counter = self._transitions[key] = self.metrics.counter(
+                "order_transitions_total", "订单状态迁移次数", symbol=self.symbol, side=side,
+                previous=previous_status.name.lower(), status=status.name.lower())
+        counter.inc()
+
+    def _now_ms(self):
+        milliseconds = getattr(self.exchange, "milliseconds", None)
+        return milliseconds() if milliseconds else int(time.time() * 1000)
+
+    def _settle_level(self, level):
+        """
+        买单被撤销或一轮买卖都成交后，重置该档位
+        """
+        buy_status = level.buy_order_status
+        if buy_status is OrderStatus.CLOSED or (buy_status is OrderStatus.FILLED and level.sell_order_status is OrderStatus.FILLED):
+            if buy_status is OrderStatus.CLOSED and level.sell_order_status is not OrderStatus.NONE:
+                self.log.warning("在 {price} 价格处的买单已撤单，但卖单状态不对:{status}",
+                                 price=level.price, status=level.sell_order_status.value)
+            if level.sell_order_status is OrderStatus.FILLED:
+                level.save_completed_trade(self.trade_journal)
+            for order_id in (level.buy_order, level.sell_order):
+                if order_id:
+                    self.order_index.pop(str(order_id), None)
+            level.reset()
+            self._working_levels.discard(level)
+            self.mark_dirty(level)
 
     def check_order_status(self, level):
         """
-        使用ccxt检查订单状态
+        使用ccxt逐个检查档位上的订单状态
         """ 
+        order_changed = False
         try:
-            order_changed = False
             # 获取订单状态
             if level.buy_order:
                 order = self.exchange.fetch_order(level.buy_order, self.symbol)
-                level.buy_order_status = order['status']
-                if level.buy_order_status == 'filled':
-                    self.capital -= self.position_amount
-                    self.position += self.position_amount / level.price
-                    self.history_orders.append(order)
-                    order_changed = True
+                order_changed = self._apply_order_update(level, "buy", order) or order_changed
             if level.sell_order:
                 order = self.exchange.fetch_order(level.sell_order, self.symbol)
-                level.sell_order_status = order['status']
-                if level.sell_order_status == 'filled':
-                    self.capital += self.position_amount
-                    self.position -= self.position_amount / level.price
-                    self.history_orders.append(order)
-                    order_changed = True
+                order_changed = self._apply_order_update(level, "sell", order) or order_changed
             if order_changed:
                 self.save_history_orders()
             # 处理撤单
-            if level.buy_order_status == 'closed' or (level.buy_order_status == 'filled' and level.sell_order_status == 'filled'):
-                if level.sell_order_status != '未下单':
-                    logger.warning(f"在 {level.price} 价格处的买单已撤单，但卖单状态不对:{level.sell_order_status}")
-                level.reset()
+            self._settle_level(level)
         except Exception as e:
-            logger.error(f"检查订单状态失败: {str(e)}")
+            self.log.error("检查订单状态失败: {error}", price=level.price, error=str(e), rate_limit="reconcile_error")
         return order_changed
 
     def update_pnl(self, price):
         """
-        更新盈亏
+        按最新价格重估持仓，每个 tick 调用一次
         """
-        self.total_assets = self.capital + self.position * price
-        self.pnl = self.total_assets - self.initial_capital
-        self.pnl_rate = self.pnl / self.initial_capital
+        self.accounting.mark(price)
 
     
     def get_summary(self):
         """
-        获取策略的总结信息
-        :return: 返回一个包含总资产、资金、持仓数量和盈亏的摘要
+        获取策略的总结信息，直接读取增量维护的账户，不遍历档位
+        :return: 返回一个包含总资产、资金、持仓数量、盈亏（已实现/未实现）、手续费和持仓均价的摘要
         """
-        total_assets = self.total_assets
-        capital = self.capital
-        position = self.position
-        pnl = self.pnl
-        return {
-            "total_assets": total_assets,
-            "capital": capital,
-            "position": position,
-            "pnl": pnl
-        }
+        return self.accounting.summary()
+
+    @property
+    def history_file(self):
+        """
+        历史订单文件，每行一个订单
+        """
+        return f"history_orders_{self.exchange.name}_{self.symbol.replace('/', '')}.jsonl"
 
     def save_history_orders(self):
         """
-        将history_orders保存到文件中
+        将新增的历史订单刷到磁盘，订单在成交时已经追加写入文件
         """
-        filename = f"history_orders_{self.exchange.name}_{self.symbol}.json"
-        
         try:
-            with open(filename, 'w') as f:
-                json.dump(self.history_orders, f, indent=4, default=str)
-            logger.info(f"历史订单已保存到文件: {filename}")
+            self.history_orders.flush(sync=True)
+            self.log.debug("历史订单已保存到文件: {filename}", filename=self.history_orders.filename)
         except Exception as e:
-            logger.error(f"保存历史订单到文件时出错: {str(e)}")
\ No newline at end of file
+            self.log.error("保存历史订单到文件时出错: {error}", error=str(e), rate_limit="history_error")
\ No newline at end of file
@@ -0,0 +1,277 @@
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+from loguru import logger
+from cryptogrid.markets import MARKET_CACHE_TTL
+from cryptogrid.metrics import REGISTRY, MetricsRegistry
+
+# 崩溃的工作进程重启前等待的时间（秒），连续崩溃时翻倍，最多 MAX_RESTART_DELAY
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 30.0
+# 重启后的工作进程上报状态并持续运行这么久（秒）才算恢复稳定，之后再崩溃从 RESTART_DELAY 重新计算等待时间
+STABLE_PERIOD = 60.0
+# 工作进程接受的命令
+COMMANDS = ("status", "save", "stop")
+
+
+def shard_symbols(symbols, shards):
+    """
+    把交易对轮流分配到 shards 个分片，交易对顺序不变时分配结果也不变
+    :return: 每个分片一个交易对列表，不含空分片
+    """
+    groups = [list(symbols[i::shards]) for i in range(max(1, shards))]
+    return [group for group in groups if group]
+
+
+def _worker_status(shard, runner, ticks):
+    return {
+        "shard": shard,
+        "pid": os.getpid(),
+        "ticks": ticks,
+        "time": time.time(),
+        "summaries": {symbol: strategy.get_summary() for symbol, strategy in runner.strategies.items()},
+        "metrics": REGISTRY.snapshot()
+    }
+
+
+def worker_main(shard, symbols, params, config, conn):
+    """
+    工作进程入口：用 PortfolioRunner 运行一个分片的交易对
+    启动时从状态库恢复已有的交易对；每个 tick 之后向主进程上报状态和指标，
+    tick 之间等待主进程的命令
+    :param config: exchange / exchange_config / state_db / weight_limit / max_requests_per_second /
+                   tick_interval / log_file / market_cache_ttl
+    :param conn: 与主进程之间的双向管道，接收命令、发送状态
+    """
+    # 在子进程里才导入策略相关模块，主进程只负责调度
+    from cryptogrid.logger_config import setup_logger, shutdown_logger
+    from cryptogrid.market_data import create_exchange
+    from cryptogrid.markets import MarketCache, load_markets
+    from cryptogrid.portfolio import PortfolioRunner
+    from cryptogrid.scheduler import RequestScheduler
+    from cryptogrid.state_store import SQLiteStateStore
+
+    # Ctrl+C 只由主进程处理，工作进程收到 stop 命令后保存状态再退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if config.get("log_file"):
+        setup_logger(config["log_file"].format(shard=shard))
+    exchange = RequestScheduler(create_exchange(config["exchange"], **config.get("exchange_config", {})),
+                                weight_limit=config["weight_limit"])
+    # 与单进程模式相同，先加载市场精度再生成网格，否则价格和数量按默认精度取整
+    load_markets(exchange, MarketCache(ttl=config["market_cache_ttl"]))
+    store = SQLiteStateStore(config["state_db"])
+    runner = PortfolioRunner(exchange, max_requests_per_second=config["max_requests_per_second"],
+                             tick_interval=config["tick_interval"], store=store)
+    try:
+        for symbol in symbols:
+            runner.add_strategy(symbol, params)
+        ticks = 0
+        running = True
+        while running:
+            started = time.monotonic()
+            requests = runner.tick()
+            ticks += 1
+            conn.send(_worker_status(shard, runner, ticks))
+            interval = max(runner.tick_interval, requests / runner.max_requests_per_second)
+            deadline = started + interval
+            while running and conn.poll(max(0.0, deadline - time.monotonic())):
+                command = conn.recv()
+                if command == "stop":
+                    running = False
+                elif command == "save":
+                    for strategy in runner.strategies.values():
+                        strategy.save_strategy_state()
+                elif command == "status":
+                    conn.send(_worker_status(shard, runner, ticks))
+                else:
+                    logger.warning("未知命令: {command}", shard=shard, command=command)
+    finally:
+        for strategy in runner.strategies.values():
+            strategy.save_strategy_state()
+        store.close()
+        if config.get("log_file"):
+            shutdown_logger()
+
+
+class Supervisor:
+    """
+    多进程运行器：按 CPU 数把交易对分片到多个工作进程，每个进程用 PortfolioRunner 运行自己的分片
+    主进程通过每个工作进程独立的管道下发命令、接收状态和指标（一个进程崩溃不会影响其他进程的通信），
+    工作进程崩溃后从状态库恢复重启
+    """
+
+    def __init__(self, symbols, params, workers=None, exchange="mock", exchange_config=None,
+                 state_db="grid_state.db", weight_limit=1200, max_requests_per_second=10,
+                 tick_interval=1.0, log_file=None, restart_delay=RESTART_DELAY, stable_period=STABLE_PERIOD,
+                 market_cache_ttl=MARKET_CACHE_TTL, context=None):
+        """
+        :param symbols: 交易对列表
+        :param params: set_strategy_params 所需的参数（不含 initial_price）
+        :param workers: 工作进程数，默认使用全部CPU，不超过交易对数
+        :param exchange: 交易所ID，见 create_exchange
+        :param exchange_config: 传给 create_exchange 的配置
+        :param state_db: 所有工作进程共用的 SQLite 状态库
+        :param weight_limit: 所有工作进程合计的每分钟请求权重，平均分给各进程
+        :param max_requests_per_second: 所有工作进程合计的请求速率上限，平均分给各进程
+        :param log_file: 工作进程的日志文件，{shard} 替换为分片编号，None 表示使用默认输出
+        :param stable_period: 重启后稳定运行多久（秒）清零连续重启次数
+        :param market_cache_ttl: 工作进程共用的市场元数据缓存有效期（秒）
+        :param context: multiprocessing 上下文，默认 spawn
+        """
+        workers = workers or os.cpu_count() or 1
+        self.shards = shard_symbols(list(symbols), min(workers, len(symbols)))
+        self.params = params
+        per_worker = max(1, len(self.shards))
+        self.config = {
+            "exchange": exchange,
+            "exchange_config": exchange_config or {},
+            "state_db": state_db,
+            "weight_limit": max(1, weight_limit // per_worker),
+            "max_requests_per_second": max_requests_per_second / per_worker,
+            "tick_interval": tick_interval,
+            "log_file": log_file,
+            "market_cache_ttl": market_cache_ttl
+        }
+        self.restart_delay = restart_delay
+        self.stable_period = stable_period
+        self.context = context or multiprocessing.get_context("spawn")
+        self.processes = {}  # 分片编号 -> Process
+        self.connections = {}  # 分片编号 -> 管道
+        self.status = {}  # 分片编号 -> 最近一次上报的状态
+        self.restarts = {shard: 0 for shard in range(len(self.shards))}  # 分片编号 -> 连续重启次数
+        self._worker_metrics = {}  # 分片编号 -> 最近一次上报的指标
+        self._restart_at = {}  # 分片编号 -> 允许重启的时间
+        self._spawned_at = {}  # 分片编号 -> 最近一次启动的时间
+        self._stopping = False
+
+    def start(self):
+        for shard in range(len(self.shards)):
+            self._spawn(shard)
+        logger.info("已启动 {workers} 个工作进程，共 {symbols} 个交易对", workers=len(self.shards),
+                    symbols=sum(map(len, self.shards)))
+
+    def _spawn(self, shard):
+        conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=worker_main, name=f"grid-worker-{shard}", daemon=True,
+            args=(shard, self.shards[shard], self.params, self.config, child_conn))
+        process.start()
+        child_conn.close()
+        old_conn = self.connections.get(shard)
+        if old_conn is not None:
+            old_conn.close()
+        self.processes[shard] = process
+        self.connections[shard] = conn
+        self._spawned_at[shard] = time.monotonic()
+
+    def command(self, name, shard=None):
+        """
+        向一个或全部工作进程发送命令
+        :param name: status / save / stop
+        :param shard: 分片编号，None 表示全部
+        """
+        if name not in COMMANDS:
+            raise ValueError(f"未知命令: {name}")
+        shards = list(self.connections) if shard is None else [shard]
+        for i in shards:
+            if self.processes[i].is_alive():
+                self.connections[i].send(name)
+
+    def poll(self, timeout=0.1):
+        """
+        接收工作进程上报的状态，并重启崩溃的工作进程
+        :return: 本次收到的状态条数
+        """
+        received = 0
+        for conn in wait([conn for conn in self.connections.values() if not conn.closed], timeout):
+            try:
+                while conn.poll():
+                    message = conn.recv()
+                    self._worker_metrics[message["shard"]] = message.pop("metrics")
+                    self.status[message["shard"]] = message
+                    received += 1
+            except (EOFError, OSError):
+                # 工作进程已退出，由 _check_workers 重启
+                conn.close()
+        self._check_workers()
+        return received
+
+    def _check_workers(self):
+        if self._stopping:
+            return
+        now = time.monotonic()
+        for shard, process in list(self.processes.items()):
+            if process.is_alive():
+                # 重启后的进程已经上报过状态并稳定运行，之后的崩溃不再沿用之前的退避时间
+                if (self.restarts[shard] and now - self._spawned_at[shard] >= self.stable_period
+                        and self.status.get(shard, {}).get("pid") == process.pid):
+                    logger.info("工作进程 {shard} 已稳定运行，清零重启次数", shard=shard)
+                    self.restarts[shard] = 0
+                continue
+            restart_at = self._restart_at.get(shard)
+            if restart_at is None:
+                delay = min(self.restart_delay * 2 ** self.restarts[shard], MAX_RESTART_DELAY)
+                logger.error("工作进程 {shard} 已退出（退出码 {exitcode}），{delay:.1f} 秒后重启",
+                             shard=shard, exitcode=process.exitcode, delay=delay)
+                self._restart_at[shard] = now + delay
+            elif now >= restart_at:
+                del self._restart_at[shard]
+                self.restarts[shard] += 1
+                self._spawn(shard)
+
+    def metrics(self):
+        """
+        返回汇总所有工作进程最近一次上报的指标的注册表
+        """
+        registry = MetricsRegistry()
+        for snapshot in list(self._worker_metrics.values()):
+            registry.merge(snapshot)
+        return registry
+
+    def render(self):
+        """
+        以 Prometheus 文本格式输出汇总指标，可以直接交给 MetricsServer
+        """
+        return self.metrics().render()
+
+    def summaries(self):
+        """
+        返回所有交易对最近一次上报的摘要
+        """
+        return {symbol: summary for status in list(self.status.values())
+                for symbol, summary in status["summaries"].items()}
+
+    def run(self, stop_event, poll_interval=0.5):
+        """
+        持续接收状态并守护工作进程，直到 stop_event 被设置
+        """
+        self.start()
+        try:
+            while not stop_event.is_set():
+                self.poll(poll_interval)
+        finally:
+            self.stop()
+
+    def stop(self, timeout=10.0):
+        """
+        通知所有工作进程保存状态后退出，超时未退出的强制结束
+        """
+        self._stopping = True
+        for shard, process in self.processes.items():
+            if process.is_alive():
+                try:
+                    self.connections[shard].send("stop")
+                except OSError:
+                    pass
+        deadline = time.monotonic() + timeout
+        for process in self.processes.values():
+            while process.is_alive() and time.monotonic() < deadline:
+                # 继续接收状态，避免工作进程阻塞在写满的管道上
+                self.poll(0.05)
+                process.join(0.05)
+            if process.is_alive():
+                logger.warning("工作进程 {name} 未按时退出，强制结束", name=process.name)
+                process.terminate()
+                process.join()
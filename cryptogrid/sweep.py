@@ -0,0 +1,115 @@
+import argparse
+import csv
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from loguru import logger
+from cryptogrid.backtest import load_prices, run_backtest
+
+# 结果表中的列
+RESULT_FIELDS = ["grid_size", "grid_count", "position_amount", "total_assets", "capital", "position",
+                 "pnl", "pnl_rate", "max_drawdown", "buy_count", "sell_count"]
+
+# 子进程中通过内存映射共享的价格序列
+_prices = None
+
+
+def _init_worker(prices_file):
+    global _prices
+    _prices = np.load(prices_file, mmap_mode="r")
+
+
+def _run_one(params, initial_capital):
+    result = run_backtest(_prices, initial_capital=initial_capital, **params)
+    equity = result["equity"]
+    peak = np.maximum.accumulate(equity)
+    row = dict(params)
+    row.update({key: result[key] for key in RESULT_FIELDS if key in result})
+    row["max_drawdown"] = float(np.max((peak - equity) / peak)) if len(equity) else 0.0
+    return row
+
+
+def expand_param_grid(param_grid):
+    """
+    展开参数网格
+    :param param_grid: {"grid_size": [...], "grid_count": [...], "position_amount": [...]}
+    :return: 每组参数一个字典
+    """
+    keys = list(param_grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(param_grid[key] for key in keys))]
+
+
+def run_sweep(prices, param_grid, initial_capital=10000, workers=None,
+              output="sweep_results.csv", sort_by="pnl"):
+    """
+    在进程池上并行回测所有参数组合，结果按 sort_by 从高到低排序
+    价格序列写成 .npy 后由各子进程内存映射读取，不会序列化给每个任务
+    :param prices: 价格数组或价格文件路径（.npy 文件直接映射，不再复制）
+    :param param_grid: 参数网格
+    :param initial_capital: 初始资金
+    :param workers: 进程数，默认使用全部CPU
+    :param output: 结果CSV路径，None 表示不写文件
+    :param sort_by: 排序字段
+    :return: 排好序的结果列表
+    """
+    combos = expand_param_grid(param_grid)
+    workers = workers or os.cpu_count()
+    logger.info("参数扫描: {combos} 组参数, {workers} 个进程", combos=len(combos), workers=workers)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if isinstance(prices, str) and prices.endswith(".npy"):
+            prices_file = prices
+        else:
+            if isinstance(prices, str):
+                prices = load_prices(prices)
+            prices_file = os.path.join(tmp_dir, "prices.npy")
+            np.save(prices_file, np.asarray(prices, dtype=np.float64))
+
+        chunksize = max(1, len(combos) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(prices_file,)) as pool:
+            rows = list(pool.map(_run_one, combos, itertools.repeat(initial_capital), chunksize=chunksize))
+
+    rows.sort(key=lambda row: row[sort_by], reverse=True)
+    if output:
+        with open(output, "w", newline="", encoding="utf-8") as f:
+            # 参数网格里可以有 RESULT_FIELDS 之外的参数（例如 fee_rate），也写成列
+            fieldnames = ["rank"] + [key for key in param_grid if key not in RESULT_FIELDS] + RESULT_FIELDS
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for rank, row in enumerate(rows, 1):
+                writer.writerow({"rank": rank, **row})
+        logger.info("参数扫描结果已保存到 {output}", output=output)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="网格参数并行扫描")
+    parser.add_argument("prices", help="价格文件（.npy/.csv/.parquet）")
+    parser.add_argument("--grid-size", type=float, nargs="+", required=True)
+    parser.add_argument("--grid-count", type=int, nargs="+", required=True)
+    parser.add_argument("--position-amount", type=float, nargs="+", required=True)
+    parser.add_argument("--initial-capital", type=float, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="sweep_results.csv")
+    parser.add_argument("--sort-by", default="pnl")
+    args = parser.parse_args()
+
+    rows = run_sweep(
+        args.prices,
+        {"grid_size": args.grid_size, "grid_count": args.grid_count, "position_amount": args.position_amount},
+        initial_capital=args.initial_capital,
+        workers=args.workers,
+        output=args.output,
+        sort_by=args.sort_by
+    )
+    for rank, row in enumerate(rows[:10], 1):
+        print(f"{rank:>3}. grid_size={row['grid_size']} grid_count={row['grid_count']} "
+              f"position_amount={row['position_amount']} pnl={row['pnl']:.2f} "
+              f"max_drawdown={row['max_drawdown']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import math
+from decimal import Decimal
+
+# 与 ccxt 的 precisionMode 常量一致
+DECIMAL_PLACES = 2
+TICK_SIZE = 4
+
+# 交易所没有提供市场精度时使用的最小价格变动单位和最小下单单位
+DEFAULT_TICK_SIZE = 0.01
+DEFAULT_LOT_SIZE = 0.00001
+
+
+def _digits(step):
+    """
+    返回步长的小数位数，例如 0.01 -> 2，5 -> 0
+    """
+    return max(0, -Decimal(repr(step)).normalize().as_tuple().exponent)
+
+
+class PriceScale:
+    """
+    定点价格和数量：价格用最小价格变动单位（tick）的整数倍表示，数量用最小下单单位（lot）的整数倍表示
+    档位的查找、比较和序列化都用整数，只有发给交易所和显示时才换算成浮点数
+    """
+    __slots__ = ("tick_size", "lot_size", "price_digits", "amount_digits")
+
+    def __init__(self, tick_size=DEFAULT_TICK_SIZE, lot_size=DEFAULT_LOT_SIZE):
+        """
+        :param tick_size: 最小价格变动单位
+        :param lot_size: 最小下单单位
+        """
+        self.tick_size = tick_size
+        self.lot_size = lot_size
+        self.price_digits = _digits(tick_size)
+        self.amount_digits = _digits(lot_size)
+
+    @classmethod
+    def from_market(cls, market, precision_mode=TICK_SIZE):
+        """
+        从 ccxt 的 market 结构读取精度
+        :param precision_mode: 交易所的 precisionMode，DECIMAL_PLACES 表示精度是小数位数
+        """
+        precision = market.get("precision") or {}
+
+        def step(value, default):
+            if value is None:
+                return default
+            return 10 ** -int(value) if precision_mode == DECIMAL_PLACES else float(value)
+
+        return cls(step(precision.get("price"), DEFAULT_TICK_SIZE), step(precision.get("amount"), DEFAULT_LOT_SIZE))
+
+    def to_ticks(self, price):
+        """
+        价格 -> 最接近的整数 tick
+        """
+        return round(price / self.tick_size)
+
+    def to_price(self, ticks):
+        return round(ticks * self.tick_size, self.price_digits)
+
+    def to_lots(self, amount):
+        """
+        数量 -> 整数 lot，向下取整，不会超过给定的数量
+        """
+        return math.floor(amount / self.lot_size + 1e-9)
+
+    def to_amount(self, lots):
+        return round(lots * self.lot_size, self.amount_digits)
+
+    def quantize_amount(self, amount):
+        """
+        把数量向下取整到最小下单单位
+        """
+        return self.to_amount(self.to_lots(amount))
+
+    def __repr__(self):
+        return f"PriceScale(tick_size={self.tick_size}, lot_size={self.lot_size})"
+
+
+def market_scale(exchange, symbol):
+    """
+    按交易所已加载的市场精度返回交易对的 PriceScale，未加载时使用默认精度
+    """
+    markets = getattr(exchange, "markets", None) or {}
+    market = markets.get(symbol)
+    if market is None:
+        return PriceScale()
+    return PriceScale.from_market(market, getattr(exchange, "precisionMode", TICK_SIZE))
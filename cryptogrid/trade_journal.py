@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+from loguru import logger
+
+
+class TradeJournal:
+    """
+    只追加的 JSON Lines 日志，每行一条记录
+    写入开销与历史记录条数无关，崩溃时最多丢失最后一行未写完的记录
+    """
+
+    def __init__(self, filename="completed_trades.jsonl", fsync_every=1):
+        """
+        :param filename: 日志文件路径
+        :param fsync_every: 每写入多少条记录执行一次fsync，0 表示不主动fsync
+        """
+        self.filename = filename
+        self.fsync_every = fsync_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0  # 文件当前的字节数，即下一条记录的偏移量
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.filename, "ab")
+            size = self._file.seek(0, os.SEEK_END)
+            self._size = _complete_size(self.filename, size)
+            if self._size < size:
+                # 上次崩溃时写了一半的记录：截掉，否则新记录会接在这一行后面一起被丢弃
+                logger.warning("截断日志末尾未写完的记录 {filename}@{offset}", filename=self.filename, offset=self._size)
+                self._file.truncate(self._size)
+        return self._file
+
+    def append(self, record):
+        """
+        追加一条记录
+        :return: 记录在文件中的字节偏移量
+        """
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+        with self._lock:
+            f = self._open()
+            offset = self._size
+            f.write(line)
+            self._size += len(line)
+            self._pending += 1
+            if self.fsync_every and self._pending >= self.fsync_every:
+                self._sync(f)
+        return offset
+
+    def flush(self, sync=True):
+        """
+        将缓冲区写入磁盘
+        :param sync: 是否执行fsync；只是为了让随后的读取看到新记录时不需要
+        """
+        with self._lock:
+            if self._file is not None:
+                if sync:
+                    self._sync(self._file)
+                else:
+                    self._file.flush()
+
+    def _sync(self, f):
+        f.flush()
+        os.fsync(f.fileno())
+        self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync(self._file)
+                self._file.close()
+                self._file = None
+
+    def __iter__(self):
+        return iter_journal(self.filename)
+
+
+def _complete_size(filename, size, chunk_size=4096):
+    """
+    返回文件中最后一个换行符之后的偏移量，即完整记录部分的长度
+    """
+    if size == 0:
+        return 0
+    with open(filename, "rb") as f:
+        end = size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            index = f.read(end - start).rfind(b"\n")
+            if index >= 0:
+                return start + index + 1
+            end = start
+    return 0
+
+
+def iter_journal(filename):
+    """
+    逐行流式读取日志，不会一次性加载整个文件
+    末尾未写完的行（例如崩溃时）会被跳过
+    """
+    for _, record in iter_journal_offsets(filename):
+        yield record
+
+
+def iter_journal_offsets(filename, start=0):
+    """
+    逐行流式读取日志，同时返回每条记录的字节偏移量
+    :param start: 开始读取的偏移量
+    :return: (偏移量, 记录) 生成器
+    """
+    try:
+        with open(filename, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                line_offset = offset
+                offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_offset, json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("跳过无法解析的日志行 {filename}@{offset}", filename=filename, offset=line_offset)
+    except FileNotFoundError:
+        return
+
+
+def read_journal_record(filename, offset):
+    """
+    读取指定偏移量处的一条记录
+    """
+    with open(filename, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.readline())
@@ -3,6 +3,11 @@ from rich.panel import Panel
 from rich.layout import Layout
 from rich.text import Text
 from rich.live import Live
+from itertools import islice
+
+# 订单状态面板显示的订单数
+ORDER_PANEL_ROWS = 20
+SIDE_LABELS = {"buy": "买入", "sell": "卖出"}
 
 # 创建日志面板
 def create_log_panel(panel_handler):
@@ -44,6 +49,9 @@ def create_capital_status_panel(strategy):
     table.add_row("总资产", f"{strategy.total_assets:.2f}")
     table.add_row("盈亏", f"{strategy.pnl:.2f}")
     table.add_row("盈亏率", f"{strategy.pnl_rate:.2%}")
+    table.add_row("已实现盈亏", f"{strategy.realized_pnl:.2f}")
+    table.add_row("未实现盈亏", f"{strategy.unrealized_pnl:.2f}")
+    table.add_row("手续费", f"{strategy.fees:.2f}")
     
     return Panel(table, title="资金情况", border_style="bold")
 
@@ -53,7 +61,9 @@ def create_market_depth_panel(market_depth):
     table.add_column("买入", style="green")
     table.add_column("卖出", style="red")
     
-    for i in range(5):
+    if market_depth is None:
+        return Panel(table, title="市场深度", border_style="bold")
+    for i in range(min(5, len(market_depth['bids']), len(market_depth['asks']))):
         table.add_row(f"{market_depth['bids'][i][0]} ({market_depth['bids'][i][1]})",
                       f"{market_depth['asks'][i][0]} ({market_depth['asks'][i][1]})")
     
@@ -67,9 +77,9 @@ def create_grid_status_panel(strategy):
     table.add_column("买单ID", style="green")
     table.add_column("卖单状态", style="magenta")
     table.add_column("卖单ID", style="green")
-    for price in strategy.grid:
-        level = strategy.grid_levels[price]
-        table.add_row(f"{price:.2f}", level.buy_order_status, str(level.buy_order), level.sell_order_status, str(level.sell_order))
+    for tick in strategy.grid:
+        level = strategy.grid_levels[tick]
+        table.add_row(f"{level.price:.2f}", level.buy_order_status, str(level.buy_order), level.sell_order_status, str(level.sell_order))
     
     return Panel(table, title="网格状态", border_style="bold")
 
@@ -82,19 +92,12 @@ def create_order_status_panel(strategy):
     table.add_column("数量", style="green")
     table.add_column("状态", style="magenta")
     
-    # 使用集合来跟踪已添加的订单ID
-    added_order_ids = set()
-    
-    for order in reversed(strategy.history_orders):  # 反转列表以显示最新的订单
-        order_id = str(order['id'])
-        if order_id not in added_order_ids:
-            if order['side'] == 'buy':
-                table.add_row(order_id, "买入", f"{order['price']}", 
-                              f"{order['amount']:.4f}", order['status'])
-            elif order['side'] == 'sell':
-                table.add_row(order_id, "卖出", f"{order['price']}", 
-                              f"{order['amount']:.4f}", order['status'])
-            added_order_ids.add(order_id)
+    # 历史订单已按ID去重，只显示最新的若干条
+    for order in islice(reversed(strategy.history_orders), ORDER_PANEL_ROWS):
+        side = SIDE_LABELS.get(order['side'])
+        if side:
+            table.add_row(str(order['id']), side, f"{order['price']}",
+                          f"{order['amount']:.4f}", order['status'])
     
     return Panel(table, title="订单状态", border_style="bold")
 
@@ -1,22 +1,19 @@
-from cryptogrid.strategy import GridTradingStrategy
-import os
-from dotenv import load_dotenv
-from rich.live import Live
 import time
-import ccxt
-from cryptogrid.mock_exchange import MockExchange
-from cryptogrid.util import format_price
-from cryptogrid.logger_config import setup_logger, logger
-from cryptogrid.ui_components import (
-    create_strategy_params_panel, create_capital_status_panel,
-    create_market_depth_panel, create_grid_status_panel,
-    create_order_status_panel, create_layout, create_log_panel
-)
+START_TIME = time.perf_counter()  # 用于统计启动到首次挂单的耗时
+import os
 import threading
+from cryptogrid.strategy import GridTradingStrategy
+from cryptogrid.logger_config import setup_logger, shutdown_logger, logger
+from cryptogrid.scheduler import RequestScheduler
+from cryptogrid.state_store import SQLiteStateStore
+from cryptogrid.markets import MarketCache, load_markets
+from cryptogrid.market_data import MarketDataService, create_exchange, stream_class
+# rich 界面、事件引擎、多交易对、回放和指标接口只在对应模式下才导入，缩短启动时间
 
 # 策略参数
 def init_strategy_params():
     # 加载.env文件中的环境变量
+    from dotenv import load_dotenv
     load_dotenv()
 
     # 从环境变量中读取策略参数
@@ -25,8 +22,28 @@ def init_strategy_params():
     INITIAL_CAPITAL = float(os.getenv('INITIAL_CAPITAL', 10000))  # 初始资金，默认值为10000
     MAX_LOSS = float(os.getenv('MAX_LOSS', 0.2))  # 最大允许损失比例，默认值为20%
     POSITION_AMOUNT = float(os.getenv('POSITION_AMOUNT', 100))  # 每个档位的资金数量，默认值为100
-    EXCHANGE = os.getenv('EXCHANGE', "binance")  # 交易所，默认值为binance
-    SYMBOL = os.getenv('SYMBOL', "BTCUSDT")  # 交易对，默认值为BTCUSDT
+    EXCHANGE = os.getenv('EXCHANGE', "mock")  # 交易所：mock 为本地模拟交易所，其余为 ccxt 的交易所ID，例如 binance
+    API_KEY = os.getenv('API_KEY', "")  # 真实交易所的 API 密钥
+    API_SECRET = os.getenv('API_SECRET', "")
+    MARKET_DATA_TTL = float(os.getenv('MARKET_DATA_TTL', 0.5))  # 共享行情缓存的有效期（秒）
+    CLIENT_ORDER_PREFIX = os.getenv('CLIENT_ORDER_PREFIX', "cgrid")  # 本实例订单的 clientOrderId 前缀，同一账户运行多个实例时各不相同
+    SYMBOL = os.getenv('SYMBOL', "BTC/USDT")  # 交易对（ccxt 格式），默认值为BTC/USDT
+    ENGINE_MODE = os.getenv('ENGINE_MODE', "poll")  # 运行模式：poll 每秒轮询，event 由推送驱动
+    SYMBOLS = os.getenv('SYMBOLS', "")  # 多交易对模式，逗号分隔，例如 BTC/USDT,ETH/USDT
+    WORKERS = int(os.getenv('WORKERS', 1))  # 多交易对模式的工作进程数，大于 1 时按进程分片运行，0 表示按CPU数
+    MAX_REQUESTS_PER_SECOND = float(os.getenv('MAX_REQUESTS_PER_SECOND', 10))  # 多交易对模式下的请求速率上限
+    WEIGHT_LIMIT = int(os.getenv('WEIGHT_LIMIT', 1200))  # 每分钟允许的交易所请求权重
+    RECORD_FILE = os.getenv('RECORD_FILE', "")  # 录制行情到该文件
+    REPLAY_FILE = os.getenv('REPLAY_FILE', "")  # 用录制的行情回放策略，不显示界面
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 0))  # Prometheus 指标接口端口，0 表示不启动
+    HEADLESS = os.getenv('HEADLESS', "").lower() in ("1", "true", "yes")  # 不显示 rich 界面
+    MARKET_CACHE_TTL = float(os.getenv('MARKET_CACHE_TTL', 24 * 3600))  # 市场元数据缓存有效期（秒）
+    # 保存所有交易对状态、订单和成交的 SQLite 数据库；真实交易所默认使用单独的文件，不会恢复模拟盘的状态
+    STATE_DB = os.getenv('STATE_DB', "grid_state.db" if EXCHANGE == "mock" else f"grid_state_{EXCHANGE}.db")
+    PROFILE_DIR = os.getenv('PROFILE_DIR', "profiles")  # 性能分析结果目录，运行中用 SIGUSR1/SIGUSR2 或命令文件触发
+    PROFILE_TICKS = int(os.getenv('PROFILE_TICKS', 20))  # 收到 SIGUSR1 后用 cProfile 分析的 tick 数
+    PROFILE_COMMAND_FILE = os.getenv('PROFILE_COMMAND_FILE', "profile.cmd")  # 分析命令文件，见 Profiler.command
+    LOG_FORMAT = os.getenv('LOG_FORMAT', "text")  # 日志文件格式：text 或 json（结构化 JSON Lines）
 
     return {
         "grid_size": GRID_SIZE,
@@ -35,7 +52,26 @@ def init_strategy_params():
         "max_loss": MAX_LOSS,
         "position_amount": POSITION_AMOUNT,
         "exchange": EXCHANGE,
-        "symbol": SYMBOL
+        "api_key": API_KEY,
+        "api_secret": API_SECRET,
+        "market_data_ttl": MARKET_DATA_TTL,
+        "client_order_prefix": CLIENT_ORDER_PREFIX,
+        "symbol": SYMBOL,
+        "engine_mode": ENGINE_MODE,
+        "symbols": [symbol.strip() for symbol in SYMBOLS.split(",") if symbol.strip()],
+        "workers": WORKERS,
+        "max_requests_per_second": MAX_REQUESTS_PER_SECOND,
+        "weight_limit": WEIGHT_LIMIT,
+        "record_file": RECORD_FILE,
+        "replay_file": REPLAY_FILE,
+        "metrics_port": METRICS_PORT,
+        "log_format": LOG_FORMAT,
+        "state_db": STATE_DB,
+        "headless": HEADLESS,
+        "market_cache_ttl": MARKET_CACHE_TTL,
+        "profile_dir": PROFILE_DIR,
+        "profile_ticks": PROFILE_TICKS,
+        "profile_command_file": PROFILE_COMMAND_FILE
     }
 
 def update_strategy_state_thread(strategy, stop_event):
@@ -44,18 +80,190 @@ def update_strategy_state_thread(strategy, stop_event):
         time.sleep(1)  # 每秒更新一次策略状态
     strategy.save_strategy_state()
 
+def event_engine_thread(strategy, stop_event, strategy_params):
+    # 事件驱动模式：只有订单状态变化或价格跨档时才运行策略
+    # 真实交易所的推送由单独的 ccxt.pro 客户端提供，REST 客户端没有 watch_* 接口
+    import asyncio
+    from cryptogrid.engine import AsyncGridEngine
+    from cryptogrid.market_data import create_stream
+
+    async def run():
+        config = {}
+        if strategy_params["api_key"]:
+            config = {"apiKey": strategy_params["api_key"], "secret": strategy_params["api_secret"]}
+        stream = create_stream(strategy_params["exchange"], **config)
+        try:
+            await AsyncGridEngine(strategy, stream=stream).run(stop_event)
+        finally:
+            if stream is not None:
+                await stream.close()
+
+    asyncio.run(run())
+
+
+def create_market_data(strategy_params):
+    # 交易所客户端经过请求调度后交给共享行情服务，所有策略和界面共用同一份行情缓存
+    config = {}
+    if strategy_params["api_key"]:
+        config = {"apiKey": strategy_params["api_key"], "secret": strategy_params["api_secret"]}
+    exchange = RequestScheduler(create_exchange(strategy_params["exchange"], **config),
+                                weight_limit=strategy_params["weight_limit"])
+    return MarketDataService({strategy_params["exchange"]: exchange}, ttl=strategy_params["market_data_ttl"])
+
+
+def run_portfolio(strategy_params):
+    # 多交易对模式：所有交易对共享一个交易所连接，不显示界面
+    from cryptogrid.portfolio import PortfolioRunner
+    market_data = create_market_data(strategy_params)
+    exchange = market_data.exchange(strategy_params["exchange"])
+    load_markets(exchange, MarketCache(ttl=strategy_params["market_cache_ttl"]))
+    store = SQLiteStateStore(strategy_params["state_db"])
+    runner = PortfolioRunner(exchange, max_requests_per_second=strategy_params["max_requests_per_second"],
+                             store=store)
+    for symbol in strategy_params["symbols"]:
+        runner.add_strategy(symbol, {
+            "grid_size": strategy_params["grid_size"],
+            "grid_levels": strategy_params["grid_count"],
+            "position_amount": strategy_params["position_amount"],
+            "initial_capital": strategy_params["initial_capital"],
+            "max_loss": strategy_params["max_loss"]
+        })
+
+    stop_event = threading.Event()
+    try:
+        runner.run(stop_event)
+    except KeyboardInterrupt:
+        print("正在停止程序...")
+        stop_event.set()
+        for strategy in runner.strategies.values():
+            strategy.save_strategy_state()
+    finally:
+        store.close()
+        market_data.close()
+
+
+def run_supervisor(strategy_params):
+    # 多进程模式：交易对按进程分片，主进程只负责守护工作进程、汇总状态和指标
+    from cryptogrid.supervisor import Supervisor
+    config = {}
+    if strategy_params["api_key"]:
+        config = {"apiKey": strategy_params["api_key"], "secret": strategy_params["api_secret"]}
+    supervisor = Supervisor(
+        strategy_params["symbols"], {
+            "grid_size": strategy_params["grid_size"],
+            "grid_levels": strategy_params["grid_count"],
+            "position_amount": strategy_params["position_amount"],
+            "initial_capital": strategy_params["initial_capital"],
+            "max_loss": strategy_params["max_loss"]
+        },
+        workers=strategy_params["workers"] or None,
+        exchange=strategy_params["exchange"],
+        exchange_config=config,
+        state_db=strategy_params["state_db"],
+        weight_limit=strategy_params["weight_limit"],
+        max_requests_per_second=strategy_params["max_requests_per_second"],
+        log_file="grid_trading.worker{shard}.log",
+        market_cache_ttl=strategy_params["market_cache_ttl"]
+    )
+    if strategy_params["metrics_port"]:
+        from cryptogrid.metrics import MetricsServer
+        MetricsServer(supervisor, port=strategy_params["metrics_port"]).start()
+    stop_event = threading.Event()
+    try:
+        supervisor.run(stop_event)
+    except KeyboardInterrupt:
+        print("正在停止程序...")
+
+
+def run_replay(strategy_params):
+    # 回放模式：按录制的行情和模拟时钟尽可能快地运行策略，输出最终结果
+    from cryptogrid.replay import ReplayExchange, replay
+    exchange = ReplayExchange(strategy_params["replay_file"])
+    strategy = GridTradingStrategy(exchange, strategy_params["symbol"], state_file="replay_strategy_state.json")
+    strategy.set_strategy_params(
+        initial_price=exchange.event.price,
+        grid_size=strategy_params["grid_size"],
+        grid_levels=strategy_params["grid_count"],
+        position_amount=strategy_params["position_amount"],
+        initial_capital=strategy_params["initial_capital"],
+        max_loss=strategy_params["max_loss"]
+    )
+    started = time.perf_counter()
+    count = replay(strategy, exchange)
+    elapsed = time.perf_counter() - started
+    print(f"回放 {count} 条行情，耗时 {elapsed:.2f} 秒（{count / elapsed:.0f} 条/秒）")
+    print(strategy.get_summary())
+
+
+def run_dashboard(strategy, strategy_params, panel_handler):
+    # rich 界面：只在策略发布新快照或有新日志时重绘，界面不访问交易所也不读取策略的可变状态
+    from cryptogrid.ui_components import (
+        create_strategy_params_panel, create_capital_status_panel,
+        create_market_depth_panel, create_grid_status_panel,
+        create_order_status_panel, create_layout, create_log_panel, create_live_display
+    )
+    layout = create_layout()
+    layout["params"].update(create_strategy_params_panel(strategy_params))
+    with create_live_display(layout) as live:
+        version = 0
+        log_count = -1
+        while True:
+            snapshot = strategy.snapshots.wait_for_update(version, timeout=0.2)
+            redraw = False
+            if snapshot is not None:
+                version = snapshot.version
+                layout["capital_status"].update(create_capital_status_panel(snapshot))
+                layout["market_depth"].update(create_market_depth_panel(snapshot.market_depth))
+                layout["grid_status"].update(create_grid_status_panel(snapshot))
+                layout["order_status"].update(create_order_status_panel(snapshot))
+                redraw = True
+            if panel_handler.count != log_count:
+                log_count = panel_handler.count
+                layout["log"].update(create_log_panel(panel_handler))
+                redraw = True
+            if redraw:
+                live.refresh()
+
 
 def main():
-    # 设置日志
-    panel_handler = setup_logger()
-    
     # 初始化策略
     strategy_params = init_strategy_params()
-    exchange = MockExchange(initial_price=10000, volatility=0.005)
-    strategy = GridTradingStrategy(exchange, strategy_params["symbol"])
-    strategy_state_file = f"{strategy_params['exchange']}_{strategy_params['symbol']}_strategy_state.json"
-    if os.path.exists(strategy_state_file):
-        strategy.load_strategy_state(strategy_state_file)
+
+    # 设置日志
+    panel_handler = setup_logger(serialize=strategy_params["log_format"] == "json")
+    if strategy_params["symbols"] and strategy_params["workers"] != 1:
+        run_supervisor(strategy_params)
+        return
+    if strategy_params["metrics_port"]:
+        from cryptogrid.metrics import MetricsServer
+        MetricsServer(port=strategy_params["metrics_port"]).start()
+    if strategy_params["replay_file"]:
+        run_replay(strategy_params)
+        return
+    if strategy_params["symbols"]:
+        run_portfolio(strategy_params)
+        return
+    if strategy_params["engine_mode"] == "event":
+        # 不支持推送的交易所在下单之前报错
+        stream_class(strategy_params["exchange"])
+    market_data = create_market_data(strategy_params)
+    exchange = market_data.exchange(strategy_params["exchange"])
+    recorder = None
+    if strategy_params["record_file"]:
+        from cryptogrid.replay import MarketRecorder, RecordingExchange
+        recorder = MarketRecorder(strategy_params["record_file"])
+        exchange = RecordingExchange(exchange, recorder)
+    # 市场元数据优先从磁盘缓存恢复，重启时不必等待 load_markets
+    load_markets(exchange, MarketCache(ttl=strategy_params["market_cache_ttl"]))
+    store = SQLiteStateStore(strategy_params["state_db"])
+    # 旧版本的默认交易对是 BTCUSDT，迁移到 ccxt 格式的名称下继续运行
+    if store.rename_symbol(strategy_params["symbol"].replace("/", ""), strategy_params["symbol"]):
+        logger.info("已迁移旧交易对名称的状态", symbol=strategy_params["symbol"])
+    strategy = GridTradingStrategy(exchange, strategy_params["symbol"], store=store)
+    strategy.client_order_prefix = strategy_params["client_order_prefix"]
+    if store.has_state(strategy_params["symbol"]):
+        # 从数据库恢复，并与交易所挂单对账
+        strategy.recover()
     else:
         current_price = exchange.fetch_ticker(strategy_params["symbol"])["last"]
         strategy.set_strategy_params(
@@ -67,31 +275,48 @@ def main():
             max_loss=strategy_params["max_loss"]
         )
 
+    # 运行中随时开关的性能分析：SIGUSR1 分析接下来的若干 tick，SIGUSR2 开始/停止采样，其余见命令文件
+    from cryptogrid.profiling import Profiler
+    profiler = Profiler(strategy_params["profile_dir"])
+    profiler.add_strategy(strategy)
+    profiler.install_signal_handlers(strategy_params["profile_ticks"])
+
+    # 在启动界面和后台线程之前先跑一个 tick，尽快把挂单放到交易所
+    strategy.handle_price_change()
+    logger.info("启动到首次挂单耗时 {seconds:.3f} 秒，在途订单 {open_orders} 个",
+                seconds=time.perf_counter() - START_TIME, open_orders=len(strategy.order_index))
+
     # 创建停止事件和线程
     stop_event = threading.Event()
-    update_thread = threading.Thread(target=update_strategy_state_thread, args=(strategy, stop_event))
+    profiler.watch(strategy_params["profile_command_file"], stop_event=stop_event)
+    if strategy_params["engine_mode"] == "event":
+        update_thread = threading.Thread(target=event_engine_thread, args=(strategy, stop_event, strategy_params))
+    else:
+        update_thread = threading.Thread(target=update_strategy_state_thread, args=(strategy, stop_event))
     update_thread.start()
 
-    layout = create_layout()
     try:
-        with Live(layout, refresh_per_second=1, screen=True):
-            while True:
-                # 更新界面
-                layout["params"].update(create_strategy_params_panel(strategy_params))
-                layout["capital_status"].update(create_capital_status_panel(strategy))
-                layout["market_depth"].update(create_market_depth_panel(strategy.exchange.fetch_order_book(strategy_params["symbol"], limit=5)))
-                layout["grid_status"].update(create_grid_status_panel(strategy))
-                layout["order_status"].update(create_order_status_panel(strategy))
-                layout["log"].update(create_log_panel(panel_handler))
-                
-                time.sleep(0.1)  # 稍微降低主线程的刷新频率，减少CPU使用
+        if strategy_params["headless"]:
+            while update_thread.is_alive():
+                update_thread.join(0.5)
+        else:
+            run_dashboard(strategy, strategy_params, panel_handler)
     except KeyboardInterrupt:
         print("正在停止程序...")
     finally:
         # 停止更新线程
         stop_event.set()
         update_thread.join()
-    
+        profiler.stop_sampling()
+        if recorder is not None:
+            recorder.close()
+        store.close()
+        market_data.close()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        # 写出队列中剩余的日志
+        shutdown_logger()
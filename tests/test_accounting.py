@@ -0,0 +1,57 @@
+import pytest
+from cryptogrid.accounting import Accounting
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy
+
+
+def test_average_cost_and_realized_pnl():
+    accounting = Accounting(initial_capital=1000, mark_price=100)
+    accounting.on_fill("buy", 1, 100, fee=0.1)
+    accounting.on_fill("buy", 1, 90, fee=0.09)
+    assert accounting.average_cost == pytest.approx(95.095)
+
+    realized = accounting.on_fill("sell", 1, 110, fee=0.11)
+    assert realized == pytest.approx(110 - 0.11 - 95.095)
+    assert accounting.fees == pytest.approx(0.3)
+
+    accounting.mark(105)
+    assert accounting.unrealized_pnl == pytest.approx(105 - 95.095)
+    # 总盈亏 = 已实现 + 未实现
+    assert accounting.pnl == pytest.approx(accounting.realized_pnl + accounting.unrealized_pnl)
+
+    restored = Accounting()
+    restored.update(accounting.to_dict())
+    assert restored.summary() == accounting.summary()
+
+
+def test_strategy_accounts_fill_prices_and_fees(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0, fee_rate=0.001)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT")
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.01, grid_levels=10,
+                                 position_amount=100, initial_capital=10000, max_loss=0.2)
+    strategy.handle_price_change()
+    exchange.price = 9850
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    exchange.price = 10050
+    strategy.handle_price_change()
+
+    level = strategy.grid_levels[990000]
+    assert level.round_trips == 1
+    buy_cost = 0.0101 * 9900 * 1.001
+    sell_proceeds = 0.01 * 10000 * 0.999
+    assert level.profit == pytest.approx(sell_proceeds - buy_cost * 0.01 / 0.0101)
+
+    summary = strategy.get_summary()
+    assert summary["round_trips"] == 1
+    assert summary["capital"] == pytest.approx(10000 - buy_cost + sell_proceeds)
+    assert summary["fees"] == pytest.approx(0.0101 * 9900 * 0.001 + 0.01 * 10000 * 0.001)
+    # 卖出数量少于买入数量，剩余的持仓按均价计入未实现盈亏
+    assert summary["position"] == pytest.approx(0.0001)
+    assert summary["total_assets"] == pytest.approx(summary["capital"] + 0.0001 * 10050)
+
+    strategy.save_strategy_state()
+    restored = GridTradingStrategy(exchange, "BTC/USDT", load_from_file=True)
+    assert restored.get_summary() == pytest.approx(summary)
+    assert restored.grid_levels[990000].profit == pytest.approx(level.profit)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from cryptogrid.backtest import load_prices, run_backtest
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy
+
+
+def random_walk(n, seed=7, step=0.004):
+    rng = np.random.default_rng(seed)
+    return 10000 * np.exp(np.cumsum(rng.normal(0, step, n)))
+
+
+def run_live(prices, tmp_path, monkeypatch, fee_rate=0.0):
+    # 用真实的策略逐 tick 跑同一条价格路径，作为回测结果的对照
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=prices[0], volatility=0, fee_rate=fee_rate)
+    exchange.balance['USDT'] = 1e12
+    strategy = GridTradingStrategy(exchange, "BTC/USDT")
+    strategy.set_strategy_params(
+        initial_price=prices[0],
+        grid_size=0.01,
+        grid_levels=10,
+        position_amount=100,
+        initial_capital=10000,
+        max_loss=0.2
+    )
+    for price in prices:
+        exchange.price = price
+        strategy.process_tick(price)
+    return strategy
+
+
+def test_backtest_matches_strategy(tmp_path, monkeypatch):
+    prices = random_walk(1500)
+    strategy = run_live(prices, tmp_path, monkeypatch)
+    result = run_backtest(prices, grid_size=0.01, grid_count=10, position_amount=100, initial_capital=10000)
+
+    buys = sum(1 for order in strategy.history_orders.query() if order["side"] == "buy")
+    sells = sum(1 for order in strategy.history_orders.query() if order["side"] == "sell")
+    assert buys > 0 and sells > 0
+    assert result["buy_count"] == buys
+    assert result["sell_count"] == sells
+    assert result["capital"] == pytest.approx(strategy.capital)
+
+
+def test_backtest_matches_strategy_with_fees(tmp_path, monkeypatch):
+    prices = random_walk(1500)
+    strategy = run_live(prices, tmp_path, monkeypatch, fee_rate=0.001)
+    result = run_backtest(prices, grid_size=0.01, grid_count=10, position_amount=100, initial_capital=10000,
+                          fee_rate=0.001)
+
+    assert result["capital"] == pytest.approx(strategy.capital)
+    assert result["position"] == pytest.approx(strategy.position)
+
+
+def test_backtest_summary_fields():
+    prices = random_walk(500)
+    result = run_backtest(prices, grid_size=0.01, grid_count=10, position_amount=100, initial_capital=10000)
+
+    assert result["total_assets"] == pytest.approx(result["capital"] + result["position"] * prices[-1])
+    assert result["pnl"] == pytest.approx(result["total_assets"] - 10000)
+    assert len(result["equity"]) == len(prices)
+    assert result["equity"][-1] == pytest.approx(result["total_assets"])
+
+
+def test_backtest_is_chunk_independent(monkeypatch):
+    prices = random_walk(3000)
+    expected = run_backtest(prices, grid_size=0.005, grid_count=20, position_amount=100, initial_capital=10000)
+    monkeypatch.setattr("cryptogrid.backtest.CHUNK_ELEMENTS", 100)
+    result = run_backtest(prices, grid_size=0.005, grid_count=20, position_amount=100, initial_capital=10000)
+
+    assert result["buy_counts"] == expected["buy_counts"]
+    assert result["sell_counts"] == expected["sell_counts"]
+
+
+def test_load_prices(tmp_path):
+    prices = random_walk(10)
+    np.save(tmp_path / "prices.npy", prices)
+    np.testing.assert_allclose(load_prices(str(tmp_path / "prices.npy")), prices)
+
+    with open(tmp_path / "prices.csv", "w") as f:
+        f.write("timestamp,open,close\n")
+        for i, price in enumerate(prices):
+            f.write(f"{i},0,{float(price)!r}\n")
+    np.testing.assert_allclose(load_prices(str(tmp_path / "prices.csv")), prices)
@@ -0,0 +1,107 @@
+import json
+from cryptogrid.checkpoint import StateCheckpointer
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy
+from cryptogrid.trade_journal import iter_journal
+
+
+def make_strategy(path):
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT", state_file=str(path))
+    strategy.set_strategy_params(
+        initial_price=10000,
+        grid_size=0.01,
+        grid_levels=10,
+        position_amount=100,
+        initial_capital=10000,
+        max_loss=0.2
+    )
+    return strategy
+
+
+def test_snapshot_and_delta_replay(tmp_path):
+    filename = tmp_path / "state.json"
+    checkpointer = StateCheckpointer(str(filename))
+    checkpointer.save_snapshot({"capital": 1, "grid_levels": {"1.0": {"amount": 0}}})
+    checkpointer.append_delta({"counters": {"capital": 2}})
+    checkpointer.append_delta({"grid_levels": {"1.0": {"amount": 3}}})
+
+    state = StateCheckpointer(str(filename)).load()
+    assert state["capital"] == 2
+    assert state["grid_levels"]["1.0"]["amount"] == 3
+    assert not (tmp_path / "state.json.tmp").exists()
+
+
+def test_stale_deltas_are_not_replayed_over_newer_snapshot(tmp_path):
+    filename = tmp_path / "state.json"
+    checkpointer = StateCheckpointer(str(filename))
+    checkpointer.save_snapshot({"capital": 1, "grid_levels": {}})
+    checkpointer.append_delta({"counters": {"capital": 2}})
+    checkpointer.close()
+    with open(tmp_path / "state.json.delta", "rb") as f:
+        stale = f.read()
+
+    # 新快照已经替换，但在清空增量日志之前崩溃
+    checkpointer = StateCheckpointer(str(filename))
+    checkpointer.load()
+    checkpointer.save_snapshot({"capital": 3, "grid_levels": {}})
+    checkpointer.close()
+    with open(tmp_path / "state.json.delta", "wb") as f:
+        f.write(stale)
+
+    checkpointer = StateCheckpointer(str(filename))
+    assert checkpointer.load()["capital"] == 3
+    checkpointer.append_delta({"counters": {"capital": 4}})
+    checkpointer.close()
+    assert StateCheckpointer(str(filename)).load()["capital"] == 4
+
+
+def test_unchanged_tick_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    strategy = make_strategy(tmp_path / "state.json")
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    deltas = list(iter_journal(tmp_path / "state.json.delta"))
+
+    strategy.handle_price_change()
+    assert list(iter_journal(tmp_path / "state.json.delta")) == deltas
+
+
+def test_delta_only_contains_changed_levels(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    strategy = make_strategy(tmp_path / "state.json")
+    strategy.handle_price_change()
+
+    deltas = list(iter_journal(tmp_path / "state.json.delta"))
+    assert len(deltas) == 1
+    # 只有新挂买单的5个档位
+    assert len(deltas[0]["grid_levels"]) == 5
+
+
+def test_compaction_rewrites_snapshot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    strategy = make_strategy(tmp_path / "state.json")
+    strategy.checkpointer.compact_every = 2
+    strategy.handle_price_change()
+    strategy.exchange.price = 9850
+    strategy.handle_price_change()
+
+    assert list(iter_journal(tmp_path / "state.json.delta")) == []
+    with open(tmp_path / "state.json") as f:
+        state = json.load(f)
+    assert state["capital"] == strategy.capital
+
+
+def test_restart_resumes_from_snapshot_and_deltas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    strategy = make_strategy(tmp_path / "state.json")
+    strategy.handle_price_change()
+    strategy.exchange.price = 9850
+    strategy.handle_price_change()
+
+    restored = GridTradingStrategy(strategy.exchange, "BTC/USDT", load_from_file=True,
+                                   state_file=str(tmp_path / "state.json"))
+    assert restored.capital == strategy.capital
+    assert set(restored.order_index) == set(strategy.order_index)
+    for price, level in strategy.grid_levels.items():
+        assert restored.grid_levels[price].to_dict() == level.to_dict()
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from cryptogrid.engine import AsyncGridEngine
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy
+
+
+def make_strategy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0, stream_interval=0.01)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT")
+    strategy.set_strategy_params(
+        initial_price=10000,
+        grid_size=0.01,
+        grid_levels=10,
+        position_amount=100,
+        initial_capital=10000,
+        max_loss=0.2
+    )
+    return strategy
+
+
+def run_engine(engine, scenario):
+    stop_event = threading.Event()
+
+    async def main():
+        runner = asyncio.create_task(engine.run(stop_event))
+        await scenario()
+        stop_event.set()
+        await runner
+
+    asyncio.run(main())
+
+
+def test_idle_market_does_not_run_grid(tmp_path, monkeypatch):
+    strategy = make_strategy(tmp_path, monkeypatch)
+    engine = AsyncGridEngine(strategy)
+    ticks = []
+    process_tick = strategy.process_tick
+    monkeypatch.setattr(strategy, "process_tick", lambda *args: ticks.append(args) or process_tick(*args))
+
+    run_engine(engine, lambda: asyncio.sleep(0.2))
+
+    # 价格不变时只有启动同步运行一次
+    assert len(ticks) == 1
+    assert len(strategy.order_index) == 5
+
+
+def test_fill_is_pushed_and_sell_placed(tmp_path, monkeypatch):
+    strategy = make_strategy(tmp_path, monkeypatch)
+    engine = AsyncGridEngine(strategy)
+    fetch_calls = []
+    monkeypatch.setattr(strategy.exchange, "fetch_order", lambda *args: fetch_calls.append(args))
+
+    async def scenario():
+        await asyncio.sleep(0.05)
+        strategy.exchange.price = 9850
+        await asyncio.sleep(0.2)
+
+    run_engine(engine, scenario)
+
+    level = strategy.grid_levels[strategy.scale.to_ticks(9900)]
+    assert level.buy_order_status == "filled"
+    assert level.sell_order_status == "pending"
+    # 成交由推送发现，不需要逐单查询
+    assert fetch_calls == []
@@ -0,0 +1,43 @@
+import random
+from cryptogrid.level_index import GridLevelIndex
+from cryptogrid.strategy import GridLevel, generate_grid
+
+
+def test_below_matches_linear_scan():
+    grid = generate_grid(10000, 0.001, 500)
+    index = GridLevelIndex({tick: GridLevel(tick, tick / 100) for tick in grid})
+    rng = random.Random(1)
+    for _ in range(200):
+        tick = rng.randint(min(grid) - 100, max(grid) + 100)
+        expected = [t for t in grid if t < tick][:5]  # grid 按价格从高到低排列
+        assert [level.tick for level in index.below(tick, 5)] == expected
+
+
+def test_band_counts_levels_below():
+    index = GridLevelIndex({tick: GridLevel(tick, float(tick)) for tick in [1, 2, 3]})
+    assert index.band(0.5) == 0
+    assert index.band(2.0) == 1
+    assert index.band(2.5) == 2
+    assert index.band(10) == 3
+    assert index.below(2.5, 5)[0].price == 2.0
+
+
+def test_wide_grid_only_touches_active_window(tmp_path, monkeypatch):
+    from cryptogrid.mock_exchange import MockExchange
+    from cryptogrid.strategy import GridTradingStrategy
+
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT")
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.0005, grid_levels=2000,
+                                 position_amount=100, initial_capital=10000, max_loss=0.2)
+    strategy.handle_price_change()
+    assert len(strategy._working_levels) == 5
+
+    # 价格上涨后，旧窗口的买单被撤销，新窗口挂上买单
+    exchange.price = 10100
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    open_buys = [level for level in strategy.grid_levels.values() if level.buy_order_status == "open"]
+    assert len(open_buys) == 5
+    assert all(level.price < 10100 * 0.999 for level in open_buys)
@@ -0,0 +1,45 @@
+import json
+import sys
+import pytest
+from loguru import logger
+from cryptogrid.logger_config import RateLimitFilter, setup_logger, shutdown_logger
+
+
+@pytest.fixture
+def restore_logger():
+    yield
+    shutdown_logger()
+    logger.add(sys.stderr)
+
+
+def test_rate_limit_filter_groups_by_symbol():
+    now = [0.0]
+    rate_limit = RateLimitFilter(interval=10, clock=lambda: now[0])
+
+    def record(**extra):
+        return {"extra": extra}
+
+    assert rate_limit(record(symbol="BTC/USDT", rate_limit="tick"))
+    assert not rate_limit(record(symbol="BTC/USDT", rate_limit="tick"))
+    # 其他交易对和不带 rate_limit 的日志不受影响
+    assert rate_limit(record(symbol="ETH/USDT", rate_limit="tick"))
+    assert rate_limit(record(symbol="BTC/USDT"))
+    now[0] = 10
+    assert rate_limit(record(symbol="BTC/USDT", rate_limit="tick"))
+    assert rate_limit.suppressed == 1
+
+
+def test_queued_structured_log_file(tmp_path, restore_logger):
+    log_file = tmp_path / "grid.log"
+    panel_handler = setup_logger(log_file, serialize=True)
+    tick_log = logger.bind(symbol="BTC/USDT", rate_limit="tick")
+    for price in (100, 101, 102):
+        tick_log.info("当前价格: {price:.2f}", price=price)
+    logger.bind(symbol="BTC/USDT").info("下单 {order_id}", order_id=7)
+    logger.complete()
+
+    records = [json.loads(line)["record"] for line in log_file.read_text(encoding="utf-8").splitlines()]
+    assert [record["message"] for record in records] == ["当前价格: 100.00", "下单 7"]
+    assert records[0]["extra"]["price"] == 100
+    assert records[1]["extra"] == {"symbol": "BTC/USDT", "order_id": 7}
+    assert panel_handler.count == 2
@@ -0,0 +1,122 @@
+import asyncio
+import inspect
+import threading
+import time
+import pytest
+from cryptogrid.market_data import CcxtExchange, MarketDataService, create_exchange, create_stream
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy, OrderStatus
+
+PARAMS = {"grid_size": 0.01, "grid_levels": 10, "position_amount": 100,
+          "initial_capital": 10000, "max_loss": 0.2}
+
+
+def test_strategies_on_same_pair_share_one_fetch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    exchange.balance['USDT'] = 1e9
+    service = MarketDataService({"mock": exchange}, ttl=60)
+    strategies = []
+    for i in range(10):
+        strategy = GridTradingStrategy(service.exchange("mock"), "BTC/USDT", state_file=f"state_{i}.json")
+        strategy.set_strategy_params(initial_price=10000, **PARAMS)
+        strategies.append(strategy)
+
+    for strategy in strategies:
+        strategy.handle_price_change()
+    assert service.fetch_count == 1
+    assert all(len(strategy.order_index) == 5 for strategy in strategies)
+
+
+def test_cache_expires_and_versions_entries():
+    now = [0.0]
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    service = MarketDataService({"mock": exchange}, ttl=1, clock=lambda: now[0])
+    assert service.get("mock", "ticker", "BTC/USDT") is None
+    service.ticker("mock", "BTC/USDT")
+    first = service.get("mock", "ticker", "BTC/USDT")
+
+    exchange.price = 10100
+    assert service.ticker("mock", "BTC/USDT")["last"] == 10000
+    now[0] = 1
+    assert service.ticker("mock", "BTC/USDT")["last"] == 10100
+    assert service.get("mock", "ticker", "BTC/USDT").seq > first.seq
+    assert service.fetch_count == 2
+
+
+def test_concurrent_requests_are_coalesced():
+    exchange = MockExchange(initial_price=10000, volatility=0, latency=0.05)
+    service = MarketDataService({"mock": exchange}, ttl=60)
+    threads = [threading.Thread(target=service.order_book, args=("mock", "BTC/USDT", 5)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert service.fetch_count == 1
+
+
+def test_refresh_fetches_symbols_and_exchanges_concurrently():
+    service = MarketDataService(ttl=60)
+    service.add_exchange("a", create_exchange("mock", initial_price=100, volatility=0, latency=0.05))
+    service.add_exchange("b", create_exchange("mock", initial_price=200, volatility=0, latency=0.05))
+    requests = [(name, "order_book", symbol, 5) for name in ("a", "b") for symbol in ("BTC/USDT", "ETH/USDT", "SOL/USDT")]
+
+    started = time.perf_counter()
+    results = service.refresh(requests)
+    assert time.perf_counter() - started < 0.05 * len(requests)
+    assert [result.data["bids"][0][0] < 150 for result in results] == [True] * 3 + [False] * 3
+    assert service.tickers("a", ["BTC/USDT", "ETH/USDT"])["ETH/USDT"]["last"] == 100
+
+
+class FakeCcxtClient:
+    # 按 ccxt 的约定返回订单状态：closed 表示全部成交，canceled 表示已撤销
+    id = "fake"
+
+    def __init__(self):
+        self.orders = [{"id": "1", "status": "closed"}, {"id": "2", "status": "canceled"},
+                       {"id": "3", "status": "open"}, {"id": "4", "status": "expired"}]
+
+    def fetch_orders(self, symbol):
+        return self.orders
+
+    def fetch_order(self, order_id, symbol):
+        return next(order for order in self.orders if order["id"] == order_id)
+
+    async def watch_orders(self, symbol):
+        return self.orders[:2]
+
+
+def test_ccxt_order_statuses_are_mapped():
+    client = FakeCcxtClient()
+    exchange = CcxtExchange(client)
+    statuses = [OrderStatus(order["status"]) for order in exchange.fetch_orders("BTC/USDT")]
+    assert statuses == [OrderStatus.FILLED, OrderStatus.CLOSED, OrderStatus.OPEN, OrderStatus.CLOSED]
+    assert exchange.fetch_order("1", "BTC/USDT")["status"] == "filled"
+    assert [order["status"] for order in asyncio.run(exchange.watch_orders("BTC/USDT"))] == ["filled", "closed"]
+    # 不修改客户端返回的原对象，其余属性原样转发
+    assert client.orders[0]["status"] == "closed"
+    assert exchange.id == "fake"
+    exchange.name = "fake"
+    assert client.name == "fake"
+
+
+def test_real_exchanges_are_wrapped():
+    assert isinstance(create_exchange("binance"), CcxtExchange)
+    assert isinstance(create_exchange("mock", volatility=0), MockExchange)
+
+
+def test_event_mode_streams_from_ccxt_pro():
+    assert create_stream("mock") is None
+
+    async def create():
+        stream = create_stream("binance")
+        try:
+            # REST 客户端的 watch_* 只会抛出 NotSupported，推送必须来自 ccxt.pro
+            assert type(stream._client).__module__.startswith("ccxt.pro")
+            assert inspect.iscoroutinefunction(stream.watch_orders)
+        finally:
+            await stream.close()
+
+    asyncio.run(create())
+    with pytest.raises(ValueError):
+        create_stream("no_such_exchange")
@@ -0,0 +1,41 @@
+import json
+from cryptogrid.markets import MarketCache, load_markets
+from cryptogrid.mock_exchange import MockExchange
+
+
+class CountingExchange(MockExchange):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.load_count = 0
+
+    def load_markets(self, reload=False):
+        self.load_count += 1
+        return super().load_markets(reload)
+
+
+def test_markets_are_loaded_once_and_cached(tmp_path):
+    now = [0.0]
+    cache = MarketCache(tmp_path / "markets.json", ttl=60, clock=lambda: now[0])
+    exchange = CountingExchange(initial_price=10000)
+    markets = load_markets(exchange, cache)
+    assert markets["BTC/USDT"]["precision"]["price"] == 0.01
+
+    # 重启后从缓存恢复，不请求交易所
+    restarted = CountingExchange(initial_price=10000)
+    assert load_markets(restarted, cache) == markets
+    assert restarted.markets == markets
+    assert restarted.load_count == 0
+
+    # 缓存过期后重新加载
+    now[0] = 61
+    assert load_markets(restarted, cache) == markets
+    assert restarted.load_count == 1
+
+
+def test_corrupt_cache_is_ignored(tmp_path):
+    filename = tmp_path / "markets.json"
+    filename.write_text("{", encoding="utf-8")
+    exchange = CountingExchange(initial_price=10000)
+    load_markets(exchange, MarketCache(filename))
+    assert exchange.load_count == 1
+    assert "mock" in json.loads(filename.read_text(encoding="utf-8"))
@@ -0,0 +1,72 @@
+import urllib.request
+import pytest
+from cryptogrid.metrics import InstrumentedExchange, MetricsRegistry, MetricsServer
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy
+
+
+def test_histogram_render():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("tick_seconds", "tick 耗时", buckets=(0.1, 1.0), symbol="BTC/USDT")
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+    registry.counter("fills_total", symbol="BTC/USDT").inc(3)
+
+    text = registry.render()
+    assert '# TYPE tick_seconds histogram' in text
+    assert 'tick_seconds_bucket{symbol="BTC/USDT",le="0.1"} 1' in text
+    assert 'tick_seconds_bucket{symbol="BTC/USDT",le="1.0"} 2' in text
+    assert 'tick_seconds_bucket{symbol="BTC/USDT",le="+Inf"} 3' in text
+    assert 'tick_seconds_count{symbol="BTC/USDT"} 3' in text
+    assert 'fills_total{symbol="BTC/USDT"} 3' in text
+    # 相同名称和标签返回同一个指标
+    assert registry.histogram("tick_seconds", symbol="BTC/USDT") is histogram
+
+
+def test_instrumented_exchange_times_calls_and_errors():
+    registry = MetricsRegistry()
+    mock = MockExchange(initial_price=10000, volatility=0)
+    exchange = InstrumentedExchange(mock, registry, symbol="BTC/USDT")
+    exchange.fetch_ticker("BTC/USDT")
+    with pytest.raises(Exception):
+        exchange.fetch_order(999, "BTC/USDT")
+    # 属性赋值转发给被代理的交易所
+    exchange.price = 9000
+    assert mock.price == 9000
+
+    labels = {"method": "fetch_order", "symbol": "BTC/USDT"}
+    assert registry.histogram("exchange_request_seconds", **labels).count == 1
+    assert registry.counter("exchange_request_errors_total", **labels).value == 1
+    assert registry.histogram("exchange_request_seconds", method="fetch_ticker", symbol="BTC/USDT").count == 1
+
+
+def test_strategy_records_tick_and_transitions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry = MetricsRegistry()
+    strategy = GridTradingStrategy(MockExchange(initial_price=10000, volatility=0), "BTC/USDT", metrics=registry)
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.01, grid_levels=10,
+                                 position_amount=100, initial_capital=10000, max_loss=0.2)
+    strategy.handle_price_change()
+    strategy.exchange.price = 9850
+    strategy.handle_price_change()
+
+    assert registry.histogram("strategy_tick_seconds", symbol="BTC/USDT").count == 2
+    assert registry.histogram("order_fill_detection_lag_seconds", symbol="BTC/USDT").count == 1
+    placed = registry.counter("order_transitions_total", symbol="BTC/USDT", side="buy",
+                              previous="none", status="pending")
+    filled = registry.counter("order_transitions_total", symbol="BTC/USDT", side="buy",
+                              previous="pending", status="filled")
+    assert placed.value == 6
+    assert filled.value == 1
+    assert registry.histogram("strategy_state_save_seconds", symbol="BTC/USDT", kind="delta").count == 2
+
+
+def test_metrics_endpoint():
+    registry = MetricsRegistry()
+    registry.counter("ticks_total").inc()
+    server = MetricsServer(registry, port=0).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+            assert "ticks_total 1" in response.read().decode("utf-8")
+    finally:
+        server.stop()
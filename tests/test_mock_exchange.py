@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from cryptogrid.mock_exchange import MockExchange
+
+
+@pytest.fixture
+def exchange():
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    exchange.balance['USDT'] = 1e6
+    return exchange
+
+
+def test_price_path_fills_crossed_orders(exchange):
+    low = exchange.create_limit_buy_order("BTC/USDT", 0.1, 9800)
+    high = exchange.create_limit_buy_order("BTC/USDT", 0.1, 9900)
+
+    # 价格下穿后又回到原处，订单也已经成交，不需要在低点时查询
+    exchange.price = 9850
+    exchange.price = 10000
+
+    assert exchange.fetch_order(high["id"], "BTC/USDT")["status"] == "filled"
+    assert exchange.fetch_order(low["id"], "BTC/USDT")["status"] == "open"
+    assert [order["id"] for order in exchange.fetch_open_orders("BTC/USDT")] == [low["id"]]
+    assert exchange.balance['BTC'] == pytest.approx(0.1)
+
+
+def test_price_time_priority_with_partial_fills():
+    exchange = MockExchange(initial_price=10000, volatility=0, liquidity=0.15)
+    exchange.balance['USDT'] = 1e6
+    first = exchange.create_limit_buy_order("BTC/USDT", 0.1, 9900)
+    second = exchange.create_limit_buy_order("BTC/USDT", 0.1, 9900)
+    better = exchange.create_limit_buy_order("BTC/USDT", 0.1, 9950)
+
+    exchange.price = 9800
+
+    # 价格更优的先成交，同价位先下单的先成交
+    assert exchange.fetch_order(better["id"], "BTC/USDT")["status"] == "filled"
+    partial = exchange.fetch_order(first["id"], "BTC/USDT")
+    assert partial["status"] == "open"
+    assert partial["filled"] == pytest.approx(0.05)
+    assert partial["remaining"] == pytest.approx(0.05)
+    assert exchange.fetch_order(second["id"], "BTC/USDT")["filled"] == 0
+
+    exchange.price = 9790
+    assert exchange.fetch_order(first["id"], "BTC/USDT")["status"] == "filled"
+    assert exchange.fetch_order(second["id"], "BTC/USDT")["filled"] == pytest.approx(0.1)
+
+
+def test_fees_and_cancel_refund():
+    exchange = MockExchange(initial_price=10000, volatility=0, fee_rate=0.001)
+    exchange.balance['USDT'] = 2000
+    buy = exchange.create_limit_buy_order("BTC/USDT", 0.1, 9900)
+    other = exchange.create_limit_buy_order("BTC/USDT", 0.1, 9000)
+    exchange.price = 9850
+
+    filled = exchange.fetch_order(buy["id"], "BTC/USDT")
+    assert filled["average"] == 9900
+    assert filled["fee"]["cost"] == pytest.approx(0.99)
+
+    cancelled = exchange.cancel_order(other["id"], "BTC/USDT")
+    assert cancelled["status"] == "closed"
+    assert exchange.balance['USDT'] == pytest.approx(2000 - 990 * 1.001)
+
+    sell = exchange.create_limit_sell_order("BTC/USDT", 0.1, 9850)
+    assert exchange.fetch_order(sell["id"], "BTC/USDT")["status"] == "filled"
+    assert exchange.balance['USDT'] == pytest.approx(2000 - 990 * 1.001 + 985 * 0.999)
+
+
+def test_cancelling_filled_order_keeps_it_filled(exchange):
+    order = exchange.create_limit_buy_order("BTC/USDT", 0.1, 9900)
+    exchange.price = 9850
+    assert exchange.cancel_order(order["id"], "BTC/USDT")["status"] == "filled"
+    with pytest.raises(Exception):
+        exchange.cancel_order(12345, "BTC/USDT")
+
+
+def test_closed_orders_are_bounded():
+    exchange = MockExchange(initial_price=10000, volatility=0, max_closed_orders=3)
+    exchange.balance['USDT'] = 1e6
+    ids = [exchange.create_limit_buy_order("BTC/USDT", 0.01, 9900)["id"] for _ in range(10)]
+    exchange.price = 9850
+
+    assert [order["id"] for order in exchange.fetch_closed_orders("BTC/USDT")] == ids[-3:]
+    assert len(exchange.orders) == 3
+
+
+def test_cancelled_orders_do_not_pile_up_in_book(exchange):
+    # 价格一路上涨，网格不断撤销远离当前价的深度买单
+    for i in range(1000):
+        order = exchange.create_limit_buy_order("BTC/USDT", 0.001, 5000 + i)
+        exchange.cancel_order(order["id"], "BTC/USDT")
+    kept = exchange.create_limit_buy_order("BTC/USDT", 0.001, 9000)
+
+    book = exchange._books["BTC/USDT"]
+    assert len(book.bids) <= 2 * len(book.open) + 1
+    exchange.price = 8900
+    assert exchange.fetch_order(kept["id"], "BTC/USDT")["status"] == "filled"
+    assert book.bids == []
+
+
+def test_watch_orders_pushes_fills(exchange):
+    async def scenario():
+        watcher = asyncio.ensure_future(exchange.watch_orders("BTC/USDT"))
+        await asyncio.sleep(0)
+        exchange.create_limit_buy_order("BTC/USDT", 0.1, 9900)
+        exchange.price = 9850
+        return await asyncio.wait_for(watcher, 1)
+
+    exchange.stream_interval = 0.01
+    updates = asyncio.run(scenario())
+    assert [order["status"] for order in updates] == ["filled"]
@@ -0,0 +1,95 @@
+import os
+from cryptogrid.order_history import OrderHistory
+from cryptogrid.ui_components import ORDER_PANEL_ROWS, create_order_status_panel
+
+
+def make_order(order_id, side="buy", timestamp=1000, status="filled"):
+    return {"id": order_id, "side": side, "price": 100.0, "amount": 0.1,
+            "status": status, "timestamp": timestamp, "lastTradeTimestamp": timestamp}
+
+
+def test_recent_orders_are_bounded(tmp_path):
+    history = OrderHistory(tmp_path / "orders.jsonl", maxlen=3)
+    for i in range(10):
+        history.append(make_order(i, timestamp=1000 + i))
+
+    assert [order["id"] for order in history] == [7, 8, 9]
+    assert [order["id"] for order in reversed(history)] == [9, 8, 7]
+    assert history.total == 10
+    # 较早的订单从文件中读取
+    assert history.get(2)["id"] == 2
+    assert history.get(99) is None
+
+
+def test_same_order_keeps_latest_record(tmp_path):
+    history = OrderHistory(tmp_path / "orders.jsonl")
+    history.append(make_order(1, status="open", timestamp=1000))
+    history.append(make_order(2, timestamp=1001))
+    history.append(make_order(1, status="filled", timestamp=1002))
+
+    assert [order["id"] for order in history] == [2, 1]
+    assert [order["status"] for order in history.query()] == ["filled", "filled"]
+    assert [order["id"] for order in history.query()] == [2, 1]
+
+
+def test_query_by_time_and_side(tmp_path):
+    history = OrderHistory(tmp_path / "orders.jsonl", maxlen=2)
+    for i in range(10):
+        history.append(make_order(i, side="buy" if i % 2 == 0 else "sell", timestamp=1000 + i))
+
+    assert [order["id"] for order in history.query(start=1003, end=1006)] == [3, 4, 5, 6]
+    assert [order["id"] for order in history.query(start=1003, side="sell")] == [3, 5, 7, 9]
+
+
+def test_index_rebuilt_from_file(tmp_path):
+    filename = tmp_path / "orders.jsonl"
+    history = OrderHistory(filename, maxlen=2)
+    for i in range(5):
+        history.append(make_order(i, timestamp=1000 + i))
+    history.close()
+
+    reopened = OrderHistory(filename, maxlen=2)
+    assert [order["id"] for order in reopened] == [3, 4]
+    assert reopened.get(0)["id"] == 0
+    assert [order["id"] for order in reopened.query(end=1001)] == [0, 1]
+
+
+def test_order_panel_shows_latest_rows(tmp_path):
+    history = OrderHistory(tmp_path / "orders.jsonl")
+    for i in range(ORDER_PANEL_ROWS + 10):
+        history.append(make_order(i))
+
+    class Holder:
+        history_orders = history
+
+    table = create_order_status_panel(Holder()).renderable
+    assert table.row_count == ORDER_PANEL_ROWS
+    assert table.columns[0]._cells[0] == str(ORDER_PANEL_ROWS + 9)
+
+
+def test_index_is_bounded(tmp_path):
+    history = OrderHistory(tmp_path / "orders.jsonl", maxlen=2, index_limit=8)
+    for i in range(30):
+        history.append(make_order(i, side="buy" if i % 2 == 0 else "sell", timestamp=1000 + i))
+
+    assert len(history._id_offsets) <= 8
+    assert len(history._time_index) <= 8
+    assert history.total == 30
+    # 移出索引的订单仍然可以查到
+    assert history.get(1)["id"] == 1
+    assert 3 in history
+    assert [order["id"] for order in history.query()] == list(range(30))
+    assert [order["id"] for order in history.query(start=1003, end=1006)] == [3, 4, 5, 6]
+    assert [order["id"] for order in history.query(start=1020, side="sell")] == [21, 23, 25, 27, 29]
+
+
+def test_reads_do_not_fsync(tmp_path, monkeypatch):
+    history = OrderHistory(tmp_path / "orders.jsonl", maxlen=1)
+    for i in range(3):
+        history.append(make_order(i, timestamp=1000 + i))
+    calls = []
+    monkeypatch.setattr(os, "fsync", lambda fd: calls.append(fd))
+
+    assert history.get(0)["id"] == 0
+    assert len(list(history.query())) == 3
+    assert calls == []
@@ -0,0 +1,99 @@
+import threading
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.portfolio import PortfolioRunner
+
+PARAMS = {"grid_size": 0.01, "grid_levels": 10, "position_amount": 100,
+          "initial_capital": 10000, "max_loss": 0.2}
+SYMBOLS = ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
+
+
+def make_runner(tmp_path, monkeypatch, **kwargs):
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    exchange.balance['USDT'] = 1e9
+    runner = PortfolioRunner(exchange, **kwargs)
+    for symbol in SYMBOLS:
+        runner.add_strategy(symbol, PARAMS)
+    return runner, exchange
+
+
+def test_tick_batches_requests_across_symbols(tmp_path, monkeypatch):
+    runner, exchange = make_runner(tmp_path, monkeypatch)
+    runner.tick()
+
+    # 第二轮没有新订单：一次批量行情 + 一次批量挂单，与交易对数量无关
+    assert runner.tick() == 2
+    for strategy in runner.strategies.values():
+        assert len(strategy.order_index) == 5
+
+
+def test_open_orders_are_fetched_per_symbol_when_exchange_warns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    exchange.balance['USDT'] = 1e9
+    # 与 ccxt binance 的默认设置相同：不带交易对查询挂单会报错
+    exchange.options = {"fetchOpenOrders": {"warnWithoutSymbol": True}}
+    runner = PortfolioRunner(exchange)
+    assert not runner.all_open_orders
+    for symbol in SYMBOLS:
+        runner.add_strategy(symbol, PARAMS)
+    runner.tick()
+
+    # 一次批量行情 + 每个交易对一次挂单查询
+    assert runner.tick() == 1 + len(SYMBOLS)
+    for strategy in runner.strategies.values():
+        assert len(strategy.order_index) == 5
+
+
+def test_failed_all_symbols_fetch_falls_back_to_per_symbol(tmp_path, monkeypatch):
+    runner, exchange = make_runner(tmp_path, monkeypatch)
+    original = exchange.fetch_open_orders
+
+    def fetch_open_orders(symbol=None):
+        if symbol is None:
+            raise Exception("binance fetchOpenOrders() WARNING: fetching open orders without specifying a symbol")
+        return original(symbol)
+
+    monkeypatch.setattr(exchange, "fetch_open_orders", fetch_open_orders)
+    runner.tick()
+    assert not runner.all_open_orders
+    exchange.price = 9850
+    runner.tick()
+    for strategy in runner.strategies.values():
+        assert len(strategy.history_orders) == 1
+
+
+def test_orders_are_dispatched_to_their_symbol(tmp_path, monkeypatch):
+    runner, exchange = make_runner(tmp_path, monkeypatch)
+    runner.tick()
+    exchange.price = 9850
+    runner.tick()
+
+    for strategy in runner.strategies.values():
+        assert len(strategy.history_orders) == 1
+        assert strategy.history_orders.recent()[0]["symbol"] == strategy.symbol
+
+
+def test_state_files_are_per_symbol_and_resume(tmp_path, monkeypatch):
+    runner, exchange = make_runner(tmp_path, monkeypatch)
+    runner.tick()
+    for strategy in runner.strategies.values():
+        strategy.save_strategy_state()
+    assert (tmp_path / "mock_ETHUSDT_strategy_state.json").exists()
+
+    resumed = PortfolioRunner(exchange)
+    strategy = resumed.add_strategy("ETH/USDT", PARAMS)
+    assert set(strategy.order_index) == set(runner.strategies["ETH/USDT"].order_index)
+
+
+def test_run_paces_requests(tmp_path, monkeypatch):
+    runner, _ = make_runner(tmp_path, monkeypatch, max_requests_per_second=1000, tick_interval=0)
+    waits = []
+    stop_event = threading.Event()
+    monkeypatch.setattr(stop_event, "wait", lambda timeout: waits.append(timeout) or len(waits) >= 3 and stop_event.set())
+
+    runner.max_requests_per_second = 2
+    runner.run(stop_event)
+
+    # 每轮至少2个请求，速率上限2次/秒，所以每轮至少间隔约1秒
+    assert all(wait > 0.5 for wait in waits)
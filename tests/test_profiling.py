@@ -0,0 +1,134 @@
+import os
+import pstats
+import signal
+import threading
+import time
+import pytest
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.profiling import Profiler
+from cryptogrid.strategy import GridTradingStrategy
+
+
+@pytest.fixture
+def strategy(tmp_path, monkeypatch):
+    # 状态文件和分析结果写到临时目录
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT")
+    strategy.set_strategy_params(
+        initial_price=10000,
+        grid_size=0.01,
+        grid_levels=10,
+        position_amount=100,
+        initial_capital=10000,
+        max_loss=0.2
+    )
+    return strategy
+
+
+def test_cprofile_captures_next_ticks(strategy, tmp_path):
+    profiler = Profiler(tmp_path / "profiles")
+    profiler.add_strategy(strategy)
+    strategy.handle_price_change()
+    assert not os.path.exists(tmp_path / "profiles")
+
+    profiler.profile_ticks(3)
+    for _ in range(2):
+        strategy.handle_price_change()
+    assert profiler.capturing
+    strategy.handle_price_change()
+    assert not profiler.capturing
+
+    files = os.listdir(tmp_path / "profiles")
+    assert len(files) == 1 and files[0].endswith(".prof")
+    stats = pstats.Stats(str(tmp_path / "profiles" / files[0]))
+    calls = {func[2]: stat[0] for func, stat in stats.stats.items()}
+    assert calls["_handle_price_change"] == 3
+
+    # 分析结束后不再写文件
+    strategy.handle_price_change()
+    assert len(os.listdir(tmp_path / "profiles")) == 1
+
+
+def test_sampling_writes_folded_stacks(tmp_path):
+    profiler = Profiler(tmp_path, sample_interval=0.001)
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop, name="busy")
+    worker.start()
+    try:
+        profiler.start_sampling()
+        time.sleep(0.1)
+        filename = profiler.stop_sampling()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profiler.stop_sampling() is None
+    with open(filename, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and all("busy_loop" in line for line in busy)
+    _, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert not any("profiler-sampler" in line for line in lines)
+
+
+def test_memory_snapshot_reports_growth(strategy, tmp_path):
+    profiler = Profiler(tmp_path / "profiles")
+    profiler.add_strategy(strategy)
+    try:
+        first = profiler.memory_snapshot()
+        strategy.handle_price_change()
+        second = profiler.memory_snapshot()
+    finally:
+        profiler.stop_memory()
+
+    with open(first, encoding="utf-8") as f:
+        report = f.read()
+    assert f"grid_levels={len(strategy.grid_levels)}" in report
+    assert "首次快照" in report
+    with open(second, encoding="utf-8") as f:
+        assert "与上一次快照相比" in f.read()
+    assert os.path.exists(second[:-len(".txt")] + ".tracemalloc")
+
+
+def test_commands_and_command_file(strategy, tmp_path):
+    profiler = Profiler(tmp_path / "profiles")
+    profiler.add_strategy(strategy)
+    profiler.command("cprofile 5")
+    assert profiler.capturing
+    with pytest.raises(ValueError):
+        profiler.command("flamegraph")
+
+    stop_event = threading.Event()
+    command_file = tmp_path / "profile.cmd"
+    command_file.write_text("sample start\n")
+    thread = profiler.watch(command_file, interval=0.01, stop_event=stop_event)
+    try:
+        deadline = time.monotonic() + 5
+        while not profiler.sampling and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert profiler.sampling
+        assert not command_file.exists()
+    finally:
+        stop_event.set()
+        thread.join()
+        profiler.stop_sampling()
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="需要 SIGUSR1")
+def test_signal_starts_tick_profile(tmp_path):
+    profiler = Profiler(tmp_path)
+    previous = signal.getsignal(signal.SIGUSR1), signal.getsignal(signal.SIGUSR2)
+    try:
+        profiler.install_signal_handlers(ticks=2)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert profiler.capturing
+    finally:
+        signal.signal(signal.SIGUSR1, previous[0])
+        signal.signal(signal.SIGUSR2, previous[1])
@@ -0,0 +1,87 @@
+import pytest
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.replay import (
+    MarketRecorder, RecordingExchange, ReplayExchange, ReplayFinished, iter_recording, replay
+)
+from cryptogrid.strategy import GridTradingStrategy
+
+PARAMS = {"grid_size": 0.01, "grid_levels": 10, "position_amount": 100,
+          "initial_capital": 10000, "max_loss": 0.2}
+
+
+def record(filename, count, seed=3):
+    exchange = MockExchange(initial_price=10000, volatility=0.005, seed=seed)
+    recorder = MarketRecorder(filename)
+    recording = RecordingExchange(exchange, recorder)
+    for _ in range(count):
+        recording.fetch_order_book("BTC/USDT", limit=5)
+    recorder.close()
+    return recorder.count
+
+
+def run_replay(filename, state_file):
+    exchange = ReplayExchange(filename)
+    exchange.balance['USDT'] = 1e9
+    strategy = GridTradingStrategy(exchange, "BTC/USDT", state_file=state_file)
+    strategy.set_strategy_params(initial_price=exchange.event.price, **PARAMS)
+    replay(strategy, exchange)
+    return strategy
+
+
+def test_seeded_mock_is_reproducible():
+    paths = []
+    for _ in range(2):
+        exchange = MockExchange(initial_price=10000, seed=42)
+        paths.append([exchange.fetch_ticker("BTC/USDT")["last"] for _ in range(100)])
+    assert paths[0] == paths[1]
+
+
+def test_recording_round_trip(tmp_path):
+    filename = tmp_path / "market.bin"
+    exchange = MockExchange(initial_price=10000, volatility=0, seed=1)
+    recorder = MarketRecorder(filename)
+    recording = RecordingExchange(exchange, recorder)
+    book = recording.fetch_order_book("BTC/USDT", limit=3)
+    ticker = recording.fetch_ticker("BTC/USDT")
+    recorder.close()
+
+    events = list(iter_recording(filename))
+    assert [event.kind for event in events] == ["order_book", "ticker"]
+    assert events[0].order_book() == {"timestamp": events[0].timestamp, "bids": book["bids"], "asks": book["asks"]}
+    assert events[1].last == ticker["last"]
+
+
+def test_truncated_recording_is_skipped(tmp_path):
+    filename = tmp_path / "market.bin"
+    record(filename, 5)
+    with open(filename, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 10)
+    assert len(list(iter_recording(filename))) == 4
+
+
+def test_replay_is_deterministic(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    filename = tmp_path / "market.bin"
+    assert record(filename, 800) == 800
+
+    first = run_replay(filename, "first.json")
+    second = run_replay(filename, "second.json")
+
+    assert first.history_orders.total > 0
+    assert [order["id"] for order in first.history_orders] == [order["id"] for order in second.history_orders]
+    assert first.capital == second.capital
+    assert first.pnl == pytest.approx(second.pnl)
+
+
+def test_replay_uses_simulated_clock(tmp_path):
+    filename = tmp_path / "market.bin"
+    record(filename, 3)
+    exchange = ReplayExchange(filename)
+    timestamps = [exchange.milliseconds()]
+    while True:
+        try:
+            exchange.advance()
+        except ReplayFinished:
+            break
+        timestamps.append(exchange.milliseconds())
+    assert timestamps == [event.timestamp for event in iter_recording(filename)]
@@ -0,0 +1,128 @@
+import threading
+import time
+import pytest
+from cryptogrid.mock_exchange import MockExchange, RateLimitExceeded
+from cryptogrid.scheduler import RequestScheduler, SlidingWindowLimiter
+from cryptogrid.strategy import GridTradingStrategy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_window_never_exceeds_limit():
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(limit=1200, window=60, clock=clock)
+    acquired = []
+    weights = [5, 1, 40, 4, 6, 20, 2]
+    for i in range(2000):
+        weight = weights[i % len(weights)]
+        wait = limiter.try_acquire(weight)
+        while wait:
+            clock.now += wait
+            wait = limiter.try_acquire(weight)
+        acquired.append((clock.now, weight))
+        clock.now += 0.01
+
+    # 以每次请求为窗口终点，窗口内的总权重都不超过限额
+    start = 0
+    total = 0
+    for now, weight in acquired:
+        total += weight
+        while acquired[start][0] <= now - 60:
+            total -= acquired[start][1]
+            start += 1
+        assert total <= 1200
+    assert clock.now > 60 * 5
+
+
+def test_mock_exchange_enforces_limit():
+    exchange = MockExchange(initial_price=10000, volatility=0, request_limit=3, request_window=10)
+    for _ in range(3):
+        exchange.fetch_ticker("BTC/USDT")
+    with pytest.raises(RateLimitExceeded):
+        exchange.fetch_ticker("BTC/USDT")
+
+
+def test_scheduler_stays_under_exchange_limit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0, request_limit=20, request_window=0.2)
+    # 留出余量：调度器在发出请求前计时，模拟交易所在收到请求后计时，两者的窗口边界略有偏差
+    weights = {"fetch_order_book": 1, "fetch_open_orders": 1, "fetch_order": 1}
+    scheduler = RequestScheduler(exchange, weight_limit=10, window=0.2, weights=weights)
+    strategy = GridTradingStrategy(scheduler, "BTC/USDT")
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.01, grid_levels=10,
+                                 position_amount=100, initial_capital=10000, max_loss=0.2)
+    for _ in range(20):
+        strategy.handle_price_change()
+    assert len(strategy.order_index) == 5
+
+
+def test_orders_jump_ahead_of_polling():
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    exchange.create_limit_buy_order("BTC/USDT", 0.01, 9000)
+    scheduler = RequestScheduler(exchange, weight_limit=4, window=0.4)
+    scheduler.bucket.drain()
+    finished = []
+
+    def call(name, *args):
+        getattr(scheduler, name)(*args)
+        finished.append(name)
+
+    poller = threading.Thread(target=call, args=("fetch_order", 1, "BTC/USDT"))
+    poller.start()
+    time.sleep(0.05)
+    trader = threading.Thread(target=call, args=("cancel_order", 1, "BTC/USDT"))
+    trader.start()
+    poller.join()
+    trader.join()
+
+    # 撤单后到，但在轮询之前执行
+    assert finished == ["cancel_order", "fetch_order"]
+
+
+def test_duplicate_fetch_order_is_coalesced():
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    exchange.create_limit_buy_order("BTC/USDT", 0.01, 9000)
+    calls = []
+    original = exchange.fetch_order
+
+    def slow_fetch_order(order_id, symbol):
+        calls.append(order_id)
+        time.sleep(0.1)
+        return original(order_id, symbol)
+
+    exchange.fetch_order = slow_fetch_order
+    scheduler = RequestScheduler(exchange)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(scheduler.fetch_order(1, "BTC/USDT")))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert len(results) == 5 and all(result["id"] == 1 for result in results)
+
+
+def test_rate_limit_error_drains_bucket():
+    exchange = MockExchange(initial_price=10000, volatility=0, request_limit=1, request_window=10)
+    scheduler = RequestScheduler(exchange, weight_limit=100, window=1)
+    scheduler.fetch_ticker("BTC/USDT")
+    with pytest.raises(RateLimitExceeded):
+        scheduler.fetch_ticker("BTC/USDT")
+    assert scheduler.bucket.tokens < 1
+
+
+def test_open_orders_without_symbol_cost_more():
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    scheduler = RequestScheduler(exchange, weight_limit=1200, window=60)
+    scheduler.fetch_open_orders("BTC/USDT")
+    assert scheduler.bucket.tokens == 1200 - 6
+    scheduler.fetch_open_orders()
+    assert scheduler.bucket.tokens == 1200 - 6 - 80
@@ -0,0 +1,82 @@
+import threading
+import pytest
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.snapshot import SnapshotChannel
+from cryptogrid.strategy import GridTradingStrategy
+
+
+@pytest.fixture
+def strategy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    strategy = GridTradingStrategy(MockExchange(initial_price=10000, volatility=0), "BTC/USDT")
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.01, grid_levels=10,
+                                 position_amount=100, initial_capital=10000, max_loss=0.2)
+    return strategy
+
+
+def test_one_snapshot_per_tick(strategy):
+    first = strategy.snapshots.latest
+    strategy.exchange.price = 10010
+    strategy.handle_price_change()
+    second = strategy.snapshots.latest
+
+    assert second.version == first.version + 1
+    assert second.market_depth["bids"][0][0] == strategy.current_price
+    assert sum(1 for level in second.grid_levels.values() if level.buy_order_status == "pending") == 5
+
+
+def test_snapshot_is_not_affected_by_later_ticks(strategy):
+    strategy.handle_price_change()
+    snapshot = strategy.snapshots.latest
+    strategy.exchange.price = 9850
+    strategy.handle_price_change()
+
+    assert snapshot.capital == 10000
+    assert snapshot.history_orders == ()
+    assert all(level.buy_order_status != "filled" for level in snapshot.grid_levels.values())
+    with pytest.raises(TypeError):
+        snapshot.grid_levels[9900.0] = None
+
+
+def test_unchanged_levels_reuse_views(strategy):
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    before = strategy.snapshots.latest
+    strategy.handle_price_change()
+    after = strategy.snapshots.latest
+
+    for price in before.grid:
+        assert after.grid_levels[price] is before.grid_levels[price]
+
+
+def test_unchanged_tick_publishes_nothing(strategy):
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    before = strategy.snapshots.latest
+    strategy.handle_price_change()
+    assert strategy.snapshots.latest is before
+
+
+def test_price_change_reuses_level_mapping(strategy):
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    before = strategy.snapshots.latest
+    strategy.exchange.price = 9980
+    strategy.handle_price_change()
+    after = strategy.snapshots.latest
+
+    assert after.version == before.version + 1
+    assert after.current_price != before.current_price
+    assert after.grid is before.grid
+    assert after.grid_levels is before.grid_levels
+
+
+def test_wait_for_update():
+    channel = SnapshotChannel()
+    assert channel.wait_for_update(0, timeout=0.01) is None
+
+    class Snapshot:
+        version = 1
+
+    threading.Timer(0.05, channel.publish, args=(Snapshot(),)).start()
+    assert channel.wait_for_update(0, timeout=1).version == 1
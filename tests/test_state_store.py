@@ -0,0 +1,135 @@
+import pytest
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.state_store import SQLiteStateStore
+from cryptogrid.strategy import GridTradingStrategy, OrderStatus
+
+PARAMS = {"grid_size": 0.01, "grid_levels": 10, "position_amount": 100,
+          "initial_capital": 10000, "max_loss": 0.2}
+# 9900 档买单按成交价记账：100 USDT 对应的数量向下取整到 0.00001
+BUY_COST = 0.0101 * 9900
+
+
+@pytest.fixture
+def exchange():
+    return MockExchange(initial_price=10000, volatility=0)
+
+
+def start(exchange, db):
+    store = SQLiteStateStore(db)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT", store=store)
+    if store.has_state("BTC/USDT"):
+        strategy.recover()
+    else:
+        strategy.set_strategy_params(initial_price=10000, **PARAMS)
+    return strategy, store
+
+
+def test_state_survives_restart(tmp_path, exchange):
+    db = tmp_path / "state.db"
+    strategy, store = start(exchange, db)
+    strategy.handle_price_change()
+    exchange.price = 9850
+    strategy.handle_price_change()
+    store.close()
+
+    restored, store = start(exchange, db)
+    assert restored.capital == pytest.approx(strategy.capital)
+    assert restored.position == pytest.approx(strategy.position)
+    assert set(restored.order_index) == set(strategy.order_index)
+    assert [order["id"] for order in restored.history_orders] == [order["id"] for order in strategy.history_orders]
+    assert [order["side"] for order in restored.history_orders.query(side="buy")] == ["buy"]
+    store.close()
+
+
+def test_recover_applies_fills_that_happened_while_down(tmp_path, exchange):
+    db = tmp_path / "state.db"
+    strategy, store = start(exchange, db)
+    strategy.handle_price_change()
+    store.close()
+
+    # 程序停止期间价格下跌，最近的买单成交
+    exchange.price = 9850
+    restored, store = start(exchange, db)
+    filled = [level for level in restored.grid_levels.values() if level.buy_order_status is OrderStatus.FILLED]
+    assert len(filled) == 1
+    assert restored.capital == pytest.approx(10000 - BUY_COST)
+    store.close()
+
+
+def test_recover_adopts_or_cancels_only_own_orders(tmp_path, exchange):
+    db = tmp_path / "state.db"
+    strategy, store = start(exchange, db)
+    strategy.handle_price_change()
+    store.close()
+
+    # 模拟下单后、提交状态前崩溃：交易所上有本地没有记录的挂单
+    free_level = max((level for level in strategy.grid_levels.values()
+                      if level.price < 10000 and level.buy_order_status is OrderStatus.NONE), key=lambda level: level.tick)
+    own = {"clientOrderId": strategy._client_order_id(free_level, "buy")}
+    adopted = exchange.create_limit_buy_order("BTC/USDT", 0.01, free_level.price, params=own)
+    stray = exchange.create_limit_buy_order("BTC/USDT", 0.01, 1234.5, params={"clientOrderId": "cgrid-b1-stray"})
+    # 手动下的单和其他实例的订单不属于本策略
+    manual = exchange.create_limit_buy_order("BTC/USDT", 0.01, 1234.5)
+    other = exchange.create_limit_buy_order("BTC/USDT", 0.01, 1234.5, params={"clientOrderId": "other-b1-x"})
+
+    restored, store = start(exchange, db)
+    assert str(adopted["id"]) in restored.order_index
+    assert restored.grid_levels[free_level.tick].buy_order == adopted["id"]
+    assert exchange.fetch_order(stray["id"], "BTC/USDT")["status"] == "closed"
+    for order in (manual, other):
+        assert exchange.fetch_order(order["id"], "BTC/USDT")["status"] == "open"
+        assert str(order["id"]) not in restored.order_index
+    store.close()
+
+
+def test_recover_against_new_exchange_releases_unknown_orders(tmp_path, exchange):
+    db = tmp_path / "state.db"
+    strategy, store = start(exchange, db)
+    strategy.handle_price_change()
+    store.close()
+
+    # 交易所换成新的实例（例如模拟交易所随进程重启），原来的订单都查不到
+    fresh = MockExchange(initial_price=10000, volatility=0)
+    restored, store = start(fresh, db)
+    assert restored.order_index == {}
+    assert all(level.buy_order_status is OrderStatus.NONE for level in restored.grid_levels.values())
+    assert restored.capital == pytest.approx(10000)
+
+    restored.handle_price_change()
+    assert len(restored.order_index) == 5
+    assert all(fresh.fetch_order(order_id, "BTC/USDT")["status"] == "open" for order_id in restored.order_index)
+    store.close()
+
+
+def test_completed_trades_are_stored(tmp_path, exchange):
+    strategy, store = start(exchange, tmp_path / "state.db")
+    strategy.handle_price_change()
+    exchange.price = 9850
+    strategy.handle_price_change()
+    exchange.price = 10100
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+
+    trades = list(strategy.trade_journal)
+    assert len(trades) == 1
+    assert trades[0]["price"] == pytest.approx(9900)
+    store.close()
+
+
+def test_rename_symbol_moves_old_state(tmp_path, exchange):
+    db = tmp_path / "state.db"
+    store = SQLiteStateStore(db)
+    strategy = GridTradingStrategy(exchange, "BTCUSDT", store=store)
+    strategy.set_strategy_params(initial_price=10000, **PARAMS)
+    strategy.handle_price_change()
+    strategy.save_strategy_state()
+    assert store.rename_symbol("BTCUSDT", "BTC/USDT")
+    assert not store.has_state("BTCUSDT")
+    assert not store.rename_symbol("BTCUSDT", "BTC/USDT")
+    store.close()
+
+    restored, store = start(exchange, db)
+    assert restored.symbol == "BTC/USDT"
+    assert set(restored.order_index) == set(strategy.order_index)
+    assert len(restored.history_orders) == len(strategy.history_orders)
+    store.close()
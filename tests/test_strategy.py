@@ -0,0 +1,322 @@
+import json
+import pytest
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy, OrderStatus
+
+# 9900 档买单按成交价记账：100 USDT 对应的数量向下取整到 0.00001
+BUY_COST = 0.0101 * 9900
+
+
+@pytest.fixture
+def strategy(tmp_path, monkeypatch):
+    # 状态文件写到临时目录
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT")
+    strategy.set_strategy_params(
+        initial_price=10000,
+        grid_size=0.01,
+        grid_levels=10,
+        position_amount=100,
+        initial_capital=10000,
+        max_loss=0.2
+    )
+    return strategy
+
+
+def count_calls(monkeypatch, exchange, name):
+    calls = []
+    original = getattr(exchange, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(exchange, name, wrapper)
+    return calls
+
+
+def test_reconcile_uses_one_bulk_call(strategy, monkeypatch):
+    strategy.handle_price_change()
+    assert len(strategy.order_index) == 5
+
+    bulk_calls = count_calls(monkeypatch, strategy.exchange, "fetch_open_orders")
+    single_calls = count_calls(monkeypatch, strategy.exchange, "fetch_order")
+    strategy.handle_price_change()
+
+    # 所有挂单都在批量结果里，不需要逐个查询
+    assert len(bulk_calls) == 1
+    assert single_calls == []
+
+
+def test_reconcile_falls_back_for_missing_orders(strategy, monkeypatch):
+    strategy.handle_price_change()
+    single_calls = count_calls(monkeypatch, strategy.exchange, "fetch_order")
+
+    # 价格下跌一档，最近的买单成交后不再出现在挂单列表中
+    strategy.exchange.price = 9850
+    strategy.handle_price_change()
+
+    assert len(single_calls) == 1
+    filled = [level for level in strategy.grid_levels.values() if level.buy_order_status == "filled"]
+    assert len(filled) == 1
+    assert filled[0].sell_order_status == "pending"
+    assert strategy.capital == pytest.approx(10000 - BUY_COST)
+
+
+def test_filled_order_is_accounted_once(strategy):
+    strategy.handle_price_change()
+    strategy.exchange.price = 9850
+    for _ in range(3):
+        strategy.handle_price_change()
+
+    assert strategy.capital == pytest.approx(10000 - BUY_COST)
+    assert len(strategy.history_orders) == 1
+
+
+def test_unknown_order_status_keeps_previous_status(strategy):
+    strategy.handle_price_change()
+    order_id, (level, side) = next(iter(strategy.order_index.items()))
+    previous = level.buy_order_status
+
+    for status in (None, "weird_status"):
+        strategy.apply_order_updates([{"id": order_id, "status": status}])
+    assert level.buy_order_status is previous
+    assert order_id in strategy.order_index
+
+    strategy.apply_order_updates([{"id": order_id, "status": "partially_filled"}])
+    assert level.buy_order_status is OrderStatus.OPEN
+    # 之后的 tick 照常运行
+    strategy.handle_price_change()
+
+
+def test_partial_fills_are_booked_incrementally(strategy):
+    strategy.handle_price_change()
+    order_id, (level, _) = max(strategy.order_index.items(), key=lambda item: item[1][0].tick)
+    order = dict(strategy.exchange.fetch_order(order_id, "BTC/USDT"))
+
+    def update(status, filled, fee):
+        strategy.apply_order_updates([{**order, "status": status, "filled": filled, "average": 9900,
+                                       "fee": {"cost": fee, "currency": "USDT"}}])
+
+    update("open", 0.004, 0.04)
+    assert strategy.position == pytest.approx(0.004)
+    assert strategy.capital == pytest.approx(10000 - 0.004 * 9900 - 0.04)
+    # 重复的更新不会重复记账
+    update("open", 0.004, 0.04)
+    assert strategy.position == pytest.approx(0.004)
+
+    # 部分成交后撤单，已成交的部分仍然记入持仓
+    update("canceled", 0.006, 0.06)
+    assert strategy.position == pytest.approx(0.006)
+    assert strategy.capital == pytest.approx(10000 - 0.006 * 9900 - 0.06)
+    assert strategy.fees == pytest.approx(0.06)
+    assert order_id not in strategy.order_index
+    assert len(strategy.history_orders) == 1
+
+
+def test_cancelled_partial_fill_matches_exchange(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0, liquidity=0.004)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT")
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.01, grid_levels=10,
+                                 position_amount=100, initial_capital=10000, max_loss=0.2)
+    strategy.handle_price_change()
+    order_id = max(strategy.order_index.items(), key=lambda item: item[1][0].tick)[0]
+    # 只成交一部分后撤单
+    exchange.price = 9895
+    exchange.fetch_order_book("BTC/USDT")
+    exchange.price = 10000
+    exchange.cancel_order(order_id, "BTC/USDT")
+    strategy.handle_price_change()
+
+    order = exchange.fetch_order(order_id, "BTC/USDT")
+    assert order["status"] == "closed" and 0 < order["filled"] < order["amount"]
+    assert strategy.position == pytest.approx(order["filled"])
+    assert strategy.position == pytest.approx(exchange.balance["BTC"])
+
+
+def test_reconcile_without_bulk_support(strategy, monkeypatch):
+    strategy.handle_price_change()
+    monkeypatch.setattr(strategy.exchange, "has", {})
+    single_calls = count_calls(monkeypatch, strategy.exchange, "fetch_order")
+
+    strategy.reconcile_orders()
+
+    assert len(single_calls) == len(strategy.order_index)
+
+
+def test_round_trip_is_journaled(strategy, tmp_path):
+    from cryptogrid.trade_journal import TradeJournal, iter_journal
+
+    strategy.trade_journal = TradeJournal(tmp_path / "trades.jsonl")
+    strategy.handle_price_change()
+    strategy.exchange.price = 9850
+    strategy.handle_price_change()
+    strategy.exchange.price = 10200
+    strategy.handle_price_change()
+
+    trades = list(iter_journal(tmp_path / "trades.jsonl"))
+    assert len(trades) == 1
+    assert trades[0]["price"] == 9900
+    assert trades[0]["buy_executed_price"] == 9900
+
+
+def test_order_status_parses_exchange_values():
+    from cryptogrid.strategy import OrderStatus
+
+    assert OrderStatus("filled") is OrderStatus.FILLED
+    assert OrderStatus("canceled") is OrderStatus.CLOSED
+    assert OrderStatus.NONE == "未下单"
+    assert str(OrderStatus.OPEN) == "open"
+
+
+def test_grid_level_is_compact_and_round_trips():
+    from cryptogrid.strategy import GridLevel, OrderStatus
+
+    level = GridLevel(10000, 100.0)
+    assert not hasattr(level, "__dict__")
+    level.buy_order_status = OrderStatus.FILLED
+    level.buy_order = 7
+
+    restored = GridLevel(10000, 100.0)
+    restored.update(json.loads(json.dumps(level.to_dict())))
+    assert restored.buy_order_status is OrderStatus.FILLED
+    assert restored.to_dict() == level.to_dict()
+
+
+def test_rebalance_uses_one_batch_request(strategy, monkeypatch):
+    batch_calls = count_calls(monkeypatch, strategy.exchange, "create_orders")
+    single_calls = count_calls(monkeypatch, strategy.exchange, "create_limit_buy_order")
+    strategy.handle_price_change()
+
+    assert len(batch_calls) == 1
+    assert single_calls == []
+    assert len(strategy.order_index) == 5
+
+
+def test_rebalance_without_batch_endpoint_is_concurrent(strategy, monkeypatch):
+    import time
+
+    monkeypatch.setattr(strategy.exchange, "has", {"fetchOpenOrders": True})
+    create = strategy.exchange.create_limit_buy_order
+
+    def slow_create(*args, **kwargs):
+        time.sleep(0.1)
+        return create(*args, **kwargs)
+
+    monkeypatch.setattr(strategy.exchange, "create_limit_buy_order", slow_create)
+    started = time.perf_counter()
+    strategy.handle_price_change()
+
+    # 5个买单并发发送，总耗时接近一次往返
+    assert time.perf_counter() - started < 0.3
+    assert len({level.buy_order for level in strategy.grid_levels.values() if level.buy_order}) == 5
+
+
+def test_batch_cancel_marks_levels_closing(strategy, monkeypatch):
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    cancel_calls = count_calls(monkeypatch, strategy.exchange, "cancel_orders")
+
+    # 价格大涨，原来的5个买单都超出窗口
+    strategy.exchange.price = 12000
+    strategy.handle_price_change()
+
+    assert len(cancel_calls) == 1
+    assert len(cancel_calls[0][0]) == 5
+    strategy.handle_price_change()
+    assert all(level.buy_order_status != "closing" for level in strategy.grid_levels.values())
+
+
+def test_failed_cancel_in_batch_stays_tracked(strategy, monkeypatch):
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    original = strategy.exchange.cancel_orders
+    failed = next(iter(strategy.order_index))
+
+    def cancel_orders(ids, symbol=None):
+        results = original([order_id for order_id in ids if str(order_id) != failed], symbol)
+        index = [str(order_id) for order_id in ids].index(failed)
+        return results[:index] + [{"id": None, "info": "撤单失败"}] + results[index:]
+
+    monkeypatch.setattr(strategy.exchange, "cancel_orders", cancel_orders)
+    strategy.exchange.price = 12000
+    strategy.handle_price_change()
+
+    level, side = strategy.order_index[failed]
+    assert level.buy_order_status is OrderStatus.OPEN
+    closing = [level for level in strategy.grid_levels.values() if level.buy_order_status is OrderStatus.CLOSING]
+    assert len(closing) == 4
+
+    # 下个 tick 重新撤销仍挂着的订单
+    monkeypatch.setattr(strategy.exchange, "cancel_orders", original)
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    assert failed not in strategy.order_index
+
+
+class NotSupported(Exception):
+    # 与 ccxt 的异常同名，binance 现货的 create_orders 会抛出
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+def test_unsupported_batch_endpoints_fall_back_to_single_requests(strategy, monkeypatch):
+    batch_calls = []
+
+    def create_orders(requests):
+        batch_calls.append("create_orders")
+        raise NotSupported("create_orders() is not supported for spot markets")
+
+    def cancel_orders(ids, symbol=None):
+        batch_calls.append("cancel_orders")
+        raise BadRequest("cancel_orders() is only supported for swap markets")
+
+    monkeypatch.setattr(strategy.exchange, "create_orders", create_orders)
+    monkeypatch.setattr(strategy.exchange, "cancel_orders", cancel_orders)
+    strategy.handle_price_change()
+    assert len(strategy.order_index) == 5
+
+    strategy.exchange.price = 12000
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    assert all(level.buy_order_status is OrderStatus.NONE for level in strategy.grid_levels.values()
+               if level.price < 10000)
+
+    # 失败一次后记住，之后的 tick 不再尝试批量接口
+    assert batch_calls == ["create_orders", "cancel_orders"]
+
+
+def test_failed_cancel_without_batch_endpoint_stays_tracked(strategy, monkeypatch):
+    monkeypatch.setattr(strategy.exchange, "has", {"fetchOpenOrders": True})
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+    original = strategy.exchange.cancel_order
+    failed = next(iter(strategy.order_index))
+
+    def cancel_order(order_id, symbol=None):
+        if str(order_id) == failed:
+            raise RuntimeError("撤单失败")
+        return original(order_id, symbol)
+
+    monkeypatch.setattr(strategy.exchange, "cancel_order", cancel_order)
+    strategy.exchange.price = 12000
+    strategy.handle_price_change()
+
+    level, side = strategy.order_index[failed]
+    assert level.buy_order_status is OrderStatus.OPEN
+    closing = [level for level in strategy.grid_levels.values() if level.buy_order_status is OrderStatus.CLOSING]
+    assert len(closing) == 4
+
+
+def test_rejected_order_in_batch_is_skipped(strategy):
+    strategy.exchange.balance['USDT'] = 250
+    strategy.handle_price_change()
+
+    # 余额只够下两单，其余被拒绝的档位保持未下单
+    placed = [level for level in strategy.grid_levels.values() if level.buy_order]
+    assert len(placed) == 2
@@ -0,0 +1,64 @@
+import os
+import signal
+import time
+import pytest
+from cryptogrid.metrics import MetricsRegistry
+from cryptogrid.supervisor import Supervisor, shard_symbols
+
+PARAMS = {"grid_size": 0.01, "grid_levels": 10, "position_amount": 100,
+          "initial_capital": 10000, "max_loss": 0.2}
+SYMBOLS = ["BTC/USDT", "ETH/USDT", "SOL/USDT", "XRP/USDT"]
+
+
+def wait_for(supervisor, condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待工作进程超时"
+        supervisor.poll(0.1)
+
+
+def test_shard_symbols():
+    assert shard_symbols(SYMBOLS, 3) == [["BTC/USDT", "XRP/USDT"], ["ETH/USDT"], ["SOL/USDT"]]
+    assert shard_symbols(SYMBOLS[:1], 4) == [["BTC/USDT"]]
+
+
+def test_registry_snapshot_merges_across_processes():
+    totals = MetricsRegistry()
+    for _ in range(2):
+        registry = MetricsRegistry()
+        registry.counter("orders_total", symbol="BTC/USDT").inc(3)
+        registry.histogram("tick_seconds", buckets=(0.1, 1.0)).observe(0.5)
+        totals.merge(registry.snapshot())
+    assert totals.counter("orders_total", symbol="BTC/USDT").value == 6
+    assert totals.histogram("tick_seconds", buckets=(0.1, 1.0)).count == 2
+
+
+def test_supervisor_runs_shards_and_restarts_crashed_workers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    supervisor = Supervisor(SYMBOLS, PARAMS, workers=2, state_db=str(tmp_path / "state.db"),
+                            tick_interval=0.1, restart_delay=0.1)
+    supervisor.start()
+    try:
+        wait_for(supervisor, lambda: len(supervisor.status) == 2)
+        assert set(supervisor.summaries()) == set(SYMBOLS)
+        # 工作进程生成网格前加载了市场精度
+        assert (tmp_path / "markets_cache.json").exists()
+        assert "strategy_tick_seconds_count" in supervisor.render()
+
+        # 模拟工作进程崩溃，主进程重启它并从状态库恢复
+        crashed = supervisor.status[0]["pid"]
+        os.kill(crashed, signal.SIGKILL)
+        wait_for(supervisor, lambda: supervisor.restarts[0] == 1 and supervisor.status[0]["pid"] != crashed)
+        assert set(supervisor.status[0]["summaries"]) == {"BTC/USDT", "SOL/USDT"}
+
+        # 重启后的进程稳定运行后清零重启次数，下次崩溃重新从最短的等待时间开始
+        supervisor.stable_period = 0
+        wait_for(supervisor, lambda: supervisor.restarts[0] == 0)
+
+        supervisor.command("status", shard=1)
+        assert supervisor.poll(5) >= 1
+        with pytest.raises(ValueError):
+            supervisor.command("reboot")
+    finally:
+        supervisor.stop()
+    assert all(not process.is_alive() for process in supervisor.processes.values())
@@ -0,0 +1,45 @@
+import csv
+import numpy as np
+import pytest
+from cryptogrid.backtest import run_backtest
+from cryptogrid.sweep import expand_param_grid, run_sweep
+
+
+def test_expand_param_grid():
+    combos = expand_param_grid({"grid_size": [0.01, 0.02], "grid_count": [5, 10, 20]})
+    assert len(combos) == 6
+    assert {"grid_size": 0.02, "grid_count": 20} in combos
+
+
+def test_sweep_ranks_results(tmp_path):
+    rng = np.random.default_rng(3)
+    prices = 10000 * np.exp(np.cumsum(rng.normal(0, 0.004, 2000)))
+    param_grid = {"grid_size": [0.005, 0.01], "grid_count": [5, 10], "position_amount": [100]}
+    output = tmp_path / "results.csv"
+
+    rows = run_sweep(prices, param_grid, workers=2, output=str(output))
+
+    assert len(rows) == 4
+    assert [row["pnl"] for row in rows] == sorted((row["pnl"] for row in rows), reverse=True)
+    best = rows[0]
+    expected = run_backtest(prices, grid_size=best["grid_size"], grid_count=best["grid_count"],
+                            position_amount=100, initial_capital=10000)
+    assert best["pnl"] == pytest.approx(expected["pnl"])
+
+    with open(output) as f:
+        table = list(csv.DictReader(f))
+    assert [int(row["rank"]) for row in table] == [1, 2, 3, 4]
+
+
+def test_sweep_writes_extra_params(tmp_path):
+    rng = np.random.default_rng(5)
+    prices = 10000 * np.exp(np.cumsum(rng.normal(0, 0.004, 500)))
+    param_grid = {"grid_size": [0.01], "grid_count": [5], "position_amount": [100], "fee_rate": [0, 0.001]}
+    output = tmp_path / "results.csv"
+
+    rows = run_sweep(prices, param_grid, workers=2, output=str(output))
+
+    with open(output) as f:
+        table = list(csv.DictReader(f))
+    assert sorted(float(row["fee_rate"]) for row in table) == [0, 0.001]
+    assert {row["fee_rate"] for row in rows} == {0, 0.001}
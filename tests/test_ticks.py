@@ -0,0 +1,62 @@
+import json
+import pytest
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy, generate_grid
+from cryptogrid.ticks import DECIMAL_PLACES, PriceScale, market_scale
+
+
+def test_price_scale_round_trips():
+    scale = PriceScale(0.01, 0.00001)
+    assert scale.to_ticks(9900.0) == 990000
+    assert scale.to_price(990000) == 9900.0
+    assert scale.to_price(980299) == 9802.99
+    # 数量向下取整，不会超过可用资金
+    assert scale.quantize_amount(100 / 9900) == 0.0101
+    assert scale.to_lots(0.3) == 30000
+
+
+def test_scale_from_market_precision():
+    market = {"precision": {"price": 0.5, "amount": 0.001}}
+    scale = PriceScale.from_market(market)
+    assert (scale.tick_size, scale.lot_size, scale.price_digits) == (0.5, 0.001, 1)
+    scale = PriceScale.from_market({"precision": {"price": 2, "amount": 4}}, DECIMAL_PLACES)
+    assert (scale.tick_size, scale.lot_size) == (0.01, 0.0001)
+
+    exchange = MockExchange(initial_price=10000)
+    assert market_scale(exchange, "BTC/USDT").tick_size == 0.01
+    exchange.load_markets()
+    exchange.markets["BTC/USDT"]["precision"]["price"] = 0.1
+    assert market_scale(exchange, "BTC/USDT").tick_size == 0.1
+
+
+def test_grid_is_integer_ticks():
+    grid = generate_grid(10000, 0.01, 10)
+    assert all(isinstance(tick, int) for tick in grid)
+    assert grid == sorted(grid, reverse=True)
+    assert 1000000 in grid and 990000 in grid and 1010000 in grid
+    # 档位间距小于 tick 时取整后重复的档位只保留一个
+    assert len(generate_grid(1, 0.0001, 10)) == 1
+
+
+def test_orders_use_ticks_and_lots(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT")
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.01, grid_levels=10,
+                                 position_amount=100, initial_capital=10000, max_loss=0.2)
+    strategy.handle_price_change()
+    exchange.price = 9850
+    strategy.handle_price_change()
+    strategy.handle_price_change()
+
+    sell = exchange.fetch_order(strategy.grid_levels[990000].sell_order, "BTC/USDT")
+    assert sell["price"] == 10000.0
+    assert sell["amount"] == strategy.scale.quantize_amount(100 / 10000)
+
+    strategy.save_strategy_state()
+    with open("strategy_state.json", encoding="utf-8") as f:
+        state = json.load(f)
+    assert "990000" in state["grid_levels"]
+    restored = GridTradingStrategy(exchange, "BTC/USDT", load_from_file=True)
+    assert set(restored.grid_levels) == set(strategy.grid_levels)
+    assert restored.grid_levels[990000].price == pytest.approx(9900)
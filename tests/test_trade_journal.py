@@ -0,0 +1,51 @@
+from cryptogrid.trade_journal import TradeJournal, iter_journal, read_journal_record
+
+
+def test_append_and_stream(tmp_path):
+    journal = TradeJournal(tmp_path / "trades.jsonl", fsync_every=10)
+    for i in range(25):
+        journal.append({"price": 100 + i, "amount": 0.1})
+    journal.close()
+
+    records = list(iter_journal(tmp_path / "trades.jsonl"))
+    assert [r["price"] for r in records] == list(range(100, 125))
+
+
+def test_append_keeps_existing_records(tmp_path):
+    filename = tmp_path / "trades.jsonl"
+    TradeJournal(filename).append({"price": 1})
+    TradeJournal(filename).append({"price": 2})
+
+    assert [r["price"] for r in iter_journal(filename)] == [1, 2]
+
+
+def test_truncated_tail_is_skipped(tmp_path):
+    filename = tmp_path / "trades.jsonl"
+    journal = TradeJournal(filename)
+    journal.append({"price": 1})
+    journal.close()
+    # 模拟崩溃时写了一半的记录
+    with open(filename, "a") as f:
+        f.write('{"price": 2, "amo')
+
+    assert [r["price"] for r in iter_journal(filename)] == [1]
+
+
+def test_append_after_truncated_tail(tmp_path):
+    filename = tmp_path / "trades.jsonl"
+    journal = TradeJournal(filename)
+    journal.append({"price": 1})
+    journal.close()
+    with open(filename, "a") as f:
+        f.write('{"price": 2, "amo')
+
+    journal = TradeJournal(filename)
+    offset = journal.append({"price": 3})
+    journal.close()
+
+    assert [r["price"] for r in iter_journal(filename)] == [1, 3]
+    assert read_journal_record(filename, offset) == {"price": 3}
+
+
+def test_missing_file_yields_nothing(tmp_path):
+    assert list(iter_journal(tmp_path / "missing.jsonl")) == []
@@ -0,0 +1,46 @@
+from rich.console import Console
+from cryptogrid.mock_exchange import MockExchange
+from cryptogrid.strategy import GridTradingStrategy
+from cryptogrid.ui_components import create_grid_status_panel
+
+
+def render(renderable):
+    console = Console(width=120, record=True)
+    console.print(renderable)
+    return console.export_text()
+
+
+def test_grid_status_panel_shows_order_states(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    strategy = GridTradingStrategy(MockExchange(initial_price=10000, volatility=0), "BTC/USDT")
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.01, grid_levels=3,
+                                 position_amount=100, initial_capital=10000, max_loss=0.2)
+    strategy.handle_price_change()
+
+    text = render(create_grid_status_panel(strategy))
+    assert "未下单" in text
+    assert "pending" in text
+    assert "OrderStatus" not in text
+
+
+def test_panels_render_from_snapshot_without_exchange_calls(tmp_path, monkeypatch):
+    from cryptogrid.ui_components import (
+        create_capital_status_panel, create_market_depth_panel, create_order_status_panel
+    )
+
+    monkeypatch.chdir(tmp_path)
+    exchange = MockExchange(initial_price=10000, volatility=0)
+    strategy = GridTradingStrategy(exchange, "BTC/USDT")
+    strategy.set_strategy_params(initial_price=10000, grid_size=0.01, grid_levels=3,
+                                 position_amount=100, initial_capital=10000, max_loss=0.2)
+    strategy.handle_price_change()
+    snapshot = strategy.snapshots.latest
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError("界面不应该访问交易所")
+
+    monkeypatch.setattr(exchange, "fetch_order_book", forbidden)
+    for panel in (create_capital_status_panel(snapshot), create_market_depth_panel(snapshot.market_depth),
+                  create_grid_status_panel(snapshot), create_order_status_panel(snapshot)):
+        render(panel)
+    assert "pending" in render(create_grid_status_panel(snapshot))